@@ -0,0 +1,62 @@
+from engine.core.interaction import InteractionState, Interaction
+from engine.core.machine import TaskStatus, MachineState
+from engine.core.none import value_none
+from engine.stack.frame import Frame
+from engine.stack.state import StackState
+from lang.spek import static, modules
+from lang.spek.dynamic import Spektakel2Stack
+from lang.spek.modules import SpekStringModuleSpecification
+
+# A program in the style of a presentation: A scene of many visuals, some of which are animated by concurrent tasks,
+# that advance either whenever the presenter presses "next", or with the passage of time.
+scene = """
+from interaction import next, tick
+
+var scene = []
+var i = 0
+while i < {visuals}:
+    scene.append({{"x": i, "y": 0, "label": "visual"}})
+    i = i + 1
+
+def animate(k):
+    var step = 0
+    while step < {steps}:
+        if k % 2 == 0:
+            await next()
+        else:
+            await tick()
+        scene[k]["y"] = step
+        step = step + 1
+
+var tasks = []
+var k = 0
+while k < {tasks}:
+    tasks.append(async animate(k))
+    k = k + 1
+for t in tasks:
+    await t
+"""
+
+
+def translate(code, roots=None):
+    """
+    Translates a Spek program into a StackProgram.
+    :param code: The source code of a Spek module, as a string.
+    :param roots: The file system roots that should be searched for modules to be imported.
+    :return: A StackProgram.
+    """
+    finder, builtin = modules.build_default_finder([] if roots is None else roots)
+    v = static.SpektakelValidator(finder, builtin)
+    translator = Spektakel2Stack(builtin)
+    return translator.translate(SpekStringModuleSpecification(code, v, builtin)).compile()
+
+
+def initial_state(program, num_fvars=2):
+    """
+    Constructs the default initial state of the virtual machine.
+    :param program: The StackProgram that should be executed by the machine.
+    :param num_fvars: The number of variables to allocate on the initial stack frame.
+    :return: A MachineState object.
+    """
+    frames = [Frame(program.location(0), [value_none] * num_fvars)]
+    return MachineState([StackState(TaskStatus.WAITING, frames), *(InteractionState(i) for i in Interaction)])
@@ -0,0 +1,61 @@
+import argparse
+import pickle
+import time
+
+from benchmarks import scene, translate, initial_state
+from engine.exploration import explore, schedule_nonzeno
+from engine.serialization import Encoder, Decoder
+from state_space.lts import state_space
+
+
+def contents(lts):
+    """
+    Lists the contents of all the states of an LTS.
+    :param lts: An LTS.
+    :return: A list of MachineStates.
+    """
+    visited, result, agenda = set(), [], [lts.initial]
+    while len(agenda) > 0:
+        s = agenda.pop()
+        if id(s) not in visited:
+            visited.add(id(s))
+            result.append(s.content)
+            agenda.extend(t.target for t in s.transitions)
+    return result
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Measures the throughput of encoding and decoding machine states.")
+    parser.add_argument("--visuals", type=int, default=200, help="The number of visuals in the scene.")
+    parser.add_argument("--tasks", type=int, default=4, help="The number of concurrently animated visuals.")
+    parser.add_argument("--steps", type=int, default=3, help="The number of steps of every animation.")
+    args = parser.parse_args(args)
+
+    program = translate(scene.format(visuals=args.visuals, tasks=args.tasks, steps=args.steps))
+    states = contents(state_space(explore(initial_state(program), scheduler=schedule_nonzeno)))
+
+    encoder, decoder = Encoder(), Decoder()
+    start = time.perf_counter()
+    messages = [encoder.encode(s) for s in states]
+    encoding = time.perf_counter() - start
+    start = time.perf_counter()
+    for m in messages:
+        decoder.decode(m)
+    decoding = time.perf_counter() - start
+
+    total = sum(map(len, messages))
+    print(f"states:   {len(states)}")
+    print(f"bytes:    {total} ({total // len(states)} per state, {len(messages[0])} in the first message)")
+    print(f"encoding: {encoding:.3f} s ({1e6 * encoding / len(states):.0f} us per state)")
+    print(f"decoding: {decoding:.3f} s ({1e6 * decoding / len(states):.0f} us per state)")
+
+    try:
+        start = time.perf_counter()
+        size = sum(len(pickle.dumps(s)) for s in states)
+        print(f"pickle:   {time.perf_counter() - start:.3f} s, {size} bytes")
+    except Exception as ex:
+        print(f"pickle:   fails ({ex})")
+
+
+if __name__ == "__main__":
+    main()
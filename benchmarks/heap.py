@@ -0,0 +1,61 @@
+import argparse
+
+from benchmarks import scene, translate, initial_state
+from engine.exploration import explore, schedule_nonzeno
+from engine.heap import HeapProfile
+from state_space.lts import state_space
+
+
+def table(title, figures, top, name=str):
+    """
+    Prints figures of a heap profile, the largest first.
+    :param title: The heading for the keys of the figures.
+    :param figures: A dict mapping keys to pairs (n, b), see HeapProfile.
+    :param top: The maximum number of keys to list.
+    :param name: A procedure that maps keys to strings.
+    """
+    print(f"{title:<48}{'objects':>12}{'bytes':>14}")
+    ranked = sorted(figures.items(), key=lambda item: -item[1][1])
+    for k, (n, b) in ranked[:top]:
+        print(f"{name(k):<48}{n:>12}{b:>14}")
+    print()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Reports what the states of a Spek program consist of.")
+    parser.add_argument("--file", type=str, default=None,
+                        help="A Spek module to profile. If omitted, a sample scene is profiled.")
+    parser.add_argument("--visuals", type=int, default=200, help="The number of visuals in the sample scene.")
+    parser.add_argument("--tasks", type=int, default=4, help="The number of concurrently animated visuals.")
+    parser.add_argument("--steps", type=int, default=3, help="The number of steps of every animation.")
+    parser.add_argument("--sample", type=int, default=None,
+                        help="The number of states to profile, in breadth-first order. All states by default.")
+    parser.add_argument("--top", type=int, default=12, help="The number of entries to list per table.")
+    args = parser.parse_args(args)
+
+    if args.file is None:
+        code = scene.format(visuals=args.visuals, tasks=args.tasks, steps=args.steps)
+    else:
+        with open(args.file, "r") as f:
+            code = f.read()
+
+    program = translate(code)
+    profile = HeapProfile()
+    profile.add_lts(state_space(explore(initial_state(program), scheduler=schedule_nonzeno)), limit=args.sample)
+
+    n, b = profile.total
+    k = max(profile.num_states, 1)
+    print(f"states:  {profile.num_states}")
+    print(f"objects: {n} ({n // k} per state)")
+    print(f"bytes:   {b} ({b // k} per state)")
+    for title, (n, b) in [("shared with predecessor:", profile.shared), ("unique:", profile.unique)]:
+        print(f"{title:<25}{n:>10} objects {b:>12} bytes ({100 * b / max(profile.total[1], 1):.1f}%)")
+    print()
+
+    table("type", profile.types, args.top, name=lambda t: t.__name__)
+    table("task", profile.tasks, args.top, name=lambda t: "(none)" if t is None else f"task {t}")
+    table("location", profile.locations, args.top, name=lambda l: "(none)" if l is None else str(l))
+
+
+if __name__ == "__main__":
+    main()
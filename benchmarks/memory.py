@@ -0,0 +1,93 @@
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks import scene, translate, initial_state
+from engine.exploration import explore, schedule_nonzeno
+from engine.heap import footprint, reachable, slot_names
+from state_space.lts import state_space
+
+
+_plain = {}
+
+
+def unslotted(o):
+    """
+    Measures the number of bytes that an object would occupy if its type stored its attributes in an instance
+    dictionary rather than in slots, by copying the attributes into an instance of a type without slots.
+    :param o: An object.
+    :return: An int, which is footprint(o) for objects that do not have any slots.
+    """
+    names = slot_names(type(o))
+    if len(names) == 0:
+        return footprint(o)
+    try:
+        plain = _plain[type(o)]
+    except KeyError:
+        # One type per slotted type, such that the instance dictionaries of its instances can share their keys:
+        plain = type(type(o).__name__, (), {})
+        _plain[type(o)] = plain
+    p = plain()
+    for n in names:
+        try:
+            setattr(p, n, getattr(o, n))
+        except AttributeError:
+            pass
+    vars(p).update(getattr(o, "__dict__", {}))
+    return footprint(p)
+
+
+def instances(lts):
+    """
+    Counts the objects retained by the states of an LTS, per type. Objects that belong to the machine or to the code
+    it executes are not counted, see HeapProfile.
+    :param lts: An LTS.
+    :return: A dict mapping types to triples (n, b, u), where n is the number of distinct instances of the type, b is
+             the number of bytes they occupy, see footprint, and u is the number of bytes they would occupy without
+             slots, see unslotted.
+    """
+    counts = {}
+    for o in reachable(lts.initial).values():
+        n, b, u = counts.get(type(o), (0, 0, 0))
+        counts[type(o)] = (n + 1, b + footprint(o), u + unslotted(o))
+    return counts
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Measures the memory occupied by the state space of a sample program.")
+    parser.add_argument("--visuals", type=int, default=200, help="The number of visuals in the scene.")
+    parser.add_argument("--tasks", type=int, default=4, help="The number of concurrently animated visuals.")
+    parser.add_argument("--steps", type=int, default=3, help="The number of steps of every animation.")
+    parser.add_argument("--top", type=int, default=12, help="The number of types to list.")
+    args = parser.parse_args(args)
+
+    program = translate(scene.format(visuals=args.visuals, tasks=args.tasks, steps=args.steps))
+    s0 = initial_state(program)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    lts = state_space(explore(s0, scheduler=schedule_nonzeno))
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = instances(lts)
+    num_states = counts.get(type(lts.initial), (0, 0, 0))[0]
+    k = max(num_states, 1)
+    b = sum(b for _, b, _ in counts.values())
+    u = sum(u for _, _, u in counts.values())
+
+    print(f"states:         {num_states}")
+    print(f"retained bytes: {after - before} ({(after - before) // k} per state)")
+    print(f"peak bytes:     {peak - before}")
+    print(f"object bytes:   {b} ({b // k} per state), {u} ({u // k} per state) with instance dictionaries "
+          f"instead of slots")
+    print()
+    print(f"{'type':<24}{'instances':>12}{'bytes':>14}{'bytes/instance':>16}{'without slots':>16}")
+    ranked = sorted(counts.items(), key=lambda item: -item[1][1])
+    for t, (n, b, u) in ranked[:args.top]:
+        print(f"{t.__name__:<24}{n:>12}{b:>14}{b / n:>16.1f}{u / n:>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+import util
+from benchmarks import scene, translate, initial_state
+from engine.exploration import explore, schedule_nonzeno
+from state_space.lts import state_space
+
+
+def measure(program, trusted, repetitions):
+    """
+    Measures the time it takes to explore the state space of a program.
+    :param program: A StackProgram.
+    :param trusted: A bool specifying if trusted mode is to be switched on during exploration.
+    :param repetitions: The number of times the exploration is to be repeated.
+    :return: The shortest of the measured durations, in seconds.
+    """
+    previous = util.set_trusted(trusted)
+    try:
+        durations = []
+        for _ in range(repetitions):
+            s0 = initial_state(program)
+            start = time.perf_counter()
+            state_space(explore(s0, scheduler=schedule_nonzeno))
+            durations.append(time.perf_counter() - start)
+        return min(durations)
+    finally:
+        util.set_trusted(previous)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compares exploration times with and without trusted mode.")
+    parser.add_argument("--visuals", type=int, default=200, help="The number of visuals in the scene.")
+    parser.add_argument("--tasks", type=int, default=4, help="The number of concurrently animated visuals.")
+    parser.add_argument("--steps", type=int, default=3, help="The number of steps of every animation.")
+    parser.add_argument("--repetitions", type=int, default=5, help="The number of measurements per mode.")
+    args = parser.parse_args(args)
+
+    program = translate(scene.format(visuals=args.visuals, tasks=args.tasks, steps=args.steps))
+
+    checked = measure(program, False, args.repetitions)
+    trusted = measure(program, True, args.repetitions)
+
+    print(f"checked: {checked:.3f} s")
+    print(f"trusted: {trusted:.3f} s ({100 * (checked - trusted) / checked:.1f}% faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 #!/bin/bash
 
-coverage run --branch -m unittest tests.lexing tests.parsing tests.validation tests.machine tests.translation tests.printing tests.bisimilarity
+coverage run --branch -m unittest tests.lexing tests.parsing tests.validation tests.machine tests.translation tests.printing tests.bisimilarity tests.serialization tests.modelcheck tests.composition tests.persistent
 coverage report --omit="tests/*"
 coverage html --omit="tests/*"
\ No newline at end of file
@@ -72,17 +72,19 @@ type_object = None
 
 class VObject(Value):
 
+    __slots__ = ("_sealed", "_hash")
+
     @property
     def type(self):
         global type_object
         return type_object
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, VObject)
+            return () if isinstance(other, VObject) else False
 
     def cequals(self, other):
         return self is other
@@ -97,7 +99,7 @@ class VObject(Value):
         return self is other
 
     def _seal(self):
-        pass
+        return ()
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -1,10 +1,12 @@
 from abc import ABC
 
 from engine.core.atomic import type_type, AtomicType
+from engine.core.fingerprint import fingerprint, combine
 from engine.core.finite import FiniteValue
 from engine.core.none import value_none
 from engine.core.type import Type, merge_linear, linearization
 from engine.core.value import Value
+import util
 from util import check_type
 from util.immutable import check_unsealed
 
@@ -176,6 +178,8 @@ class VCompound(Value):
     An instance of a compound type.
     """
 
+    __slots__ = ("_sealed", "_hash", "_type", "_fields")
+
     def __init__(self, t):
         """
         Creates a compound value.
@@ -194,11 +198,10 @@ class VCompound(Value):
         return self._type
 
     def hash(self):
-        return len(self._fields)
+        return combine(map(fingerprint, self._fields))
 
     def _seal(self):
-        for f in self._fields:
-            f.seal()
+        return self._fields
 
     def print(self, out):
         out.write("Compound(")
@@ -208,15 +211,14 @@ class VCompound(Value):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            if not (isinstance(other, VCompound)
-                    and self._type.bequals(other._type, bijection)):
+            if not isinstance(other, VCompound):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._fields, other._fields))
+            return [(self._type, other._type), *zip(self._fields, other._fields)]
 
     def cequals(self, other):
         return self.equals(other)
@@ -236,9 +238,16 @@ class VCompound(Value):
             c._fields = [f.clone_unsealed(clones=clones) for f in self._fields]
             return c
 
+    def __getstate__(self):
+        return self._sealed, self._type, self._fields
+
+    def __setstate__(self, state):
+        self._sealed, self._type, self._fields = state
+        self._hash = None
+
     def __getitem__(self, item):
         return self._fields[int(item)]
 
     def __setitem__(self, key, value):
         check_unsealed(self)
-        self._fields[int(key)] = check_type(value, Value)
+        self._fields[int(key)] = value if util.trusted else check_type(value, Value)
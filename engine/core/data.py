@@ -1,5 +1,7 @@
 import abc
+import math
 from abc import ABC
+from weakref import WeakValueDictionary
 
 from engine.core.atomic import type_object
 from engine.core.finite import FiniteValue
@@ -53,11 +55,48 @@ class VPython(Immutable, Value, ABC):
 
     t2i = None
 
+    # Maps the interning keys of instances to canonical instances, see VPython.intern. None if instances of this
+    # type are not interned.
+    interned = None
+    # The maximum number of entries of 'interned', or None, if the table does not need to be bounded, because it
+    # refers to its instances only weakly.
+    interned_limit = None
+
     def __new__(cls, *args, value=None, **kwargs):
         if value is not None:
-            return super().__new__(cls, value, *args, **kwargs)
+            instance = super().__new__(cls, value, *args, **kwargs)
         else:
-            return super().__new__(cls, *args, **kwargs)
+            instance = super().__new__(cls, *args, **kwargs)
+        return instance.intern()
+
+    def intern_key(self):
+        """
+        Computes a hashable object that is equal for two instances of this type if and only if they are
+        indistinguishable by anything but their identity.
+        :return: A hashable object, or None, if this instance is not to be interned.
+        """
+        return self.__python__()
+
+    def intern(self):
+        """
+        Retrieves the canonical instance of this type that is indistinguishable from this one except by identity.
+        Since instances are interned as soon as they are constructed, states that contain equal values share the same
+        objects, and comparing such values amounts to an identity check.
+        :return: A VPython object, which is this object itself if no canonical instance existed yet.
+        """
+        table = type(self).interned
+        if table is None:
+            return self
+        key = self.intern_key()
+        if key is None:
+            return self
+        try:
+            return table[key]
+        except KeyError:
+            limit = type(self).interned_limit
+            if limit is None or len(table) < limit:
+                table[key] = self
+            return self
 
     def __init__(self, value):
         # int.__new__ already took care of the value.
@@ -77,10 +116,10 @@ class VPython(Immutable, Value, ABC):
         return super(ABC, self).__hash__()
 
     def equals(self, other):
-        return isinstance(other, type(self)) and super(ABC, self).__eq__(other)
+        return self is other or isinstance(other, type(self)) and super(ABC, self).__eq__(other)
 
-    def bequals(self, other, bijection):
-        return self.equals(other)
+    def _bequals(self, other, bijection):
+        return () if self.equals(other) else False
 
     def cequals(self, other):
         try:
@@ -98,6 +137,10 @@ class VInt(VPython, int):
     Equivalent to Python's int.
     """
 
+    # Instances of int subtypes cannot be referenced weakly, so the table is bounded instead:
+    interned = dict()
+    interned_limit = 2 ** 16
+
     @property
     def type(self):
         return VInt.intrinsic_type
@@ -112,6 +155,15 @@ class VFloat(VPython, float):
     Equivalent to Python's float.
     """
 
+    interned = WeakValueDictionary()
+
+    def intern_key(self):
+        x = float(self)
+        if math.isnan(x):
+            return None
+        # 0.0 and -0.0 are equal, but print differently:
+        return x, math.copysign(1.0, x)
+
     @property
     def type(self):
         return VFloat.intrinsic_type
@@ -125,6 +177,8 @@ class VIterator(Value, ABC):
     Represents the state of an iteration over an iterable.
     """
 
+    __slots__ = ("_sealed", "_hash", "_iterable")
+
     def __init__(self, iterable):
         """
         Creates a new VIterator.
@@ -144,7 +198,7 @@ class VIterator(Value, ABC):
         return self is other
 
     def _seal(self):
-        self._iterable.seal()
+        return self._iterable,
 
     def cequals(self, other):
         return self is other
@@ -178,6 +232,8 @@ class VIndexingIterator(VIterator):
     This iterator works will all immutable, indexable sequence types.
     """
 
+    __slots__ = ("_i",)
+
     def __init__(self, s):
         super().__init__(check_type(s, Value))
         self._i = 0
@@ -186,14 +242,15 @@ class VIndexingIterator(VIterator):
     def type(self):
         return VIndexingIterator.intrinsic_type
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, VIndexingIterator)
-                    and self._i == other._i
-                    and self.iterable.bequals(other.iterable, bijection))
+            if not (isinstance(other, VIndexingIterator)
+                    and self._i == other._i):
+                return False
+            return ((self.iterable, other.iterable),)
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -230,6 +287,8 @@ class VStr(VPython, str):
     Equivalent to Python's str.
     """
 
+    interned = WeakValueDictionary()
+
     @intrinsic_member()
     def __init__(self, value):
         super().__init__(value)
@@ -314,9 +373,15 @@ class VException(Value, Exception):
         return self._pexception
 
     def _seal(self):
-        self._msg.seal()
-        for a in self._args:
-            a.seal()
+        return (self._msg, *self._args)
+
+    def __getstate__(self):
+        return self._sealed, self._msg, self._args, self._pexception
+
+    def __setstate__(self, state):
+        self._sealed, self._msg, self._args, self._pexception = state
+        self._hash = None
+        Exception.__init__(self, self._msg)
 
     def hash(self):
         return hash((self._msg, len(self._args)))
@@ -324,17 +389,16 @@ class VException(Value, Exception):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, type(self))
                     and len(self._args) == len(other._args)
-                    and self._msg.bequals(other._msg, bijection)
                     and self._pexception is other._pexception):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._args, other._args))
+            return [(self._msg, other._msg), *zip(self._args, other._args)]
 
     def cequals(self, other):
         return self.equals(other)
@@ -383,8 +447,9 @@ class VCancellationError(VException):
     def hash(self):
         return hash(self._initial) ^ hash(self.message)
 
-    def bequals(self, other, bijection):
-        return super().bequals(other, bijection) and self._initial == other._initial
+    def _bequals(self, other, bijection):
+        pairs = super()._bequals(other, bijection)
+        return pairs if pairs is not False and self._initial == other._initial else False
 
     def clone_unsealed(self, clones=None):
         if clones is None:
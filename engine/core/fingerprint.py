@@ -0,0 +1,45 @@
+from util.immutable import Immutable
+
+MASK = 2 ** 64 - 1
+
+
+def mix(position, fp):
+    """
+    Scrambles a fingerprint together with the position at which it occurs in a composite value.
+    Composite values sum up the results of this procedure for all their components (modulo 2 ** 64), in the style of
+    Zobrist hashing: Replacing a single component then amounts to subtracting its old term and adding its new one,
+    which is why fingerprints can be maintained incrementally while a value is being mutated.
+    :param position: An int identifying the position of the component.
+    :param fp: The fingerprint of the component, an int.
+    :return: An int in range(2 ** 64).
+    """
+    z = (fp + position * 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def fingerprint(value):
+    """
+    Computes a shallow fingerprint of a value, that is compatible with Value.bequals, i.e. values that are
+    indistinguishable modulo a bijection of object identities have equal fingerprints.
+    Immutable values are distinguishable only by content, so their fingerprint is their hash. All other values may be
+    distinguishable by identity, which is not preserved by bequals, and may still be mutated after they have been
+    fingerprinted, so their fingerprint depends only on their Python type.
+    :param value: A Value object.
+    :return: An int in range(2 ** 64).
+    """
+    if isinstance(value, Immutable):
+        # Intrinsic values are allocated by __new__ and may be stored before __init__ has marked them as sealed,
+        # which is why hash(value) cannot be used here. Their content is determined by __new__ already.
+        return value.hash() & MASK
+    return hash(type(value)) & MASK
+
+
+def combine(fps):
+    """
+    Computes the fingerprint of a sequence of components, as the sum of their mixed fingerprints.
+    :param fps: An iterable of component fingerprints.
+    :return: An int in range(2 ** 64).
+    """
+    return sum(mix(idx, fp) for idx, fp in enumerate(fps)) & MASK
@@ -10,8 +10,8 @@ class FiniteValue(Finite, Value, ABC):
     A Value subtype that is also a subtype of Finite.
     """
 
-    def bequals(self, other, _):
-        return self is other
+    def _bequals(self, other, _):
+        return () if self is other else False
 
     def cequals(self, other):
         return self is other
@@ -37,6 +37,8 @@ class InteractionState(TaskState):
     Models a task that receives an Interaction. All this task does when executed is complete itself.
     """
 
+    __slots__ = ("_interaction",)
+
     def __init__(self, interaction, status=TaskStatus.WAITING):
         """
         Initializes a new interaction state.
@@ -63,7 +65,7 @@ class InteractionState(TaskState):
             return c
 
     def _seal(self):
-        pass
+        return ()
 
     @property
     def interaction(self):
@@ -79,7 +81,7 @@ class InteractionState(TaskState):
         if not self.enabled(mstate):
             return
         self.status = TaskStatus.COMPLETED
-        for idx, t in enumerate(mstate.task_states):
+        for idx, t in enumerate(mstate.iter_task_states()):
             if t is self:
                 mstate.remove_task(idx)
                 mstate.add_task(InteractionState(self.interaction, status=TaskStatus.WAITING), index=idx)
@@ -89,13 +91,13 @@ class InteractionState(TaskState):
         check_sealed(self)
         return hash((self.status, self._interaction))
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             if isinstance(other, InteractionState) and (self._interaction, self.status) == (other._interaction, other.status):
                 bijection[id(self)] = id(other)
-                return True
+                return ()
             return False
 
     def chash(self):
@@ -7,6 +7,7 @@ from engine.core.procedure import Procedure
 from engine.core.property import OrdinaryProperty
 from engine.core.type import Type
 from engine.core.value import Value
+import util
 from util import check_types, check_type
 from util.immutable import Immutable
 
@@ -33,8 +34,8 @@ class IntrinsicProcedure(Immutable, Procedure):
     def equals(self, other):
         return self is other or isinstance(other, IntrinsicProcedure) and self._p is other._p
 
-    def bequals(self, other, bijection):
-        return self.equals(other)
+    def _bequals(self, other, bijection):
+        return () if self.equals(other) else False
 
     def cequals(self, other):
         return self.equals(other)
@@ -46,7 +47,7 @@ class IntrinsicProcedure(Immutable, Procedure):
         out.write(f"IntrinsicProcedure({self._p})")
 
     def initiate(self, tstate, mstate, *args):
-        return self._p(*check_types(args, Value))
+        return self._p(*(args if util.trusted else check_types(args, Value)))
 
     def __call__(self, *args):
         return self._p(*check_types(args, Value))
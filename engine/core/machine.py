@@ -1,8 +1,10 @@
 import abc
 from enum import Enum
 
+from engine.core.fingerprint import MASK, mix
 from engine.core.value import Value
 from engine.stack.exceptions import unhashable
+import util
 from util import check_type, check_types
 from util.immutable import check_unsealed, check_sealed
 
@@ -23,6 +25,8 @@ class TaskState(Value, abc.ABC):
     Represents the current state of a computation.
     """
 
+    __slots__ = ("_sealed", "_hash", "_status")
+
     @property
     def type(self):
         return TaskState.intrinsic_type
@@ -33,7 +37,7 @@ class TaskState(Value, abc.ABC):
         :param status: The status of the task, i.e. a TaskStatus object.
         """
         super().__init__()
-        self._status = check_type(status, TaskStatus)
+        self._status = status if util.trusted else check_type(status, TaskStatus)
 
     @abc.abstractmethod
     def cancel(self):
@@ -55,7 +59,7 @@ class TaskState(Value, abc.ABC):
     @status.setter
     def status(self, value):
         check_unsealed(self)
-        self._status = check_type(value, TaskStatus)
+        self._status = value if util.trusted else check_type(value, TaskStatus)
 
     def equals(self, other):
         return self is other
@@ -88,6 +92,8 @@ class MachineState(Value):
     Represents the state of a virtual machine that is executing tasks.
     """
 
+    __slots__ = ("_sealed", "_hash", "_tstates", "__weakref__")
+
     @property
     def type(self):
         raise NotImplementedError("MachineStates should be visible for machine programs!")
@@ -98,7 +104,7 @@ class MachineState(Value):
         :param task_states: The states of all the tasks running on the machine.
         """
         super().__init__()
-        self._tstates = list(check_types(task_states, TaskState))
+        self._tstates = list(task_states if util.trusted else check_types(task_states, TaskState))
 
     def print(self, out):
         out.write("MachineState(")
@@ -110,9 +116,8 @@ class MachineState(Value):
         out.write(")")
 
     def _seal(self):
-        for t in self._tstates:
-            t.seal()
         self._tstates = tuple(self._tstates)
+        return self._tstates
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -126,10 +131,10 @@ class MachineState(Value):
 
     def hash(self):
         check_sealed(self)
-        h = 4711
-        for s in self._tstates:
-            h ^= hash(s)
-        return h
+        h = mix(len(self._tstates), 4711)
+        for idx, s in enumerate(self._tstates):
+            h += mix(idx, hash(s))
+        return h & MASK
 
     def equals(self, other):
         # According to the documentation of Value.bequals, Value.equals is supposed to decide
@@ -137,15 +142,15 @@ class MachineState(Value):
         # is equivalent to the semantics of Value.bequals.
         return self.bequals(other, {})
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, MachineState)
                     and len(self._tstates) == len(other._tstates)):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._tstates, other._tstates))
+            return zip(self._tstates, other._tstates)
 
     def cequals(self, other):
         # This should actually never be called, because machine programs don't have access to the entire machine state.
@@ -159,7 +164,31 @@ class MachineState(Value):
         """
         The TaskStates for all the tasks running on the machine.
         """
-        return tuple(self._tstates)
+        # Once sealed, the task states are held in a tuple already, which does not need to be copied:
+        return self._tstates if self._sealed else tuple(self._tstates)
+
+    @property
+    def num_tasks(self):
+        """
+        The number of tasks running on the machine.
+        """
+        return len(self._tstates)
+
+    def task_state(self, index):
+        """
+        Retrieves the state of a task running on the machine, without copying the sequence of all task states.
+        :param index: The index of the task in self.task_states.
+        :return: A TaskState object.
+        """
+        return self._tstates[index]
+
+    def iter_task_states(self):
+        """
+        Enumerates the states of all the tasks running on the machine, without copying the sequence of all task states.
+        Tasks must not be added or removed before the enumeration has finished.
+        :return: An iterator over TaskState objects.
+        """
+        return iter(self._tstates)
 
     def add_task(self, t, index=None):
         """
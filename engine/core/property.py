@@ -72,15 +72,17 @@ class OrdinaryProperty(Property):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, OrdinaryProperty)
-                    and self._getter.bequals(other._getter, bijection)
-                    and (self._setter is None) == (other._setter is None)
-                    and (self._setter is None or self._setter.bequals(other._setter, bijection)))
+            if not (isinstance(other, OrdinaryProperty)
+                    and (self._setter is None) == (other._setter is None)):
+                return False
+            if self._setter is None:
+                return ((self._getter, other._getter),)
+            return (self._getter, other._getter), (self._setter, other._setter)
 
     def cequals(self, other):
         return self is other
@@ -89,8 +91,9 @@ class OrdinaryProperty(Property):
         return hash((self._getter.chash(), (0 if self._setter is None else self._setter.chash())))
 
     def _seal(self):
-        self._getter.seal()
-        self._setter.seal()
+        if self._setter is None:
+            return self._getter,
+        return self._getter, self._setter
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -101,5 +104,6 @@ class OrdinaryProperty(Property):
             c = OrdinaryProperty(self._getter, self._setter)
             clones[id(self)] = c
             c._getter = self._getter.clone_unsealed(clones)
-            c._setter = self._setter.clone_unsealed(clones)
+            if self._setter is not None:
+                c._setter = self._setter.clone_unsealed(clones)
             return c
@@ -9,8 +9,8 @@ class SingletonValue(Singleton, Value, ABC):
     A Value subtype of which only one direct instance can exist.
     """
 
-    def bequals(self, other, _):
-        return self is other
+    def _bequals(self, other, _):
+        return () if self is other else False
 
     def cequals(self, other):
         return self is other
@@ -126,9 +126,9 @@ class Type(Value, abc.ABC):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, Type)
@@ -136,16 +136,15 @@ class Type(Value, abc.ABC):
                     == (other._name, len(other._bases), len(other._members_direct))):
                 return False
 
+            pairs = []
             for name, member in self._members_direct.items():
                 try:
-                    member_other = other._members_direct[name]
+                    pairs.append((member, other._members_direct[name]))
                 except KeyError:
                     return False
 
-                if not member.bequals(member_other, bijection):
-                    return False
-
-            return all(a.bequals(b, bijection) for a, b in zip(self._bases, other._bases))
+            pairs.extend(zip(self._bases, other._bases))
+            return pairs
 
     def cequals(self, other):
         return self is other
@@ -174,10 +173,7 @@ class Type(Value, abc.ABC):
         out.write(self._name)
 
     def _seal(self):
-        for b in self.bases:
-            b.seal()
-        for m in self._members_direct.values():
-            m.seal()
+        return (*self.bases, *self._members_direct.values())
 
     @property
     @abc.abstractmethod
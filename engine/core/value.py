@@ -1,4 +1,5 @@
 import abc
+from collections import deque
 
 from util.immutable import Sealable
 from util.printable import Printable
@@ -9,6 +10,8 @@ class Value(Sealable, Printable, abc.ABC):
     Represents a runtime value.
     """
 
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def type(self):
@@ -18,7 +21,6 @@ class Value(Sealable, Printable, abc.ABC):
         """
         pass
 
-    @abc.abstractmethod
     def bequals(self, other, bijection):
         """
         Decides if for every machine state m containing self, there exists a bijection between the object identities in
@@ -48,6 +50,29 @@ class Value(Sealable, Printable, abc.ABC):
                   The mapping must contain all sub values of self and other that are distinguishable by identity.
         :return: A boolean value.
         """
+        # Values can be nested arbitrarily deeply, so we must not recurse. Instead, pairs of sub-values are compared
+        # in breadth-first order, such that cheap mismatches close to the root, like differing types, lengths or
+        # statuses, are detected before any deeper parts of the two values are visited.
+        agenda = deque(((self, other),))
+        while len(agenda) > 0:
+            a, b = agenda.popleft()
+            pairs = a._bequals(b, bijection)
+            if pairs is False:
+                return False
+            agenda.extend(pairs)
+        return True
+
+    @abc.abstractmethod
+    def _bequals(self, other, bijection):
+        """
+        Performs a single step of self.bequals: Compares self to other without comparing any of their sub-values.
+        This step must extend the bijection for self, if self is distinguishable by identity.
+        :param other: Another Value.
+        :param bijection: The mapping that is passed to self.bequals.
+        :return: False, if self and other are found to be different, otherwise an iterable of pairs (a, b) of
+                 sub-values of self and other, for which a.bequals(b, bijection) must hold, for self.bequals(other,
+                 bijection) to hold.
+        """
         pass
 
     @abc.abstractmethod
@@ -0,0 +1,329 @@
+import itertools
+from enum import Enum
+
+from engine.core.interaction import InteractionState
+from engine.core.machine import MachineState
+from engine.core.value import Value
+from engine.exploration import schedule_all
+from engine.stack.program import StackProgram
+from engine.stack.reference import Reference
+from engine.stack.state import StackState
+from util import check_type
+from util.immutable import Immutable
+
+_atoms = (int, float, complex, str, bytes, bool, type(None), type, Enum)
+
+# The address of the list of tasks of a machine state, which is written by steps that add or remove tasks, and read by
+# steps that address stack frames by task index:
+_TASKS = -1
+
+
+def _children(o):
+    """
+    Enumerates the objects that an object of a machine state refers to directly, descending into plain Python
+    containers and helper objects, but not into immutable values, which cannot be written.
+    :param o: An object.
+    :return: An iterable of objects.
+    """
+    if isinstance(o, dict):
+        return itertools.chain(o.keys(), o.values())
+    if isinstance(o, (list, tuple, set, frozenset)):
+        return o
+    if isinstance(o, BaseException) and not isinstance(o, Value):
+        return ()
+    # Cached hashes are not content, they may have been computed for one version of an object, but not for another.
+    # Neither are weak references to an object.
+    cs = [v for k, v in getattr(o, "__dict__", {}).items() if k != "_hash"]
+    for cls in type(o).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if slot not in ("_hash", "__weakref__"):
+                try:
+                    cs.append(getattr(o, slot))
+                except AttributeError:
+                    pass
+    return cs
+
+
+def _objects(root):
+    """
+    Enumerates the mutable values reachable from an object.
+    :param root: An object.
+    :return: A list of the mutable Value objects reachable from root, without duplicates.
+    """
+    found = []
+    visited = set()
+    agenda = [root]
+    while len(agenda) > 0:
+        o = agenda.pop()
+        if isinstance(o, _atoms) or isinstance(o, Immutable) or id(o) in visited:
+            continue
+        visited.add(id(o))
+        if isinstance(o, Value):
+            found.append(o)
+        agenda.extend(_children(o))
+    return found
+
+
+def _references(program, cache):
+    """
+    Collects the references occurring in the instructions of a program, not including the programs these instructions
+    refer to.
+    :param program: A StackProgram.
+    :param cache: A dict that maps ids of programs to the results of previous calls of this procedure.
+    :return: A list of Reference objects.
+    """
+    try:
+        return cache[id(program)][1]
+    except KeyError:
+        pass
+    found = []
+    visited = set()
+    agenda = list(program)
+    while len(agenda) > 0:
+        o = agenda.pop()
+        if isinstance(o, _atoms) or isinstance(o, StackProgram) or id(o) in visited:
+            continue
+        visited.add(id(o))
+        if isinstance(o, Reference):
+            found.append(o)
+        agenda.extend(_children(o))
+    # Keeping the program alive keeps its id from being reused:
+    cache[id(program)] = (program, found)
+    return found
+
+
+def _shallow(o, addresses):
+    """
+    Summarizes the direct content of an object, such that two versions of the same object have equal summaries if and
+    only if they refer to the same objects.
+    :param o: An object.
+    :param addresses: A dict mapping the ids of mutable values to their addresses.
+    :return: A hashable object.
+    """
+    if isinstance(o, _atoms) or isinstance(o, Immutable):
+        return o
+    if isinstance(o, Value) and id(o) in addresses:
+        return "@", addresses[id(o)]
+    if (isinstance(o, (dict, list, tuple, set, frozenset))
+            or (hasattr(o, "__dict__") or hasattr(type(o), "__slots__")) and not isinstance(o, BaseException)):
+        return type(o), tuple(_shallow(c, addresses) for c in _children(o))
+    return id(o)
+
+
+def _content(o, addresses):
+    """
+    Summarizes the content of a mutable value, see _shallow.
+    :param o: A mutable Value object.
+    :param addresses: A dict mapping the ids of mutable values to their addresses.
+    :return: A hashable object.
+    """
+    return tuple(_shallow(c, addresses) for c in _children(o))
+
+
+class Footprint:
+    """
+    Describes the effects of an event, i.e. of a step of a task: The addresses of the mutable values that the step may
+    have read and those that it has written. Writes are determined exactly, by comparing the state after the step to
+    the state before. Reads are over-approximated by all the values reachable from the task and from the stack frames
+    that its instructions address explicitly, because intrinsic procedures and operators inspect values without going
+    through References. A step that completes an interaction is global, i.e. dependent on all other steps.
+    """
+
+    def __init__(self, task, reads, writes, glob):
+        """
+        Describes an event.
+        :param task: The address of the TaskState that performed the step.
+        :param reads: A frozenset of addresses.
+        :param writes: A frozenset of addresses.
+        :param glob: A bool specifying if the step is dependent on all other steps.
+        """
+        self.task = task
+        self.reads = reads
+        self.writes = writes
+        self.glob = glob
+
+    def dependent(self, other):
+        """
+        Decides if this event does not commute with another one.
+        :param other: A Footprint.
+        :return: A bool.
+        """
+        return (self.glob or other.glob
+                or not self.writes.isdisjoint(other.writes)
+                or not self.writes.isdisjoint(other.reads)
+                or not other.writes.isdisjoint(self.reads))
+
+
+class _Node:
+    """
+    A state on the current execution, together with the bookkeeping of the DPOR algorithm.
+    """
+
+    def __init__(self, state, addresses, sleep):
+        self.state = state
+        self.addresses = addresses
+        self.objects = {addresses[id(o)]: o for o in _objects(state)}
+        self.tasks = {addresses[id(t)]: idx for idx, t in enumerate(state.task_states)}
+        enabled = set(schedule_all(state))
+        self.enabled = {a: idx for a, idx in self.tasks.items() if idx in enabled}
+        self.sleep = sleep
+        self.backtrack = set()
+        self.done = set()
+        self.event = None
+        self.hb = None
+
+
+def explore_dpor(mstate, depth=None):
+    """
+    Explores the executions of a task machine statelessly, using source-set based dynamic partial order reduction with
+    sleep sets: Of every set of executions that differ only in the order of independent steps (i.e. of every
+    Mazurkiewicz trace), at least one is explored, and usually exactly one. Only the states of the current execution
+    are kept in memory. This is suitable for checking deadlocks and assertions in programs with many independent tasks,
+    but not for computing state spaces, see explore. All enabled tasks are eligible in all states, like for
+    schedule_all.
+    :param mstate: The MachineState object from which to start.
+    :param depth: Either None, or the maximum number of steps of an execution. For machines that can run forever, for
+                  example because they contain interaction tasks, exploration only terminates if a bound is given.
+    :return: A generator of pairs (trace, s), one for every maximal explored execution, where trace is the tuple of the
+             indices of the tasks executed in every step, and s is the sealed MachineState that the execution reaches.
+             An execution is maximal if s enables no task or its length is 'depth'.
+    """
+
+    check_type(mstate, MachineState)
+
+    if not mstate.sealed:
+        mstate = mstate.clone_unsealed()
+        mstate.seal()
+
+    counter = itertools.count()
+    cache = dict()
+    root = _Node(mstate, {id(o): next(counter) for o in _objects(mstate)}, {})
+    stack = [root]
+    trace = []
+
+    def step(node, task):
+        # Executes a task in the state of the given node and determines the footprint of the step.
+        clones = dict()
+        successor = node.state.clone_unsealed(clones)
+        idx = node.tasks[task]
+
+        # The task may access the values reachable from its own state, and stack frames of other tasks that are
+        # addressed explicitly by its instructions. Whether the latter exist at all depends on the list of tasks:
+        reachable = [node.state.task_states[idx]]
+        absolute = False
+        if isinstance(reachable[0], StackState):
+            for f in reachable[0].stack:
+                for r in _references(f.program, cache):
+                    reachable.extend(r.frames(node.state))
+                    absolute |= r.absolute
+        reads = {node.addresses[id(o)] for o in _objects(reachable)}
+        if absolute:
+            reads.add(_TASKS)
+
+        tstate = successor.task_state(idx)
+        tstate.run(successor)
+        successor.seal()
+
+        origins = {id(c): i for i, c in clones.items()}
+        objects = _objects(successor)
+        addresses = dict()
+        writes = set()
+        for o in objects:
+            try:
+                a = node.addresses[origins.get(id(o), id(o))]
+            except KeyError:
+                # Values allocated by the step count as written by it, such that the steps of a launched task are
+                # ordered after the step that launched it.
+                a = next(counter)
+                writes.add(a)
+            addresses[id(o)] = a
+        for o in objects:
+            a = addresses[id(o)]
+            try:
+                original = node.objects[a]
+            except KeyError:
+                continue
+            if _content(o, addresses) != _content(original, node.addresses):
+                writes.add(a)
+
+        before = [node.addresses[id(t)] for t in node.state.task_states]
+        after = [addresses[id(t)] for t in successor.task_states]
+        if before != after:
+            writes.add(_TASKS)
+        glob = isinstance(tstate, InteractionState)
+        return successor, addresses, Footprint(task, frozenset(reads), frozenset(writes), glob)
+
+    def races(node_idx, fp):
+        # Computes the happens-before set of a new event and updates the backtrack sets of earlier nodes accordingly.
+        events = [stack[k].event for k in range(node_idx)]
+        preds = [k for k, e in enumerate(events) if e.task == fp.task or e.dependent(fp)]
+        hb = set()
+        for k in preds:
+            hb.add(k)
+            hb |= stack[k].hb
+        for k in preds:
+            if events[k].task == fp.task or any(k in stack[j].hb for j in preds if j != k):
+                continue
+            # The event k races with the new event. Some initial of notdep(k).fp must be explored before k:
+            v = [j for j in range(k + 1, node_idx) if k not in stack[j].hb]
+            initials = {fp.task} if all(j not in hb for j in v) else set()
+            for pos, j in enumerate(v):
+                if not any(i in stack[j].hb for i in v[:pos]):
+                    initials.add(events[j].task)
+            initials &= stack[k].enabled.keys()
+            if len(initials) > 0 and initials.isdisjoint(stack[k].backtrack):
+                stack[k].backtrack.add(fp.task if fp.task in initials else min(initials))
+        return frozenset(hb)
+
+    while len(stack) > 0:
+        node = stack[-1]
+        i = len(stack) - 1
+
+        if node.event is not None:
+            # We are returning from the exploration of a successor:
+            node.done.add(node.event.task)
+            node.sleep[node.event.task] = node.event
+            node.event = None
+            trace.pop()
+
+        if len(node.done) == 0 and len(node.backtrack) == 0:
+            awake = [a for a in node.enabled if a not in node.sleep]
+            if depth is not None and i >= depth:
+                # The next steps are not explored, but the races they would be involved in must still be reversed:
+                for task in awake:
+                    races(i, step(node, task)[2])
+                yield tuple(trace), node.state
+                stack.pop()
+                continue
+            if len(node.enabled) == 0:
+                yield tuple(trace), node.state
+            if len(awake) == 0:
+                stack.pop()
+                continue
+            node.backtrack.add(awake[0])
+
+        candidates = [a for a in node.backtrack if a not in node.done and a not in node.sleep]
+        if len(candidates) == 0:
+            stack.pop()
+            continue
+
+        task = min(candidates)
+        successor, addresses, fp = step(node, task)
+        node.hb = races(i, fp)
+        node.event = fp
+        trace.append(node.tasks[task])
+        sleep = {q: e for q, e in node.sleep.items() if not e.dependent(fp)}
+        stack.append(_Node(successor, addresses, sleep))
+
+
+def deadlocks(mstate, depth=None):
+    """
+    Searches for reachable deadlocks, i.e. states in which tasks remain that cannot make progress, using explore_dpor.
+    :param mstate: The MachineState object from which to start.
+    :param depth: See explore_dpor.
+    :return: A generator of pairs (trace, s), where s is a deadlocked MachineState and trace is the tuple of the
+             indices of the tasks executed to reach it.
+    """
+    for trace, s in explore_dpor(mstate, depth):
+        if len(schedule_all(s)) == 0 and any(isinstance(t, StackState) for t in s.task_states):
+            yield trace, s
@@ -1,5 +1,8 @@
 from engine.core.interaction import InteractionState, Interaction
 from engine.core.machine import MachineState
+from engine.heap import components
+from engine.stack.program import StackProgram, ProgramLocation
+from engine.stack.state import StackState
 from util import check_type
 
 
@@ -42,12 +45,105 @@ def schedule_nonzeno(s):
         return [idx_internal]
 
 
-def explore(mstate, scheduler=schedule_all):
+def successors(mstate, scheduler=schedule_all):
+    """
+    Enumerates the successors of a machine state.
+    :param mstate: A sealed MachineState object.
+    :param scheduler: A callable (s) -> ts, mapping MachineState s to an iterable ts of task ID objects, specifying
+    which Tasks are eligible for being scheduled in state s.
+    :return: A generator of pairs (idx, s'), where idx is the index of the task in mstate the execution of which
+    transforms mstate into the sealed MachineState s'.
+    """
+    for idx in scheduler(mstate):
+        ss = mstate.clone_unsealed()
+        ss.task_state(idx).run(ss)
+        ss.seal()
+        yield idx, ss
+
+
+def interaction_successors(scheduler=schedule_nonzeno):
+    """
+    Creates a successor procedure for the on-the-fly comparison of machine states, see state_space.onthefly.
+    Transitions are labelled by the interaction they perform, or by None if they are internal.
+    :param scheduler: A callable (s) -> ts, mapping MachineState s to an iterable ts of task ID objects, specifying
+    which Tasks are eligible for being scheduled in state s.
+    :return: A procedure mapping sealed MachineState objects to iterables of pairs (label, successor).
+    """
+
+    def labelled(mstate):
+        for idx, ss in successors(mstate, scheduler):
+            task = mstate.task_states[idx]
+            yield (task.interaction if isinstance(task, InteractionState) else None), ss
+
+    return labelled
+
+
+_atoms = (int, float, complex, str, bytes, bool, type(None), type)
+
+
+def programs(obj, static=None):
+    """
+    Collects the StackPrograms an object refers to, directly or indirectly, for example via the ProgramLocations of
+    stack frames and procedures. This includes the programs that the instructions of these programs refer to, for
+    example the bodies of procedures that they construct.
+    :param obj: The object to inspect, for example a MachineState.
+    :param static: A dict that caches, for each StackProgram (keyed by id), the programs it refers to. Passing the same
+                   dict to multiple calls of this procedure avoids inspecting the same programs repeatedly.
+    :return: A dict mapping id(p) to p, for every StackProgram p that was found.
+    """
+
+    if static is None:
+        static = dict()
+
+    found = dict()
+    visited = set()
+    agenda = [obj]
+
+    while len(agenda) > 0:
+        o = agenda.pop()
+        if type(o) in _atoms or id(o) in visited:
+            continue
+        visited.add(id(o))
+
+        if isinstance(o, ProgramLocation):
+            o = o.program
+        if isinstance(o, StackProgram):
+            try:
+                ps = static[id(o)]
+            except KeyError:
+                ps = programs(tuple(o), static)
+                ps[id(o)] = o
+                static[id(o)] = ps
+            found.update(ps)
+        else:
+            agenda.extend(components(o))
+
+    return found
+
+
+def changed_programs(old, new):
+    """
+    Determines which programs were modified by an edit.
+    :param old: An object referring to the programs before the edit, for example the initial MachineState of a
+                previous exploration.
+    :param new: An object referring to the programs after the edit.
+    :return: A list of the StackPrograms referred to by 'old' for which no equal program is referred to by 'new'.
+    """
+    current = set(programs(new).values())
+    return [p for p in programs(old).values() if p not in current]
+
+
+def explore(mstate, scheduler=schedule_all, previous=None, changed=()):
     """
     Enumerates the entire state space of a task machine.
     :param mstate: The MachineState object forming the root of the state_space.
     :param scheduler: A callable (s) -> ts, mapping MachineState s to an iterable ts of task ID objects, specifying
     which Tasks are eligible for being scheduled in state s. By default, *all* tasks are eligible in all states.
+    :param previous: Either None, or an LTS that resulted from a previous exploration with the same scheduler, for
+    example of a previous version of the same program. A state that is equal to a state of this LTS is not expanded,
+    but its transitions are taken from the LTS, unless the state refers to one of the programs in 'changed'.
+    :param changed: A collection of the StackPrograms that are referred to by states of 'previous', but the code of
+    which has been modified since, see changed_programs.
     :return: An iterable of tuples (s, es), where es is an iterable of pairs (idx, s'), where idx is the index of the
     task in s the execution of which transforms MachineState s into MachineState s'. s and s' are sealed.
     es comprises *all* pairs with this property.
@@ -60,6 +156,21 @@ def explore(mstate, scheduler=schedule_all):
         mstate = mstate.clone_unsealed()
         mstate.seal()
 
+    changed = {id(p) for p in changed}
+    static = dict()
+
+    # Maps the contents of the old states that may be reused to these states. The programs of an old state must be
+    # inspected, because only they can be identified with 'changed'. This is done once per old state, right here:
+    known = dict()
+    if previous is not None:
+        agenda = [previous.initial]
+        while len(agenda) > 0:
+            s = agenda.pop()
+            if s.content not in known:
+                reusable = len(changed) == 0 or changed.isdisjoint(programs(s.content, static).keys())
+                known[s.content] = s if reusable else None
+                agenda.extend(t.target for t in s.transitions)
+
     visited = set()
     agenda = [mstate]
 
@@ -68,15 +179,52 @@ def explore(mstate, scheduler=schedule_all):
         s = agenda.pop()
         if s in visited:
             continue
-        es = []
-        for idx in scheduler(s):
-            ss = s.clone_unsealed()
-            ss.task_states[idx].run(ss)
-            ss.seal()
-            es.append((idx, ss))
-            agenda.append(ss)
+        old = known.get(s)
+        if old is not None:
+            es = [(t.label, t.target.content) for t in old.transitions]
+        else:
+            es = list(successors(s, scheduler))
+        agenda.extend(ss for _, ss in es)
 
         yield s, es
         visited.add(s)
 
 
+def enabled_interactions(mstate, scheduler=schedule_nonzeno):
+    """
+    Summarizes a machine state by the interactions it is ready to receive, for use as a projection in
+    state_space.lts.state_space.
+    :param mstate: A sealed MachineState object.
+    :param scheduler: A callable (s) -> ts, mapping MachineState s to an iterable ts of task ID objects, specifying
+    which Tasks are eligible for being scheduled in state s.
+    :return: A frozenset of Interaction values, namely of those interaction tasks that the scheduler permits.
+    """
+    tstates = mstate.task_states
+    return frozenset(tstates[idx].interaction for idx in scheduler(mstate) if isinstance(tstates[idx], InteractionState))
+
+
+def program_locations(mstate):
+    """
+    Summarizes a machine state by the program locations at the tops of the stacks of its tasks, for use as a projection
+    in state_space.lts.state_space, or to cluster states when exporting state spaces, see state_space.lts.write_dot.
+    :param mstate: A sealed MachineState object.
+    :return: A tuple that contains, for every task in mstate, either a ProgramLocation, or None if the task is not a
+             StackState or its stack is empty.
+    """
+    locations = []
+    for ss in mstate.task_states:
+        if isinstance(ss, StackState) and len(ss.stack) > 0:
+            top = ss.stack[-1]
+            locations.append(top.program.location(top.instruction_index))
+        else:
+            locations.append(None)
+    return tuple(locations)
+
+
+def projection(*procedures):
+    """
+    Combines several projections of machine states into one.
+    :param procedures: Procedures mapping MachineState objects to hashable summaries, such as enabled_interactions.
+    :return: A procedure mapping a MachineState object to the tuple of the summaries computed by the given procedures.
+    """
+    return lambda mstate: tuple(p(mstate) for p in procedures)
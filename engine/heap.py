@@ -0,0 +1,235 @@
+import sys
+from collections import deque
+from enum import Enum
+from types import FunctionType, BuiltinFunctionType, MethodType, ModuleType
+
+from engine.core.atomic import AtomicType
+from engine.core.intrinsic import IntrinsicProcedure, IntrinsicProperty
+from engine.core.machine import MachineState
+from engine.stack.frame import Frame
+from engine.stack.program import StackProgram, ProgramLocation
+from util import check_type
+
+# Objects that belong to the machine or to the code it executes, rather than to the states it is in. They are neither
+# accounted for nor entered:
+_external = (type, FunctionType, BuiltinFunctionType, MethodType, ModuleType, Enum, StackProgram, ProgramLocation,
+             AtomicType, IntrinsicProcedure, IntrinsicProperty, bool, type(None))
+
+_slots = {}
+
+
+def footprint(o):
+    """
+    Computes the number of bytes that an object occupies itself, not counting the objects it refers to, but counting
+    its instance dictionary, if it has one.
+    :param o: An object.
+    :return: An int.
+    """
+    size = sys.getsizeof(o)
+    try:
+        size += sys.getsizeof(o.__dict__)
+    except AttributeError:
+        pass
+    return size
+
+
+def slot_names(cls):
+    """
+    Determines the names of the slots of the instances of a type, those of base classes first.
+    :param cls: A type.
+    :return: A tuple of str.
+    """
+    try:
+        return _slots[cls]
+    except KeyError:
+        names = []
+        for c in reversed(cls.__mro__):
+            s = c.__dict__.get("__slots__", ())
+            for n in ((s, ) if isinstance(s, str) else s):
+                if n not in ("__dict__", "__weakref__") and n not in names:
+                    names.append(n)
+        names = tuple(names)
+        _slots[cls] = names
+        return names
+
+
+def components(o):
+    """
+    Enumerates the objects that an object refers to directly.
+    :param o: An object.
+    :return: An iterable of objects.
+    """
+    if isinstance(o, dict):
+        return (x for item in o.items() for x in item)
+    if isinstance(o, (list, tuple, set, frozenset)):
+        return o
+    result = list(getattr(o, "__dict__", {}).values())
+    for n in slot_names(type(o)):
+        try:
+            result.append(getattr(o, n))
+        except AttributeError:
+            pass
+    return result
+
+
+def reachable(root):
+    """
+    Computes the objects that make up a machine state, or any other object graph, see HeapProfile.
+    :param root: An object, usually a MachineState.
+    :return: A dict mapping the ids of the objects to the objects.
+    """
+    visited = {}
+    agenda = [root]
+    while len(agenda) > 0:
+        o = agenda.pop()
+        if id(o) in visited or isinstance(o, _external):
+            continue
+        visited[id(o)] = o
+        agenda.extend(components(o))
+    return visited
+
+
+class HeapProfile:
+    """
+    Accounts for the memory occupied by machine states. The objects that make up a state are attributed to their
+    type, to the task they are reachable from and to the location of the stack frame they are reachable from.
+    An object that is reachable from more than one task or frame is attributed to the first of these, in the order of
+    the tasks, and from the bottom to the top of their stacks. Objects that are part of the machine or of the programs
+    it executes, like types, intrinsic procedures and StackPrograms, are not accounted for.
+    All figures are pairs (n, b), where n is a number of objects and b is the number of bytes they occupy, see
+    footprint.
+    """
+
+    def __init__(self):
+        """
+        Creates a new, empty heap profile.
+        """
+        super().__init__()
+        self._num_states = 0
+        self._types = {}
+        self._tasks = {}
+        self._locations = {}
+        self._shared = [0, 0]
+        self._unique = [0, 0]
+
+    @staticmethod
+    def _count(table, key, size):
+        """
+        Adds an object to a table of figures.
+        :param table: A dict mapping keys to lists [n, b].
+        :param key: The key for which the object is to be counted.
+        :param size: The number of bytes the object occupies.
+        """
+        try:
+            entry = table[key]
+        except KeyError:
+            entry = [0, 0]
+            table[key] = entry
+        entry[0] += 1
+        entry[1] += size
+
+    def add(self, mstate, previous=None):
+        """
+        Accounts for the objects that make up a machine state.
+        :param mstate: A MachineState.
+        :param previous: Either None, or the MachineState that the given state is to be compared to, for example the
+                         state that it is a successor of. Objects that are part of both states are counted as shared,
+                         all others as unique.
+        """
+        check_type(mstate, MachineState)
+        old = () if previous is None else reachable(check_type(previous, MachineState))
+
+        self._num_states += 1
+        tasks = {id(t): idx for idx, t in enumerate(mstate.task_states)}
+        visited = set()
+        agenda = [(mstate, None, None)]
+        while len(agenda) > 0:
+            o, task, location = agenda.pop()
+            if id(o) in visited or isinstance(o, _external):
+                continue
+            visited.add(id(o))
+            task = tasks.get(id(o), task)
+            if isinstance(o, Frame):
+                location = o.program.location(o.instruction_index)
+
+            size = footprint(o)
+            self._count(self._types, type(o), size)
+            self._count(self._tasks, task, size)
+            self._count(self._locations, location, size)
+            figures = self._shared if id(o) in old else self._unique
+            figures[0] += 1
+            figures[1] += size
+
+            # Components are visited in their order, such that tasks and frames lower on the stack come first:
+            agenda.extend((c, task, location) for c in reversed(list(components(o))))
+
+    def add_lts(self, lts, limit=None):
+        """
+        Accounts for the contents of the states of an LTS, in breadth-first order. Every state is compared to the state
+        from which it was reached first, see HeapProfile.add.
+        :param lts: An LTS the states of which have MachineState contents.
+        :param limit: Either None, or the maximum number of states to account for.
+        """
+        parents = {lts.initial: None}
+        agenda = deque((lts.initial, ))
+        while len(agenda) > 0 and (limit is None or limit > 0):
+            s = agenda.popleft()
+            p = parents[s]
+            self.add(s.content, None if p is None else p.content)
+            if limit is not None:
+                limit -= 1
+            for t in s.transitions:
+                if t.target not in parents:
+                    parents[t.target] = s
+                    agenda.append(t.target)
+
+    @property
+    def num_states(self):
+        """
+        The number of machine states that have been accounted for.
+        """
+        return self._num_states
+
+    @property
+    def total(self):
+        """
+        The figures for all the objects that have been accounted for.
+        """
+        return self._shared[0] + self._unique[0], self._shared[1] + self._unique[1]
+
+    @property
+    def types(self):
+        """
+        A dict mapping types to figures for their instances.
+        """
+        return {k: tuple(v) for k, v in self._types.items()}
+
+    @property
+    def tasks(self):
+        """
+        A dict mapping task indices to figures for the objects attributed to the tasks, see HeapProfile. The key None
+        represents the objects that are not reachable from any task.
+        """
+        return {k: tuple(v) for k, v in self._tasks.items()}
+
+    @property
+    def locations(self):
+        """
+        A dict mapping ProgramLocations to figures for the objects attributed to the frames at these locations, see
+        HeapProfile. The key None represents the objects that are not reachable from any frame.
+        """
+        return {k: tuple(v) for k, v in self._locations.items()}
+
+    @property
+    def shared(self):
+        """
+        The figures for the objects that were part of the previous state as well, see HeapProfile.add.
+        """
+        return tuple(self._shared)
+
+    @property
+    def unique(self):
+        """
+        The figures for the objects that were not part of the previous state, see HeapProfile.add.
+        """
+        return tuple(self._unique)
@@ -0,0 +1,846 @@
+import importlib
+import struct
+import sys
+from enum import Enum
+from types import FunctionType, BuiltinFunctionType
+from weakref import WeakValueDictionary
+
+from engine.core.atomic import AtomicType
+from engine.core.intrinsic import IntrinsicProcedure, IntrinsicProperty
+from engine.core.property import OrdinaryProperty
+from engine.core.type import Type
+from engine.core.value import Value
+from engine.heap import slot_names
+from engine.stack.program import ProgramLocation, StackProgram
+from util import check_type
+from util.immutable import Immutable
+from util.persistent import PVector, PMap
+from util.finite import Finite
+from util.keyable import Keyable
+from util.singleton import Singleton
+
+# An encoded message consists of a version byte, followed by the instructions of a stack machine that rebuilds the
+# encoded object graph, in the style of pickle. Every instruction is an opcode byte, some of which are followed by
+# unsigned integers, in a variable-length encoding with 7 bits per byte.
+# Objects that are referred to more than once within a message are memoized when they are first constructed and
+# referred to by their position in the memo afterwards, which preserves their identity.
+# Some objects are interned across all the messages that an Encoder produces: Strings, classes, objects that can be
+# referred to by name (like intrinsic types and procedures), sealed Types, persistent data structures the elements of
+# which are immutable, and all other immutable objects, like StackPrograms, ProgramLocations and the instances of
+# Finite, Keyable and Singleton types. The first message that contains such an object defines it, all later messages
+# refer to it by its position in the intern table, which is why a Decoder must decode the messages of an Encoder in
+# the order in which they were encoded.
+# When messages are exchanged in both directions, the Encoder of one direction can share the intern table of the
+# Decoder of the other direction: The objects in that table are then not encoded, but referred to by their position in
+# the intern table of the Encoder that they originate from. This way, an object that is sent back and forth is
+# decoded as the original object again, which matters for objects that are compared by identity, like StackProcedures.
+# Objects are encoded via __getstate__ and rebuilt via __setstate__. Since hash values of strings may differ between
+# processes, the states of objects never include anything that is derived from hash values, like cached hashes,
+# fingerprints or the tries of persistent maps. __setstate__ resets or rebuilds these.
+
+_version = 2
+
+_NONE = 0        # -> None
+_TRUE = 1        # -> True
+_FALSE = 2       # -> False
+_INT = 3         # varint z -> the int with zigzag encoding z
+_FLOAT = 4       # 8 bytes -> a float
+_STR = 5         # varint n, n bytes -> a str, interned
+_RAWSTR = 6      # varint n, n bytes -> a str, not interned
+_STRREF = 7      # varint i -> the i-th interned str
+_BYTES = 8       # varint n, n bytes -> a bytes object
+_REF = 9         # varint i -> the i-th memoized object
+_TABLE = 10      # varint i -> the i-th interned object
+_TUPLE = 11      # varint n; x1, ..., xn -> (x1, ..., xn), memoized
+_FROZENSET = 12  # varint n; x1, ..., xn -> frozenset((x1, ..., xn)), memoized
+_LIST = 13       # -> [], memoized
+_APPEND = 14     # varint n; l, x1, ..., xn -> l, after appending all xi to l
+_DICT = 15       # -> {}, memoized
+_SETITEMS = 16   # varint n; d, k1, v1, ..., kn, vn -> d, after setting all d[ki] = vi
+_GLOBAL = 17     # path -> the object at the given path, interned
+_NEW = 18        # cls -> an uninitialized instance of cls, memoized
+_ALLOC = 19      # cls -> an uninitialized instance of cls
+_BUILD = 20      # varint n, varint m; o, s1, ..., sn, k1, v1, ..., km, vm -> o, after setting its slots and attributes
+_MISSING = 21    # -> a placeholder for a slot that is not set
+_SETSTATE = 22   # o, s -> o, after o.__setstate__(s), which is deferred until the entire message has been decoded
+_CANONICAL = 23  # o -> the canonical instance that is equal to the Finite, Keyable or Singleton object o, interned
+_INTERN = 24     # o -> o, interned
+_WRAP = 25       # cls, x -> cls(x), for subtypes of int, float and str
+_ENUM = 26       # cls, name -> cls[name], interned
+_LOCATION = 27   # p, i -> p.location(i), interned
+_EXCEPTION = 28  # cls, msg -> an instance of the Python exception type cls, with the given message, interned
+_SHARED = 29     # varint i -> the i-th interned object of the Encoder that is shared with this Decoder
+_PROGRAM = 30    # instructions -> StackProgram(instructions), interned
+
+_double = struct.Struct("<d")
+_max_interned_str = 64
+
+# Objects that cannot be encoded by their content and must instead be referred to by name:
+_static = (AtomicType, IntrinsicProcedure, IntrinsicProperty)
+
+# Objects that are never modified, such that they can be shared between messages:
+_persistent = (Immutable, PVector, PMap)
+
+_KIND_GLOBAL, _KIND_STATIC, _KIND_ENUM, _KIND_WRAP, _KIND_LOCATION, _KIND_PROGRAM, _KIND_EXCEPTION, _KIND_CANONICAL, \
+    _KIND_STATE, _KIND_OBJECT = range(10)
+
+_kinds = {}
+_layouts = {}
+_statics = {}
+_scanned = 0
+
+
+class _Missing:
+    """
+    The type of the placeholder for slots that are not set.
+    """
+    __slots__ = ()
+
+
+_missing = _Missing()
+_empty = {}
+_intern_op = bytes((_INTERN, ))
+_canonical_op = bytes((_CANONICAL, ))
+
+
+class _Finish:
+    """
+    An entry of the agenda of Encoder.encode, that completes the encoding of an object after all its components
+    have been encoded.
+    """
+
+    __slots__ = ("data", "obj", "intern")
+
+    def __init__(self, data, obj=None, intern=False):
+        """
+        Creates a new agenda entry.
+        :param data: The bytes to emit.
+        :param obj: Either None, or the object that is completed by emitting the given data and is to be memoized.
+        :param intern: Specifies if the completed object is to be interned, instead of memoized.
+        """
+        self.data = data
+        self.obj = obj
+        self.intern = intern
+
+
+_setstate_op = bytes((_SETSTATE, ))
+_setstate = _Finish(_setstate_op)
+
+
+def _shareable(x):
+    """
+    Decides if an object may be interned, i.e. shared between messages. This is the case only if it can never change,
+    which requires for persistent data structures that their elements cannot change either. Otherwise a later message
+    could refer to the persistent structure by its table index, although the decoder holds outdated copies of its
+    elements.
+    :param x: An object of one of the types listed in _persistent.
+    :return: A bool.
+    """
+    if isinstance(x, PVector):
+        return all(isinstance(e, Immutable) for e in x)
+    if isinstance(x, PMap):
+        # Keys like those of VDict wrap the value they stand for:
+        return all(isinstance(v, Immutable) and isinstance(getattr(k, "wrapped", k), Immutable)
+                   for k, v in x.items())
+    return True
+
+
+def _build(n, m):
+    """
+    Encodes a _BUILD instruction.
+    :param n: The number of slots to set.
+    :param m: The number of attributes to set.
+    :return: A bytes object.
+    """
+    return bytes((_BUILD, )) + _varint(n) + _varint(m)
+
+
+def _varint(n):
+    """
+    Encodes a nonnegative integer in a variable number of bytes.
+    :param n: A nonnegative int.
+    :return: A bytes object.
+    """
+    if n < 0x80:
+        return bytes((n, ))
+    b = bytearray()
+    while n >= 0x80:
+        b.append((n & 0x7F) | 0x80)
+        n >>= 7
+    b.append(n)
+    return bytes(b)
+
+
+def _path(x):
+    """
+    Computes the path under which a class or function can be imported.
+    :param x: A class or function.
+    :exception TypeError: If the given object cannot be retrieved by its name.
+    :return: A str.
+    """
+    path = f"{x.__module__}:{x.__qualname__}"
+    try:
+        found = _resolve(path)
+    except (ImportError, AttributeError, KeyError) as ex:
+        raise TypeError(f"{x} cannot be encoded, because it cannot be retrieved by its name!") from ex
+    if found is not x:
+        raise TypeError(f"{x} cannot be encoded, because it cannot be retrieved by its name!")
+    return path
+
+
+def _resolve(path):
+    """
+    Retrieves the object at a path that has been computed by _path or _scan.
+    :param path: A str.
+    :return: An object.
+    """
+    module, _, attributes = path.partition(":")
+    x = importlib.import_module(module)
+    for a in attributes.split("."):
+        x = x.direct_members[a] if isinstance(x, Type) else getattr(x, a)
+    return x
+
+
+def _register(x, path):
+    """
+    Records the path of a static object, and of the static objects that it contains.
+    :param x: An object.
+    :param path: The path under which the object can be retrieved.
+    """
+    if not isinstance(x, _static) or id(x) in _statics:
+        return
+    _statics[id(x)] = path
+    if isinstance(x, Type):
+        for name, member in x.direct_members.items():
+            _register(member, f"{path}.{name}")
+    elif isinstance(x, OrdinaryProperty):
+        _register(x.getter, f"{path}.getter")
+        if x.setter is not None:
+            _register(x.setter, f"{path}.setter")
+
+
+def _scan():
+    """
+    Records the paths of all the static objects (intrinsic types, their members, and intrinsic procedures) that are
+    reachable from the namespaces of the modules that have been imported so far.
+    """
+    global _scanned
+    modules = list(sys.modules.items())
+    for name, module in modules:
+        namespace = getattr(module, "__dict__", None)
+        if name == "__main__" or not isinstance(namespace, dict):
+            continue
+        for attribute, x in list(namespace.items()):
+            if isinstance(x, type):
+                t = x.__dict__.get("intrinsic_type")
+                if isinstance(t, Type):
+                    _register(t, f"{name}:{attribute}.intrinsic_type")
+            elif isinstance(x, _static):
+                _register(x, f"{name}:{attribute}")
+    _scanned = len(modules)
+
+
+def _static_path(x):
+    """
+    Retrieves the path of a static object.
+    :param x: An instance of one of the types in _static.
+    :exception TypeError: If the given object is not reachable from the namespace of any module.
+    :return: A str.
+    """
+    try:
+        return _statics[id(x)]
+    except KeyError:
+        if _scanned != len(sys.modules):
+            _scan()
+            return _static_path(x)
+        raise TypeError(f"{x} cannot be encoded, because it is not reachable from the namespace of any module!")
+
+
+def _classify(cls):
+    """
+    Decides how the instances of a type are to be encoded.
+    :param cls: A type.
+    :return: One of the _KIND_* constants.
+    """
+    if issubclass(cls, type) or cls in (FunctionType, BuiltinFunctionType):
+        kind = _KIND_GLOBAL
+    elif issubclass(cls, Enum):
+        kind = _KIND_ENUM
+    elif issubclass(cls, (Finite, Keyable, Singleton)):
+        kind = _KIND_CANONICAL
+    elif issubclass(cls, ProgramLocation):
+        kind = _KIND_LOCATION
+    elif issubclass(cls, StackProgram):
+        kind = _KIND_PROGRAM
+    elif issubclass(cls, _static):
+        kind = _KIND_STATIC
+    elif issubclass(cls, (int, float, str)):
+        kind = _KIND_WRAP
+    elif issubclass(cls, BaseException) and not issubclass(cls, Value):
+        kind = _KIND_EXCEPTION
+    elif any("__getstate__" in c.__dict__ for c in cls.__mro__ if c is not object):
+        kind = _KIND_STATE
+    else:
+        kind = _KIND_OBJECT
+    _kinds[cls] = kind
+    return kind
+
+
+def _layout(cls):
+    """
+    Determines the slots of the instances of a type, in the order in which they are encoded.
+    The slot '_hash' holds a cached hash value, which is not encoded, because hash values differ between processes.
+    :param cls: A type.
+    :return: A pair (slots, dictionary), where slots is a tuple of slot names and dictionary specifies if the instances
+             of the type have an instance dictionary.
+    """
+    try:
+        return _layouts[cls]
+    except KeyError:
+        pass
+    slots = slot_names(cls)
+    if issubclass(cls, BaseException):
+        slots += ("args", )
+    layout = slots, cls.__dictoffset__ != 0
+    _layouts[cls] = layout
+    return layout
+
+
+def _allocate(cls):
+    """
+    Allocates an uninitialized instance of a type, without calling its constructor.
+    :param cls: A type.
+    :return: An instance of cls.
+    """
+    return BaseException.__new__(cls) if issubclass(cls, BaseException) else object.__new__(cls)
+
+
+def _canonical(o):
+    """
+    Replaces a decoded instance of a Finite, Keyable or Singleton type by the instance that is equal to it, or
+    registers it as that instance, if no such instance exists yet.
+    :param o: An instance of a Finite, Keyable or Singleton type.
+    :return: The canonical instance that is equal to o.
+    """
+    cls = type(o)
+    if isinstance(o, Singleton):
+        if isinstance(cls.instance, cls):
+            return cls.instance
+        cls.instance = o
+    if isinstance(o, Finite):
+        index = o._iindex
+        if cls.index2instance is None:
+            cls.index2instance = [None, ] * (index + 1)
+        elif index >= len(cls.index2instance):
+            cls.index2instance.extend([None, ] * (index + 1 - len(cls.index2instance)))
+        if cls.index2instance[index] is not None:
+            return cls.index2instance[index]
+    if isinstance(o, Keyable):
+        if cls.key2instance is None:
+            cls.key2instance = WeakValueDictionary()
+        try:
+            return cls.key2instance[o._key]
+        except KeyError:
+            cls.key2instance[o._key] = o
+    if isinstance(o, Finite):
+        cls.index2instance[o._iindex] = o
+    return o
+
+
+class Encoder:
+    """
+    Encodes object graphs, in particular MachineStates, as compact byte strings, that can be decoded by a Decoder.
+    An Encoder interns certain objects across all the messages it encodes, see the comments at the top of this module.
+    """
+
+    def __init__(self, shared=None):
+        """
+        Creates a new encoder with empty intern tables.
+        :param shared: Either None, or the Decoder for the opposite direction of a channel, i.e. a Decoder that decodes
+                       the messages of the Encoder that the Decoder for the messages of this Encoder is sharing.
+        """
+        super().__init__()
+        self._strings = {}
+        self._table = {}
+        self._interned = []
+        self._shared = None if shared is None else check_type(shared, Decoder)._indices
+
+    def _intern(self, x):
+        """
+        Adds an object to the intern table.
+        :param x: An object.
+        """
+        self._table[id(x)] = len(self._interned)
+        self._interned.append(x)
+
+    def _str(self, out, s):
+        """
+        Emits a string.
+        :param out: The bytearray to write to.
+        :param s: A str.
+        """
+        i = self._strings.get(s)
+        if i is not None:
+            out.append(_STRREF)
+            out += _varint(i)
+            return
+        if len(s) <= _max_interned_str:
+            self._strings[s] = len(self._strings)
+            out.append(_STR)
+        else:
+            out.append(_RAWSTR)
+        b = s.encode("utf-8")
+        out += _varint(len(b))
+        out += b
+
+    def _global(self, out, x):
+        """
+        Emits a class or function that can be retrieved by its name.
+        :param out: The bytearray to write to.
+        :param x: A class or function.
+        """
+        i = self._table.get(id(x))
+        if i is None:
+            self._str(out, _path(x))
+            out.append(_GLOBAL)
+            self._intern(x)
+        else:
+            out.append(_TABLE)
+            out += _varint(i)
+
+    def encode(self, x):
+        """
+        Encodes an object graph. If this fails, the intern tables are left as they were before.
+        :param x: The object to encode.
+        :exception TypeError: If the object graph contains objects that cannot be encoded.
+        :exception ValueError: If the object graph contains a tuple that contains itself.
+        :return: A bytes object.
+        """
+        num_strings, num_interned = len(self._strings), len(self._interned)
+        try:
+            return self._encode(x)
+        except BaseException:
+            # The Decoder never receives the failed message, so its additions to the intern tables must be undone:
+            for s in list(self._strings)[num_strings:]:
+                del self._strings[s]
+            for o in self._interned[num_interned:]:
+                if self._table.get(id(o), -1) >= num_interned:
+                    del self._table[id(o)]
+            del self._interned[num_interned:]
+            raise
+
+    def _encode(self, x):
+        """
+        Encodes an object graph, see Encoder.encode.
+        :param x: The object to encode.
+        :return: A bytes object.
+        """
+        out = bytearray((_version, ))
+        memo = {}
+        pending = set()
+        keep = []
+        table = self._table
+        shared = self._shared
+        agenda = [x]
+
+        while len(agenda) > 0:
+            x = agenda.pop()
+            t = type(x)
+
+            if t is _Finish:
+                out += x.data
+                if x.obj is not None:
+                    if x.intern:
+                        self._intern(x.obj)
+                    else:
+                        memo[id(x.obj)] = len(memo)
+                        pending.discard(id(x.obj))
+                continue
+            if x is None:
+                out.append(_NONE)
+                continue
+            if t is bool:
+                out.append(_TRUE if x else _FALSE)
+                continue
+            if t is int:
+                out.append(_INT)
+                out += _varint(x << 1 if x >= 0 else ((-x) << 1) - 1)
+                continue
+            if t is str:
+                self._str(out, x)
+                continue
+            if t is float:
+                out.append(_FLOAT)
+                out += _double.pack(x)
+                continue
+            if t is bytes:
+                out.append(_BYTES)
+                out += _varint(len(x))
+                out += x
+                continue
+            if t is _Missing:
+                out.append(_MISSING)
+                continue
+
+            i = memo.get(id(x))
+            if i is not None:
+                out.append(_REF)
+                out += _varint(i)
+                continue
+            i = table.get(id(x))
+            if i is not None:
+                out.append(_TABLE)
+                out += _varint(i)
+                continue
+            if shared is not None:
+                i = shared.get(id(x))
+                if i is not None:
+                    out.append(_SHARED)
+                    out += _varint(i)
+                    continue
+            if id(x) in pending:
+                raise ValueError("Tuples that contain themselves cannot be encoded!")
+
+            if t is tuple or t is frozenset:
+                pending.add(id(x))
+                agenda.append(_Finish(bytes((_TUPLE if t is tuple else _FROZENSET, )) + _varint(len(x)), x))
+                agenda.extend(reversed(x) if t is tuple else x)
+                continue
+            if t is list:
+                out.append(_LIST)
+                memo[id(x)] = len(memo)
+                agenda.append(_Finish(bytes((_APPEND, )) + _varint(len(x))))
+                agenda.extend(reversed(x))
+                continue
+            if t is dict:
+                out.append(_DICT)
+                memo[id(x)] = len(memo)
+                agenda.append(_Finish(bytes((_SETITEMS, )) + _varint(len(x))))
+                for k, v in reversed(x.items()):
+                    agenda.append(v)
+                    agenda.append(k)
+                continue
+
+            kind = _kinds.get(t)
+            if kind is None:
+                kind = _classify(t)
+
+            if kind == _KIND_OBJECT or kind == _KIND_STATE:
+                self._global(out, t)
+                out.append(_NEW)
+                memo[id(x)] = len(memo)
+                if kind == _KIND_STATE:
+                    state = x.__getstate__()
+                    keep.append(state)
+                    agenda.append(_Finish(_setstate_op + _intern_op, x, True)
+                                  if isinstance(x, _persistent) and _shareable(x) else _setstate)
+                    agenda.append(state)
+                    continue
+                slots, dictionary = _layout(t)
+                attributes = x.__dict__ if dictionary else _empty
+                if isinstance(x, _persistent) and _shareable(x) or isinstance(x, Type) and x.sealed:
+                    agenda.append(_Finish(_build(len(slots), len(attributes)) + _intern_op, x, True))
+                else:
+                    agenda.append(_Finish(_build(len(slots), len(attributes))))
+                for k, v in reversed(attributes.items()):
+                    agenda.append(None if k == "_hash" else v)
+                    agenda.append(k)
+                for k in reversed(slots):
+                    agenda.append(None if k == "_hash" else getattr(x, k, _missing))
+            elif kind == _KIND_WRAP:
+                self._global(out, t)
+                if isinstance(x, int):
+                    x = int.__int__(x)
+                    out.append(_INT)
+                    out += _varint(x << 1 if x >= 0 else ((-x) << 1) - 1)
+                elif isinstance(x, float):
+                    out.append(_FLOAT)
+                    out += _double.pack(x)
+                else:
+                    self._str(out, str.__str__(x))
+                out.append(_WRAP)
+            elif kind == _KIND_CANONICAL:
+                self._global(out, t)
+                out.append(_ALLOC)
+                slots, dictionary = _layout(t)
+                attributes = x.__dict__ if dictionary else _empty
+                agenda.append(_Finish(_build(len(slots), len(attributes)) + _canonical_op, x, True))
+                for k, v in reversed(attributes.items()):
+                    agenda.append(None if k == "_hash" else v)
+                    agenda.append(k)
+                for k in reversed(slots):
+                    agenda.append(None if k == "_hash" else getattr(x, k, _missing))
+            elif kind == _KIND_GLOBAL or kind == _KIND_STATIC:
+                self._str(out, _path(x) if kind == _KIND_GLOBAL else _static_path(x))
+                out.append(_GLOBAL)
+                self._intern(x)
+            elif kind == _KIND_LOCATION:
+                index = x.index
+                index = index << 1 if index >= 0 else ((-index) << 1) - 1
+                agenda.append(_Finish(bytes((_INT, )) + _varint(index) + bytes((_LOCATION, )), x, True))
+                agenda.append(x.program)
+            elif kind == _KIND_PROGRAM:
+                # The table of locations of a program is not encoded, but rebuilt by its constructor:
+                instructions = tuple(x)
+                keep.append(instructions)
+                agenda.append(_Finish(bytes((_PROGRAM, )), x, True))
+                agenda.append(instructions)
+            elif kind == _KIND_ENUM:
+                self._global(out, t)
+                self._str(out, x.name)
+                out.append(_ENUM)
+                self._intern(x)
+            else:
+                assert kind == _KIND_EXCEPTION
+                try:
+                    _path(t)
+                except TypeError:
+                    t = Exception
+                self._global(out, t)
+                self._str(out, str(x))
+                out.append(_EXCEPTION)
+                self._intern(x)
+
+        return bytes(out)
+
+
+class Decoder:
+    """
+    Decodes the messages produced by an Encoder. The messages of an Encoder must be decoded in the order in which
+    they were encoded.
+    """
+
+    def __init__(self, shared=None):
+        """
+        Creates a new decoder with empty intern tables.
+        :param shared: Either None, or the Encoder for the opposite direction of a channel, i.e. an Encoder the
+                       messages of which are decoded by the Decoder that the Encoder of the messages for this Decoder
+                       is sharing.
+        """
+        super().__init__()
+        self._strings = []
+        self._interned = []
+        self._indices = {}
+        self._shared = None if shared is None else check_type(shared, Encoder)._interned
+
+    def _intern(self, x):
+        """
+        Adds an object to the intern table.
+        :param x: An object.
+        """
+        # An object may be interned more than once, for example as a canonical instance. Any of its indices refers to
+        # it, but keeping the first one allows for undoing the later ones:
+        self._indices.setdefault(id(x), len(self._interned))
+        self._interned.append(x)
+
+    def decode(self, data):
+        """
+        Decodes a message. If this fails, the intern tables are left as they were before.
+        :param data: A bytes-like object that was returned by Encoder.encode.
+        :exception ValueError: If the given data is not a well-formed message.
+        :return: The decoded object.
+        """
+        num_strings, num_interned = len(self._strings), len(self._interned)
+        try:
+            return self._decode(data)
+        except BaseException:
+            # The tables must stay in sync with those of the Encoder, which does not know about the failure:
+            for o in self._interned[num_interned:]:
+                if self._indices.get(id(o), -1) >= num_interned:
+                    del self._indices[id(o)]
+            del self._interned[num_interned:]
+            del self._strings[num_strings:]
+            raise
+
+    def _decode(self, data):
+        """
+        Decodes a message, see Decoder.decode.
+        :param data: A bytes-like object that was returned by Encoder.encode.
+        :return: The decoded object.
+        """
+        data = bytes(data)
+        if len(data) == 0 or data[0] != _version:
+            raise ValueError("The given data is not a message in a supported format!")
+
+        strings = self._strings
+        interned = self._interned
+        stack = []
+        memo = []
+        deferred = []
+        pos = 1
+        end = len(data)
+
+        try:
+            while pos < end:
+                op = data[pos]
+                pos += 1
+
+                if op <= _BYTES:
+                    if op == _STRREF or op == _INT:
+                        b = data[pos]
+                        pos += 1
+                        n = b & 0x7F
+                        shift = 7
+                        while b & 0x80:
+                            b = data[pos]
+                            pos += 1
+                            n |= (b & 0x7F) << shift
+                            shift += 7
+                        stack.append(strings[n] if op == _STRREF else (-((n + 1) >> 1) if n & 1 else n >> 1))
+                    elif op == _NONE:
+                        stack.append(None)
+                    elif op == _TRUE:
+                        stack.append(True)
+                    elif op == _FALSE:
+                        stack.append(False)
+                    elif op == _FLOAT:
+                        stack.append(_double.unpack_from(data, pos)[0])
+                        pos += 8
+                    else:
+                        n, pos = _read(data, pos)
+                        b = data[pos:pos + n]
+                        if len(b) != n:
+                            raise ValueError("The given message is truncated!")
+                        pos += n
+                        if op == _BYTES:
+                            stack.append(b)
+                        else:
+                            s = b.decode("utf-8")
+                            if op == _STR:
+                                strings.append(s)
+                            stack.append(s)
+                elif op == _REF or op == _TABLE:
+                    n, pos = _read(data, pos)
+                    stack.append(memo[n] if op == _REF else interned[n])
+                elif op == _SHARED:
+                    n, pos = _read(data, pos)
+                    stack.append(self._shared[n])
+                elif op == _BUILD:
+                    n, pos = _read(data, pos)
+                    m, pos = _read(data, pos)
+                    k = len(stack) - n - 2 * m
+                    o = stack[k - 1]
+                    slots, _ = _layout(type(o))
+                    if len(slots) != n:
+                        raise ValueError(f"The layout of {type(o)} does not match the given message!")
+                    for s, v in zip(slots, stack[k:k + n]):
+                        if v is not _missing:
+                            setattr(o, s, v)
+                    if m > 0:
+                        attributes = stack[k + n:]
+                        o.__dict__.update(zip(attributes[0::2], attributes[1::2]))
+                    del stack[k:]
+                elif op == _NEW or op == _ALLOC:
+                    o = _allocate(stack.pop())
+                    if op == _NEW:
+                        memo.append(o)
+                    stack.append(o)
+                elif op == _TUPLE or op == _FROZENSET:
+                    n, pos = _read(data, pos)
+                    k = len(stack) - n
+                    o = tuple(stack[k:]) if op == _TUPLE else frozenset(stack[k:])
+                    del stack[k:]
+                    memo.append(o)
+                    stack.append(o)
+                elif op == _LIST or op == _DICT:
+                    o = [] if op == _LIST else {}
+                    memo.append(o)
+                    stack.append(o)
+                elif op == _APPEND or op == _SETITEMS:
+                    n, pos = _read(data, pos)
+                    if op == _APPEND:
+                        k = len(stack) - n
+                        stack[k - 1].extend(stack[k:])
+                    else:
+                        k = len(stack) - 2 * n
+                        items = stack[k:]
+                        stack[k - 1].update(zip(items[0::2], items[1::2]))
+                    del stack[k:]
+                elif op == _MISSING:
+                    stack.append(_missing)
+                elif op == _SETSTATE:
+                    state = stack.pop()
+                    deferred.append((stack[-1], state))
+                elif op == _GLOBAL:
+                    o = _resolve(stack.pop())
+                    self._intern(o)
+                    stack.append(o)
+                elif op == _WRAP:
+                    x = stack.pop()
+                    stack.append(stack.pop()(x))
+                elif op == _LOCATION:
+                    index = stack.pop()
+                    o = stack.pop().location(index)
+                    self._intern(o)
+                    stack.append(o)
+                elif op == _PROGRAM:
+                    o = StackProgram(stack.pop())
+                    self._intern(o)
+                    stack.append(o)
+                elif op == _CANONICAL:
+                    o = _canonical(stack.pop())
+                    self._intern(o)
+                    stack.append(o)
+                elif op == _INTERN:
+                    self._intern(stack[-1])
+                elif op == _ENUM:
+                    name = stack.pop()
+                    o = stack.pop()[name]
+                    self._intern(o)
+                    stack.append(o)
+                elif op == _EXCEPTION:
+                    message = stack.pop()
+                    o = _allocate(stack.pop())
+                    o.args = (message, )
+                    self._intern(o)
+                    stack.append(o)
+                else:
+                    raise ValueError(f"Unknown opcode {op} at position {pos - 1}!")
+        except IndexError as ex:
+            raise ValueError("The given message is truncated or malformed!") from ex
+
+        if len(stack) != 1:
+            raise ValueError("The given message is malformed!")
+
+        # Some objects can only be restored once all the objects they refer to are complete:
+        for o, state in deferred:
+            o.__setstate__(state)
+
+        return stack[0]
+
+
+def _read(data, pos):
+    """
+    Decodes an integer that was encoded by _varint.
+    :param data: A bytes object.
+    :param pos: The position of the first byte of the encoded integer.
+    :return: A pair (n, p), where n is the decoded integer and p is the position of the first byte after it.
+    """
+    b = data[pos]
+    pos += 1
+    n = b & 0x7F
+    shift = 7
+    while b & 0x80:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        shift += 7
+    return n, pos
+
+
+def encode(x):
+    """
+    Encodes an object graph as a self-contained message.
+    :param x: The object to encode.
+    :return: A bytes object.
+    """
+    return Encoder().encode(x)
+
+
+def decode(data):
+    """
+    Decodes a self-contained message, as returned by encode.
+    :param data: A bytes-like object.
+    :return: The decoded object.
+    """
+    return Decoder().decode(data)
@@ -1,7 +1,9 @@
+from engine.core.fingerprint import MASK, mix, fingerprint, combine
 from engine.core.none import value_none
 from engine.core.value import Value
 from engine.stack.program import ProgramLocation
 from engine.stack.exceptions import unhashable
+import util
 from util import check_type, check_types
 from util.immutable import check_sealed, check_unsealed
 
@@ -11,6 +13,8 @@ class Frame(Value):
     Represents a set of local variables and a pointer to the next machine instruction to execute.
     """
 
+    __slots__ = ("_sealed", "_hash", "_location", "_local_values", "_fingerprint")
+
     def __init__(self, location, local_values):
         """
         Allocates a new stack frame.
@@ -18,8 +22,9 @@ class Frame(Value):
         :param local_values: The array of values of the local variables stored in this stack frame.
         """
         super().__init__()
-        self._location = check_type(location, ProgramLocation)
-        self._local_values = list(check_types(local_values, Value))
+        self._location = location if util.trusted else check_type(location, ProgramLocation)
+        self._local_values = list(local_values if util.trusted else check_types(local_values, Value))
+        self._fingerprint = (mix(-1, hash(self._location)) + combine(map(fingerprint, self._local_values))) & MASK
 
     @property
     def type(self):
@@ -35,9 +40,15 @@ class Frame(Value):
         """
         d = new_length - len(self._local_values)
         if d > 0:
+            fp = fingerprint(value_none)
+            for idx in range(len(self._local_values), new_length):
+                self._fingerprint += mix(idx, fp)
             self._local_values.extend([value_none] * d)
         elif d < 0:
+            for idx in range(new_length, len(self._local_values)):
+                self._fingerprint -= mix(idx, fingerprint(self._local_values[idx]))
             self._local_values = self._local_values[:d]
+        self._fingerprint &= MASK
 
     def print(self, out):
         out.write("Frame@")
@@ -51,10 +62,8 @@ class Frame(Value):
         out.write("]")
 
     def _seal(self):
-        self._location.seal()
-        for v in self._local_values:
-            v.seal()
         self._local_values = tuple(self._local_values)
+        return (self._location, *self._local_values)
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -68,9 +77,19 @@ class Frame(Value):
             c._local_values = [v.clone_unsealed(clones=clones) for v in c._local_values]
             return c
 
+    def __getstate__(self):
+        return self._sealed, self._location, self._local_values
+
+    def __setstate__(self, state):
+        sealed, location, local_values = state
+        self.__init__(location, local_values)
+        if sealed:
+            self._local_values = tuple(self._local_values)
+        self._sealed = sealed
+
     def hash(self):
         check_sealed(self)
-        return len(self._local_values)
+        return self._fingerprint
 
     def chash(self):
         return unhashable(self)
@@ -81,16 +100,16 @@ class Frame(Value):
                 and self._location.equals(other._location)
                 and all(a.equals(b) for a, b in zip(self._local_values, other._local_values)))
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, Frame)
                     and len(self._local_values) == len(other._local_values)
-                    and self._location.bequals(other._location, bijection)):
+                    and self._location.equals(other._location)):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._local_values, other._local_values))
+            return zip(self._local_values, other._local_values)
 
     def cequals(self, other):
         return self.equals(other)
@@ -112,14 +131,17 @@ class Frame(Value):
     @instruction_index.setter
     def instruction_index(self, value):
         check_unsealed(self)
-        self._location = ProgramLocation(self._location.program, value)
+        location = self._location.program.location(value)
+        self._fingerprint = (self._fingerprint - mix(-1, hash(self._location)) + mix(-1, hash(location))) & MASK
+        self._location = location
 
     @property
     def local(self):
         """
         The array of values of the local variables stored in this stack frame.
         """
-        return tuple(self._local_values)
+        # Once sealed, the values are held in a tuple already, which does not need to be copied:
+        return self._local_values if self._sealed else tuple(self._local_values)
 
     def set_local(self, index, value):
         """
@@ -128,10 +150,12 @@ class Frame(Value):
         :param value: The new value for the local variable.
         """
         check_unsealed(self)
-        self._local_values[index] = check_type(value, Value)
+        old = self._local_values[index]
+        self._local_values[index] = value if util.trusted else check_type(value, Value)
+        self._fingerprint = (self._fingerprint - mix(index, fingerprint(old)) + mix(index, fingerprint(value))) & MASK
 
     def __getitem__(self, index):
-        return self.local[index]
+        return self._local_values[index]
 
     def __setitem__(self, index, value):
         self.set_local(index, value)
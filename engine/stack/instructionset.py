@@ -88,7 +88,7 @@ class Update(Instruction):
 
     def execute(self, tstate, mstate):
 
-        top = tstate.stack[-1]
+        top = tstate.top
         top.instruction_index = self._destination
 
         if isinstance(tstate.exception, VCancellationError) and tstate.exception.initial:
@@ -169,7 +169,7 @@ class Guard(Instruction):
 
     def equals(self, other):
         if not (isinstance(other, Guard) and self._edestination == other._edestination and
-                len(self._alternatives) == other._alternatives):
+                len(self._alternatives) == len(other._alternatives)):
             return False
 
         for e, d in self._alternatives.items():
@@ -193,7 +193,7 @@ class Guard(Instruction):
 
     def execute(self, tstate, mstate):
 
-        top = tstate.stack[-1]
+        top = tstate.top
 
         if isinstance(tstate.exception, VCancellationError) and tstate.exception.initial:
             tstate.exception = VCancellationError(False, "Task was cancelled!")
@@ -277,7 +277,7 @@ class Push(Instruction):
 
     def execute(self, tstate, mstate):
 
-        old_top = tstate.stack[-1]
+        old_top = tstate.top
 
         if isinstance(tstate.exception, VCancellationError) and tstate.exception.initial:
             tstate.exception = VCancellationError(False, "Task was cancelled!")
@@ -340,7 +340,7 @@ class Pop(Instruction):
     def execute(self, tstate, mstate):
         if isinstance(tstate.exception, VCancellationError) and tstate.exception.initial:
             tstate.exception = VCancellationError(False, "Task was cancelled!")
-            tstate.stack[-1].instruction_index = self._edestination
+            tstate.top.instruction_index = self._edestination
             return
         tstate.pop()
 
@@ -396,7 +396,7 @@ class Launch(Instruction):
 
     def execute(self, tstate, mstate):
 
-        mytop = tstate.stack[-1]
+        mytop = tstate.top
 
         if isinstance(tstate.exception, VCancellationError) and tstate.exception.initial:
             tstate.exception = VCancellationError(False, "Task was cancelled!")
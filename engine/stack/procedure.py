@@ -43,14 +43,15 @@ class StackProcedure(Immutable, Procedure):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, StackProcedure)
-                    and self._num_args == other._num_args
-                    and self._entry.bequals(other._entry, bijection))
+            if not (isinstance(other, StackProcedure)
+                    and self._num_args == other._num_args):
+                return False
+            return ((self._entry, other._entry),)
 
     def cequals(self, other):
         return self.equals(other)
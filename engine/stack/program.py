@@ -20,6 +20,9 @@ class StackProgram(Immutable, Printable):
         """
         super().__init__()
         self._instructions = tuple(check_type(i, Instruction) for i in instructions)
+        # Frames refer to the locations in this table, such that jumps do not allocate new locations, and comparing
+        # locations mostly amounts to an identity check:
+        self._locations = tuple(ProgramLocation(self, index) for index in range(len(self._instructions)))
 
     def print(self, out):
         out.write("StackProgram ")
@@ -44,6 +47,17 @@ class StackProgram(Immutable, Printable):
     def __getitem__(self, item):
         return self._instructions[item]
 
+    def location(self, index):
+        """
+        Retrieves the canonical location of an instruction of this program.
+        :param index: The index of an instruction in this program.
+        :return: A ProgramLocation object, that is the same object for every call with the same index, unless the index
+                 is not a valid index of an instruction in this program.
+        """
+        if 0 <= index < len(self._locations):
+            return self._locations[index]
+        return ProgramLocation(self, index)
+
 
 @intrinsic_type("location", [type_object])
 class ProgramLocation(Immutable, Value):
@@ -51,6 +65,8 @@ class ProgramLocation(Immutable, Value):
     A pair of StackProgram and instruction index.
     """
 
+    __slots__ = ("_sealed", "_hash", "_program", "_index")
+
     @property
     def type(self):
         return ProgramLocation.intrinsic_type
@@ -94,10 +110,11 @@ class ProgramLocation(Immutable, Value):
         return self._index
 
     def equals(self, other):
-        return isinstance(other, ProgramLocation) and (self._index, self._program) == (other._index, other._program)
+        return self is other or (isinstance(other, ProgramLocation)
+                                 and (self._index, self._program) == (other._index, other._program))
 
-    def bequals(self, other, bijection):
-        return self.equals(other)
+    def _bequals(self, other, bijection):
+        return () if self.equals(other) else False
 
     def cequals(self, other):
         return self.equals(other)
@@ -38,3 +38,21 @@ class Reference(Value, abc.ABC):
         :return: The object pointed to by this reference.
         """
         pass
+
+    @property
+    def absolute(self):
+        """
+        Indicates if this reference addresses stack frames by the IDs of their tasks, see Reference.frames. Whether
+        such a reference can be resolved at all depends on the tasks of a machine state.
+        """
+        return False
+
+    def frames(self, mstate):
+        """
+        Enumerates the stack frames that this reference may access regardless of the task that interprets it. Most
+        references only access the task interpreting them, or the values they point into. This is used to determine
+        which values a task may access, see engine.dpor.
+        :param mstate: A MachineState object.
+        :return: An iterable of Frame objects contained in mstate.
+        """
+        return ()
@@ -1,10 +1,11 @@
 from engine.core.data import VException, VCancellationError
+from engine.core.fingerprint import MASK, mix, fingerprint
 from engine.core.machine import TaskStatus, TaskState
 from engine.core.none import value_none
 from engine.core.value import Value
 from engine.stack.exceptions import VInstructionException
 from engine.stack.frame import Frame
-from engine.stack.program import ProgramLocation
+import util
 from util import check_type, check_types
 from util.immutable import check_sealed, check_unsealed
 
@@ -14,6 +15,8 @@ class StackState(TaskState):
     Models the state of a task that executes a control flow graph that may contain function calls.
     """
 
+    __slots__ = ("_stack", "_exception", "_returned")
+
     def __init__(self, status, stack, exception=None, returned=None):
         """
         Allocates a new stack state.
@@ -24,9 +27,14 @@ class StackState(TaskState):
         """
         super().__init__(status)
 
-        self._stack = list(check_types(stack, Frame))
-        self._exception = value_none if exception is None else check_type(exception, Value)
-        self._returned = value_none if returned is None else check_type(returned, Value)
+        if not util.trusted:
+            stack = check_types(stack, Frame)
+            check_type(exception, Value, allow_none=True)
+            check_type(returned, Value, allow_none=True)
+
+        self._stack = list(stack)
+        self._exception = value_none if exception is None else exception
+        self._returned = value_none if returned is None else returned
 
     def cancel(self):
         if self.status in (TaskStatus.CANCELLED, TaskStatus.COMPLETED, TaskStatus.FAILED):
@@ -40,7 +48,7 @@ class StackState(TaskState):
         being scheduled again.
         :param mstate: The MachineState to remove this task from.
         """
-        for idx, t in enumerate(mstate.task_states):
+        for idx, t in enumerate(mstate.iter_task_states()):
             if t is self:
                 mstate.remove_task(idx)
                 return
@@ -51,18 +59,13 @@ class StackState(TaskState):
         prefix = ""
         for f in self._stack:
             out.write(prefix)
-            ProgramLocation(f.program, f.instruction_index).print(out)
+            f.program.location(f.instruction_index).print(out)
             prefix = ", "
         out.write(")")
 
     def _seal(self):
         self._stack = tuple(self._stack)
-        for f in self._stack:
-            f.seal()
-        if self._exception is not None:
-            self._exception.seal()
-        if self._returned is not None:
-            self._returned.seal()
+        return (*self._stack, *(v for v in (self._exception, self._returned) if v is not None))
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -84,14 +87,38 @@ class StackState(TaskState):
         """
         The sequence of Frame objects, that, from top to bottom, represent the stack of this task state.
         """
-        return tuple(self._stack)
+        # Once sealed, the stack is held in a tuple already, which does not need to be copied:
+        return self._stack if self._sealed else tuple(self._stack)
+
+    @property
+    def depth(self):
+        """
+        The number of frames on the stack of this task state.
+        """
+        return len(self._stack)
+
+    @property
+    def top(self):
+        """
+        The Frame at the top of the stack of this task state, i.e. self.stack[-1], but without copying the stack.
+        Raises an IndexError if the stack is empty.
+        """
+        return self._stack[-1]
+
+    def frame(self, index):
+        """
+        Retrieves a frame from the stack of this task state, without copying the stack.
+        :param index: The index of the frame in self.stack.
+        :return: A Frame object.
+        """
+        return self._stack[index]
 
     def push(self, frame):
         """
         Pushes a frame onto the stack of this StackState.
         :param frame: The Frame object to push onto the stack.
         """
-        self._stack.append(check_type(frame, Frame))
+        self._stack.append(frame if util.trusted else check_type(frame, Frame))
 
     def pop(self):
         """
@@ -110,7 +137,7 @@ class StackState(TaskState):
     @exception.setter
     def exception(self, value):
         check_unsealed(self)
-        self._exception = check_type(value, Value)
+        self._exception = value if util.trusted else check_type(value, Value)
 
     @property
     def returned(self):
@@ -122,32 +149,35 @@ class StackState(TaskState):
     @returned.setter
     def returned(self, value):
         check_unsealed(self)
-        self._returned = check_type(value, Value)
+        self._returned = value if util.trusted else check_type(value, Value)
 
     def hash(self):
         check_sealed(self)
-        return len(self._stack)
+        # The frames maintain their hashes incrementally, so this only costs O(len(self._stack)):
+        h = mix(len(self._stack), hash((self.status, fingerprint(self._exception), fingerprint(self._returned))))
+        for idx, f in enumerate(self._stack):
+            h += mix(idx, hash(f))
+        return h & MASK
 
     def chash(self):
         return 0
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, StackState)
                     and self.status == other.status
-                    and len(self._stack) == len(other._stack)
-                    and self._exception.bequals(other._exception, bijection)
-                    and self._returned.bequals(other._returned, bijection)):
+                    and len(self._stack) == len(other._stack)):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._stack, other._stack))
+            return [(self._exception, other._exception), (self._returned, other._returned),
+                    *zip(self._stack, other._stack)]
 
     def enabled(self, mstate):
-        if len(self.stack) == 0:
+        if len(self._stack) == 0:
             return False
-        top = self.stack[-1]
+        top = self._stack[-1]
         try:
             i = top.program[top.instruction_index]
         except IndexError:
@@ -176,7 +206,7 @@ class StackState(TaskState):
         while True:
 
             try:
-                top = self.stack[-1]
+                top = self._stack[-1]
             except IndexError:
                 if isinstance(self.exception, VException):
                     if self.status == TaskStatus.RUNNING:
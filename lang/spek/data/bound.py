@@ -38,10 +38,7 @@ class BoundProcedure(Procedure):
         return tuple(self._args)
 
     def _seal(self):
-        self._p.seal()
-        for a in self._args:
-            if a is not None:
-                a.seal()
+        return (self._p, *(a for a in self._args if a is not None))
 
     def print(self, out):
         out.write(f"BoundProcedure(")
@@ -62,20 +59,22 @@ class BoundProcedure(Procedure):
                 and self._p.equals(other._p)
                 and all(((a is None) == (b is None)) and (a is None or a.equals(b)) for a, b in zip(self._args, other._args)))
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            if not (isinstance(other, BoundProcedure)
-                    and self._p.bequals(other._p, bijection)):
+            if not isinstance(other, BoundProcedure):
                 return False
 
+            pairs = [(self._p, other._p)]
             for a, b in zip(self._args, other._args):
-                if not (((a is None) == (b is None)) and (a is None or a.bequals(b, bijection))):
+                if (a is None) != (b is None):
                     return False
+                if a is not None:
+                    pairs.append((a, b))
 
-            return True
+            return pairs
 
     def cequals(self, other):
         return (isinstance(other, BoundProcedure)
@@ -1,7 +1,9 @@
 from engine.core.atomic import type_object
+from engine.core.fingerprint import mix, fingerprint
 from engine.core.intrinsic import intrinsic_type
 from engine.core.value import Value
 from engine.stack.exceptions import unhashable
+import util
 from util import check_type
 from util.immutable import check_unsealed
 
@@ -12,6 +14,8 @@ class VCell(Value):
     An object that references another object.
     """
 
+    __slots__ = ("_sealed", "_hash", "_ref")
+
     def __init__(self, ref):
 
         """
@@ -19,7 +23,7 @@ class VCell(Value):
         :param ref: The object this cell should contain.
         """
         super().__init__()
-        self._ref = check_type(ref, Value)
+        self._ref = ref if util.trusted else check_type(ref, Value)
 
     @property
     def value(self):
@@ -32,7 +36,7 @@ class VCell(Value):
     @value.setter
     def value(self, value):
         check_unsealed(self)
-        self._ref = check_type(value, Value)
+        self._ref = value if util.trusted else check_type(value, Value)
 
     def print(self, out):
         out.write("Cell(")
@@ -47,17 +51,17 @@ class VCell(Value):
         return VCell.intrinsic_type
 
     def hash(self):
-        return hash(self._ref) ^ 47
+        return mix(47, fingerprint(self._ref))
 
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, VCell) and self._ref.bequals(other._ref, bijection)
+            return ((self._ref, other._ref),) if isinstance(other, VCell) else False
 
     def cequals(self, other):
         return self.equals(other)
@@ -66,7 +70,7 @@ class VCell(Value):
         return unhashable(self)
 
     def _seal(self):
-        self._ref.seal()
+        return self._ref,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
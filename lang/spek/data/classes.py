@@ -112,13 +112,14 @@ class VSuper(Value):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, VSuper)
-                    and self._t.bequals(other._t, bijection) and self._x.bequals(other._x, bijection))
+            if not isinstance(other, VSuper):
+                return False
+            return (self._t, other._t), (self._x, other._x)
 
     def cequals(self, other):
         return self is other
@@ -127,8 +128,7 @@ class VSuper(Value):
         return self._x.chash()
 
     def _seal(self):
-        self._t.seal()
-        self._x.seal()
+        return self._t, self._x
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -8,6 +8,7 @@ from engine.core.value import Value
 from lang.spek.data.builtin import builtin
 from lang.spek.data.exceptions import VFutureError
 from engine.stack.exceptions import unhashable
+import util
 from util import check_type
 from util.immutable import check_unsealed
 
@@ -29,6 +30,8 @@ class VFuture(Value):
     needs to make progress itself.
     """
 
+    __slots__ = ("_sealed", "_hash", "_status", "_result")
+
     @intrinsic_member()
     def __init__(self):
         """
@@ -60,12 +63,14 @@ class VFuture(Value):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, VFuture) and self._status == other._status and self._result.bequals(other._result, bijection)
+            if not (isinstance(other, VFuture) and self._status == other._status):
+                return False
+            return ((self._result, other._result),)
 
     def cequals(self, other):
         return self.equals(other)
@@ -75,7 +80,8 @@ class VFuture(Value):
 
     def _seal(self):
         if self._result is not None:
-            self._result.seal()
+            return self._result,
+        return ()
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -150,7 +156,7 @@ class VFuture(Value):
         check_unsealed(self)
         if self._status == FutureStatus.SET:
             raise VFutureError("This future has already been set!")
-        self._result = check_type(value, Value)
+        self._result = value if util.trusted else check_type(value, Value)
         self._status = FutureStatus.SET
 
     @intrinsic_member()
@@ -28,7 +28,7 @@ class VRef(Reference):
         self._value.print(out)
 
     def _seal(self):
-        self._value.seal()
+        return self._value,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -47,12 +47,12 @@ class VRef(Reference):
     def equals(self, other):
         return isinstance(other, VRef) and self._value.equals(other)
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, VRef) and self._value.bequals(other, bijection)
+            return ((self._value, other),) if isinstance(other, VRef) else False
 
     def cequals(self, other):
         return isinstance(other, VRef) and self._value.cequals(other)
@@ -96,14 +96,14 @@ class FrameReference(FiniteValue, Reference):
         # execution of instructions, which in turn only happens when there still is a stack frame. Any exceptions
         # here thus point at implementation bugs of the virtual machine and should NOT be presented as "legitimate"
         # VException objects!
-        frame = tstate.stack[-1]
+        frame = tstate.top
         if len(frame) < self.index + 1:
             frame.resize(self.index + 1)
         frame[self.index] = value
 
     def read(self, tstate, mstate):
         try:
-            return tstate.stack[-1][self.index]
+            return tstate.top[self.index]
         except IndexError as ex:
             raise VReferenceError(f"Could not read entry {self.index} from top stack frame!") from ex
 
@@ -135,17 +135,28 @@ class AbsoluteFrameReference(KeyableValue, Reference):
     def write(self, tstate, mstate, value):
         t, o, i = self.instance_key
         try:
-            frame = mstate.task_states[t].stack[o]
+            frame = mstate.task_state(t).frame(o)
         except IndexError as ex:
             raise VReferenceError(f"Failed to retrieve stack frame {o} in task {t}!") from ex
         if len(frame) < i + 1:
             frame.resize(i + 1)
         frame[i] = value
 
+    @property
+    def absolute(self):
+        return True
+
+    def frames(self, mstate):
+        t, o, _ = self.instance_key
+        try:
+            return mstate.task_state(t).frame(o),
+        except (IndexError, AttributeError):
+            return ()
+
     def read(self, tstate, mstate):
         t, o, i = self.instance_key
         try:
-            return mstate.task_states[t].stack[o][i]
+            return mstate.task_state(t).frame(o)[i]
         except IndexError as ex:
             raise VReferenceError(f"Failed to retrieve entry {i} of stack frame {o} in task {t}!") from ex
 
@@ -200,7 +211,7 @@ class FieldReference(Reference):
         out.write(f".{self._fidx}")
 
     def _seal(self):
-        self._v.seal()
+        return self._v,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -219,12 +230,14 @@ class FieldReference(Reference):
     def equals(self, other):
         return isinstance(other, FieldReference) and self._fidx == other._fidx and self._v.equals(other._v)
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, FieldReference) and self._fidx == other._fidx and self._v.bequals(other._v, bijection)
+            if not (isinstance(other, FieldReference) and self._fidx == other._fidx):
+                return False
+            return ((self._v, other._v),)
 
     def cequals(self, other):
         return isinstance(other, FieldReference) and self._fidx == other._fidx and self._v.cequals(other._v)
@@ -255,8 +268,7 @@ class ItemReference(Reference):
         self._index = check_type(index, Value)
 
     def _seal(self):
-        self._structure.seal()
-        self._index.seal()
+        return self._structure, self._index
 
     def hash(self):
         return hash(self._index)
@@ -264,14 +276,14 @@ class ItemReference(Reference):
     def equals(self, other):
         return isinstance(other, ItemReference) and (self._structure, self._index) == (other._structure, other._index)
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, ItemReference)
-                    and self._structure.bequals(other._structure, bijection)
-                    and self._index.bequals(other._index, bijection))
+            if not isinstance(other, ItemReference):
+                return False
+            return (self._structure, other._structure), (self._index, other._index)
 
     def cequals(self, other):
         return (isinstance(other, ItemReference)
@@ -344,7 +356,7 @@ class CellReference(Reference):
         out.write(")")
 
     def _seal(self):
-        self._cref.seal()
+        return self._cref,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -363,8 +375,8 @@ class CellReference(Reference):
     def equals(self, other):
         return isinstance(other, CellReference) and self._cref.equals(other._cref)
 
-    def bequals(self, other, bijection):
-        return isinstance(other, CellReference) and self._cref.bequals(other._cref, bijection)
+    def _bequals(self, other, bijection):
+        return ((self._cref, other._cref),) if isinstance(other, CellReference) else False
 
     def cequals(self, other):
         return isinstance(other, CellReference) and self._cref.cequals(other._cref)
@@ -731,7 +731,7 @@ class Callable(Term):
                     args = [Read(CRef(FrameReference(idx))) for idx in range(2)]
                     c = [Update(CRef(ReturnValueReference()), New(CTerm(VSuper.intrinsic_type), *args), 1, 3),
                          Pop(3)]
-                    Callable.__constructor_super = StackProcedure(2, ProgramLocation(StackProgram(c), 0))
+                    Callable.__constructor_super = StackProcedure(2, StackProgram(c).location(0))
 
                 return Callable.__constructor_super
             elif isinstance(callee, Type):
@@ -750,7 +750,7 @@ class Callable(Term):
                          Pop(3)
                          ]
 
-                    c = StackProcedure(1 + callee.num_cargs, ProgramLocation(StackProgram(c), 0))
+                    c = StackProcedure(1 + callee.num_cargs, StackProgram(c).location(0))
 
                     Callable.__constructors[num_cargs] = c
                     return BoundProcedure(c, callee)
@@ -791,7 +791,7 @@ class ITask(Term):
 
     def evaluate(self, tstate, mstate):
         t = None
-        for task_state in mstate.task_states:
+        for task_state in mstate.iter_task_states():
             if isinstance(task_state, InteractionState) and task_state.interaction == self._s:
                 if t is not None:
                     raise RuntimeError("There is more than one interaction state for the interaction symbol {}!".format(self._s))
@@ -1341,7 +1341,7 @@ class NewProcedure(Term):
         out.write(", ")
         e = self._entry
         if isinstance(e, StackProgram):
-            e = ProgramLocation(e, 0)
+            e = e.location(0)
         e.print(out)
         out.write(")")
 
@@ -1370,7 +1370,7 @@ class NewProcedure(Term):
     def evaluate(self, tstate, mstate):
         e = self._entry
         if isinstance(e, StackProgram):
-            e = ProgramLocation(e, 0)
+            e = e.location(0)
 
         return BoundProcedure(StackProcedure(len(self._free) + self._num_args, e),
                               *(f.evaluate(tstate, mstate) for f in self._free))
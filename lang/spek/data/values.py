@@ -2,12 +2,15 @@ import abc
 
 from engine.core.atomic import type_object, VObject
 from engine.core.data import VBool, VIndexError, VKeyError, VInt, VIndexingIterator, VIterator, VRuntimeError
+from engine.core.fingerprint import MASK, mix, fingerprint, combine
 from engine.core.intrinsic import intrinsic_type, intrinsic_member
 from engine.core.value import Value
 from engine.stack.exceptions import VTypeError, unhashable
 from lang.spek.data.builtin import builtin
-from util import check_type
-from util.immutable import check_unsealed
+import util
+from util import check_type, check_types
+from util.immutable import check_unsealed, Immutable
+from util.persistent import PVector, PMap
 
 
 @builtin()
@@ -17,10 +20,12 @@ class VTuple(Value):
     Equivalent to Python's tuples.
     """
 
+    __slots__ = ("_sealed", "_hash", "_comps")
+
     @intrinsic_member()
     def __init__(self, components):
         super().__init__()
-        self._comps = tuple(check_type(c, Value) for c in components)
+        self._comps = tuple(components if util.trusted else check_types(components, Value))
 
     def print(self, out):
         out.write("(")
@@ -44,16 +49,16 @@ class VTuple(Value):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         # Python can actually tell tuples apart by their identity!
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, VTuple)
                     and len(self._comps) == len(other._comps)):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._comps, other._comps))
+            return zip(self._comps, other._comps)
 
     def cequals(self, other):
         return (isinstance(other, VTuple)
@@ -64,8 +69,7 @@ class VTuple(Value):
         return hash(c.chash() for c in self)
 
     def _seal(self):
-        for c in self._comps:
-            c.seal()
+        return self._comps
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -119,6 +123,8 @@ class VRange(Value):
     Equivalent to Python's range type.
     """
 
+    __slots__ = ("_sealed", "_hash", "_stop")
+
     @intrinsic_member()
     def __init__(self, stop):
         super().__init__()
@@ -137,12 +143,12 @@ class VRange(Value):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, VRange) and self._stop == other._stop
+            return () if isinstance(other, VRange) and self._stop == other._stop else False
 
     def cequals(self, other):
         return isinstance(other, VRange) and self._stop == other._stop
@@ -151,7 +157,7 @@ class VRange(Value):
         return hash(self._stop)
 
     def _seal(self):
-        pass
+        return ()
 
     def clone_unsealed(self, clones=None):
         return self
@@ -178,6 +184,8 @@ class TokenizedMutable(Value):
     A Value that each time it is modified will also modify a public mutation token.
     """
 
+    __slots__ = ("_sealed", "_hash")
+
     @property
     @abc.abstractmethod
     def mtoken(self):
@@ -194,6 +202,8 @@ class VMutableIterator(VIterator):
     An indexing iterator over a mutable sequence. This iterator becomes unusable when the sequence is modified.
     """
 
+    __slots__ = ("_core", "_mtoken")
+
     def __init__(self, core, iterable=None):
         """
         Wraps a VIterator over a MutableIterable as a VMutableIterator.
@@ -211,15 +221,14 @@ class VMutableIterator(VIterator):
     def type(self):
         return VMutableIterator.intrinsic_type
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return (isinstance(other, VMutableIterator)
-                    and self._mtoken.bequals(other._mtoken, bijection)
-                    and self._core.bequals(other._core, bijection)
-                    and self.iterable.bequals(other.iterable, bijection))
+            if not isinstance(other, VMutableIterator):
+                return False
+            return (self._mtoken, other._mtoken), (self._core, other._core), (self.iterable, other.iterable)
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -236,9 +245,7 @@ class VMutableIterator(VIterator):
             return c
 
     def _seal(self):
-        self.iterable.seal()
-        self._core.seal()
-        self._mtoken.seal()
+        return self.iterable, self._core, self._mtoken
 
     def sequals(self, other):
         raise NotImplementedError()
@@ -267,6 +274,8 @@ class VList(TokenizedMutable):
     Equivalent to Python's lists.
     """
 
+    __slots__ = ("_mtoken", "_items", "_mutables")
+
     @intrinsic_member()
     def __init__(self, elements):
         """
@@ -274,7 +283,7 @@ class VList(TokenizedMutable):
         :param elements: An iterable of Value objects that should form the elements of the list.
         """
         super().__init__()
-        self._items = [] if elements is None else [check_type(x, Value) for x in elements]
+        self._assign(PVector(()) if elements is None else PVector(elements if util.trusted else check_types(elements, Value)))
         self._mtoken = VObject()
 
     @property
@@ -285,6 +294,30 @@ class VList(TokenizedMutable):
         check_unsealed(self)
         self._mtoken = VObject()
 
+    def _assign(self, items):
+        """
+        Replaces the items of this list, recomputing the number of its mutable items from scratch.
+        :param items: A PVector of Value objects.
+        """
+        self._items = items
+        self._mutables = sum(1 for x in items if not isinstance(x, Immutable))
+
+    def _put(self, index, item):
+        """
+        Appends an item or replaces an existing one, updating the number of mutable items of this list incrementally.
+        :param index: Either the (non-negative) index of the item to replace, or the length of this list.
+        :param item: A Value.
+        """
+        if not util.trusted:
+            check_type(item, Value)
+        if index == len(self._items):
+            self._items = self._items.append(item)
+        else:
+            old = self._items[index]
+            self._items = self._items.set(index, item)
+            self._mutables -= not isinstance(old, Immutable)
+        self._mutables += not isinstance(item, Immutable)
+
     @intrinsic_member()
     def append(self, item):
         """
@@ -292,7 +325,7 @@ class VList(TokenizedMutable):
         :param item: The item to append.
         """
         self._mutate()
-        return self._items.append(check_type(item, Value))
+        self._put(len(self._items), item)
 
     @intrinsic_member()
     def pop(self, index):
@@ -302,7 +335,14 @@ class VList(TokenizedMutable):
         :return: The popped item.
         """
         self._mutate()
-        return self._items.pop(int(index))
+        index = range(len(self._items))[int(index)]
+        if index == len(self._items) - 1:
+            self._items, item = self._items.pop()
+            self._mutables -= not isinstance(item, Immutable)
+        else:
+            item = self._items[index]
+            self._assign(PVector(x for idx, x in enumerate(self._items) if idx != index))
+        return item
 
     @intrinsic_member()
     def extend(self, iterable):
@@ -311,7 +351,8 @@ class VList(TokenizedMutable):
         :param iterable: An iterable of Values.
         """
         self._mutate()
-        return self._items.extend(check_type(x, Value) for x in iterable)
+        for x in iterable:
+            self._put(len(self._items), x)
 
     @intrinsic_member()
     def insert(self, index, item):
@@ -321,7 +362,9 @@ class VList(TokenizedMutable):
         :param item: The Value to insert.
         """
         self._mutate()
-        return self._items.insert(int(index), check_type(item, Value))
+        items = list(self._items)
+        items.insert(int(index), check_type(item, Value))
+        self._assign(PVector(items))
 
     @intrinsic_member()
     def remove(self, x):
@@ -330,7 +373,9 @@ class VList(TokenizedMutable):
         :param x: The Value to remove from this list.
         """
         self._mutate()
-        return self._items.remove(check_type(x, Value))
+        items = list(self._items)
+        items.remove(check_type(x, Value))
+        self._assign(PVector(items))
 
     @intrinsic_member()
     def clear(self):
@@ -338,7 +383,7 @@ class VList(TokenizedMutable):
         Empties this list, i.e. removes all items.
         """
         self._mutate()
-        return self._items.clear()
+        self._assign(PVector(()))
 
     @intrinsic_member()
     def sort(self):
@@ -346,7 +391,7 @@ class VList(TokenizedMutable):
         Sorts this list stably in-place.
         """
         self._mutate()
-        self._items.sort()
+        self._assign(PVector(sorted(self._items)))
 
     def print(self, out):
         out.write("[")
@@ -365,21 +410,22 @@ class VList(TokenizedMutable):
         return VList.intrinsic_type
 
     def hash(self):
-        return len(self)
+        return combine(map(fingerprint, self._items))
 
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, VList)
-                    and len(self._items) == len(other._items)
-                    and self._mtoken.bequals(other._mtoken, bijection)):
+                    and len(self._items) == len(other._items)):
                 return False
-            return all(a.bequals(b, bijection) for a, b in zip(self._items, other._items))
+            if self._items is other._items:
+                return ((self._mtoken, other._mtoken),)
+            return [(self._mtoken, other._mtoken), *zip(self._items, other._items)]
 
     def cequals(self, other):
         return (isinstance(other, VList)
@@ -390,10 +436,9 @@ class VList(TokenizedMutable):
         return unhashable(self)
 
     def _seal(self):
-        self._mtoken.seal()
-        for c in self._items:
-            c.seal()
-        self._items = tuple(self._items)
+        if self._mutables > 0:
+            return (self._mtoken, *self._items)
+        return self._mtoken,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -401,12 +446,26 @@ class VList(TokenizedMutable):
         try:
             return clones[id(self)]
         except KeyError:
-            c = VList(self._items)
+            c = VList(None)
             clones[id(self)] = c
             c._mtoken = self._mtoken.clone_unsealed(clones=clones)
-            c._items = [c.clone_unsealed(clones=clones) for c in c._items]
+            # Immutable items are their own clones, so only the parts of the trie that contain mutable items need to
+            # be copied. In particular, a list of immutable items shares its entire trie with its clone.
+            if self._mutables == 0:
+                c._items = self._items
+            else:
+                c._items = self._items.map(lambda x: x.clone_unsealed(clones=clones))
+            c._mutables = self._mutables
             return c
 
+    def __getstate__(self):
+        return self._sealed, self._mtoken, self._items
+
+    def __setstate__(self, state):
+        self._sealed, self._mtoken, items = state
+        self._hash = None
+        self._assign(items)
+
     def __len__(self):
         return len(self._items)
 
@@ -416,12 +475,12 @@ class VList(TokenizedMutable):
     def __getitem__(self, key):
         try:
             return self._items[int(check_type(key, Value))]
-        except IndexError as iex:
-            raise VIndexError(str(iex))
+        except IndexError:
+            raise VIndexError("list index out of range")
 
     def __setitem__(self, key, value):
         self._mutate()
-        self._items[int(check_type(key, Value))] = check_type(value, Value)
+        self._put(range(len(self._items))[int(check_type(key, Value))], value)
 
     def __add__(self, other):
         if not isinstance(other, VList):
@@ -434,16 +493,16 @@ class VList(TokenizedMutable):
         return VList(list(self) * other)
 
     def __lt__(self, other):
-        return VBool(self._items < other._items)
+        return VBool(tuple(self._items) < tuple(other._items))
 
     def __le__(self, other):
-        return VBool(self._items <= other._items)
+        return VBool(tuple(self._items) <= tuple(other._items))
 
     def __gt__(self, other):
-        return VBool(self._items > other._items)
+        return VBool(tuple(self._items) > tuple(other._items))
 
     def __ge__(self, other):
-        return VBool(self._items >= other._items)
+        return VBool(tuple(self._items) >= tuple(other._items))
 
 
 @builtin()
@@ -453,13 +512,17 @@ class VDict(TokenizedMutable):
     Equivalent to Python's dicts.
     """
 
+    __slots__ = ("_mtoken", "_items", "_mutables")
+
     class Key:
         """
         Wraps a Value as a Python object that is hashable according to Value.chash.
         """
 
+        __slots__ = ("_x",)
+
         def __init__(self, x):
-            self._x = check_type(x, Value)
+            self._x = x if util.trusted else check_type(x, Value)
 
         def __str__(self):
             return str(self._x)
@@ -489,11 +552,14 @@ class VDict(TokenizedMutable):
         """
         super().__init__()
         if isinstance(items, VDict):
-            self._items = dict(items.items_python())
-        elif isinstance(items, dict):
-            self._items = {VDict.Key(k): check_type(v, Value) for k, v in items.items()}
+            # The map is persistent, so it can be shared with the original:
+            self._items = items._items
+            self._mutables = items._mutables
         else:
-            self._items = {VDict.Key(k): check_type(v, Value) for k, v in items}
+            if isinstance(items, dict):
+                items = items.items()
+            self._items = PMap((VDict.Key(k), check_type(v, Value)) for k, v in items)
+            self._refresh()
 
         self._mtoken = VObject()
 
@@ -505,9 +571,30 @@ class VDict(TokenizedMutable):
         check_unsealed(self)
         self._mtoken = VObject()
 
+    def _refresh(self):
+        """
+        Recomputes the number of mutable keys and values of this dict from scratch.
+        """
+        self._mutables = sum((not isinstance(k.wrapped, Immutable)) + (not isinstance(v, Immutable))
+                             for k, v in self._items.items())
+
+    def _put(self, key, value):
+        """
+        Sets the value for a key, updating the number of mutable keys and values of this dict incrementally.
+        :param key: A VDict.Key.
+        :param value: A Value.
+        """
+        try:
+            old = self._items[key]
+            self._mutables -= not isinstance(old, Immutable)
+        except KeyError:
+            self._mutables += not isinstance(key.wrapped, Immutable)
+        self._items = self._items.set(key, value if util.trusted else check_type(value, Value))
+        self._mutables += not isinstance(value, Immutable)
+
     def keys_python(self):
         """
-        A Python view on the keys of this VDict.
+        A Python iterable over the keys of this VDict.
         """
         return self._items.keys()
 
@@ -517,7 +604,7 @@ class VDict(TokenizedMutable):
 
     def values_python(self):
         """
-        A Python view on the values of this VDict.
+        A Python iterable over the values of this VDict.
         """
         return self._items.values()
 
@@ -527,7 +614,7 @@ class VDict(TokenizedMutable):
 
     def items_python(self):
         """
-        A Python view on the items of this VDict.
+        A Python iterable over the items of this VDict.
         """
         return self._items.items()
 
@@ -541,7 +628,8 @@ class VDict(TokenizedMutable):
         Empties this dictionary, i.e. removes all its entries.
         """
         self._mutate()
-        self._items.clear()
+        self._items = PMap()
+        self._mutables = 0
 
     @intrinsic_member()
     def pop(self, key):
@@ -551,7 +639,11 @@ class VDict(TokenizedMutable):
         :return: The value that was retrieved and removed.
         """
         self._mutate()
-        return self._items.pop(VDict.Key(key))
+        key = VDict.Key(key)
+        value = self._items[key]
+        self._items = self._items.delete(key)
+        self._mutables -= (not isinstance(key.wrapped, Immutable)) + (not isinstance(value, Immutable))
+        return value
 
     @intrinsic_member()
     def update(self, other):
@@ -561,9 +653,11 @@ class VDict(TokenizedMutable):
         """
         self._mutate()
         if isinstance(other, VDict):
-            self._items.update(other._items)
+            for k, v in other._items.items():
+                self._put(k, v)
         else:
-            self._items.update((VDict.Key(k), check_type(v, Value)) for k, v in (other.items() if isinstance(other, dict) else other))
+            for k, v in (other.items() if isinstance(other, dict) else other):
+                self._put(VDict.Key(k), v)
 
     def print(self, out):
         out.write("{")
@@ -584,27 +678,29 @@ class VDict(TokenizedMutable):
         return VDict.intrinsic_type
 
     def hash(self):
-        return hash(len(self))
+        return sum(mix(hash(k), fingerprint(v)) for k, v in self._items.items()) & MASK
 
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
             if not (isinstance(other, VDict)
-                    and len(self._items) == len(other._items)
-                    and self._mtoken.bequals(other._mtoken, bijection)):
+                    and len(self._items) == len(other._items)):
                 return False
-            for k, v in self._items.items():
-                try:
-                    if not v.bequals(other._items[k], bijection):
+            pairs = [(self._mtoken, other._mtoken)]
+            for (k, v), (ok, ov) in zip(self._items.items(), other._items.items()):
+                # Dicts that have been constructed in the same way enumerate their keys in the same order:
+                if not (k is ok or k == ok):
+                    try:
+                        ov = other._items[k]
+                    except KeyError:
                         return False
-                except KeyError:
-                    return False
-            return True
+                pairs.append((v, ov))
+            return pairs
 
     def cequals(self, other):
         if not (isinstance(other, VDict)
@@ -622,10 +718,9 @@ class VDict(TokenizedMutable):
         return unhashable(self)
 
     def _seal(self):
-        self._mtoken.seal()
-        for k, v in self._items.items():
-            k.wrapped.seal()
-            v.seal()
+        if self._mutables > 0:
+            return (self._mtoken, *(x for k, v in self._items.items() for x in (k.wrapped, v)))
+        return self._mtoken,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -636,9 +731,21 @@ class VDict(TokenizedMutable):
             c = VDict(self)
             clones[id(self)] = c
             c._mtoken = self._mtoken.clone_unsealed(clones=clones)
-            c._items = {VDict.Key(k.wrapped.clone_unsealed(clones=clones)): v.clone_unsealed(clones=clones) for k, v in c._items.items()}
+            # A dict of immutable keys and values shares its entire map with its clone:
+            if self._mutables > 0:
+                c._items = PMap((VDict.Key(k.wrapped.clone_unsealed(clones=clones)), v.clone_unsealed(clones=clones))
+                                for k, v in self._items.items())
+                c._refresh()
             return c
 
+    def __getstate__(self):
+        return self._sealed, self._mtoken, self._items
+
+    def __setstate__(self, state):
+        self._sealed, self._mtoken, self._items = state
+        self._hash = None
+        self._refresh()
+
     def __len__(self):
         return len(self._items)
 
@@ -656,7 +763,7 @@ class VDict(TokenizedMutable):
 
     def __setitem__(self, key, value):
         self._mutate()
-        self._items[VDict.Key(key)] = check_type(value, Value)
+        self._put(VDict.Key(key), value)
 
     def __ior__(self, other):
         self.update(other)
@@ -674,6 +781,8 @@ class VDictView(TokenizedMutable):
     A readonly view of a VDict.
     """
 
+    __slots__ = ("_d",)
+
     def __init__(self, d):
         """
         Creates a new view of a VDict.
@@ -709,12 +818,12 @@ class VDictView(TokenizedMutable):
     def equals(self, other):
         return self is other
 
-    def bequals(self, other, bijection):
+    def _bequals(self, other, bijection):
         try:
-            return bijection[id(self)] == id(other)
+            return () if bijection[id(self)] == id(other) else False
         except KeyError:
             bijection[id(self)] = id(other)
-            return isinstance(other, type(self)) and self._d.bequals(other._d, bijection)
+            return ((self._d, other._d),) if isinstance(other, type(self)) else False
 
     def cequals(self, other):
         return isinstance(other, type(self)) and self._d is other._d
@@ -723,7 +832,7 @@ class VDictView(TokenizedMutable):
         return unhashable(self)
 
     def _seal(self):
-        self._d.seal()
+        return self._d,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -769,6 +878,8 @@ class VKeysView(VDictView):
     A view on the keys of a VDict.
     """
 
+    __slots__ = ()
+
     def iter(self):
         return VMutableIterator(iter(VTuple(k.wrapped for k in self.mapping.keys_python())), iterable=self)
 
@@ -783,6 +894,8 @@ class VValuesView(VDictView):
     A view on the values of a VDict.
     """
 
+    __slots__ = ()
+
     def iter(self):
         return VMutableIterator(iter(VTuple(self.mapping.values_python())), iterable=self)
 
@@ -797,6 +910,8 @@ class VItemsView(VDictView):
     A view on the items of a VDict.
     """
 
+    __slots__ = ()
+
     def iter(self):
         return VMutableIterator(iter(VTuple(VTuple((k.wrapped, v)) for k, v in self.mapping.items_python())), iterable=self)
 
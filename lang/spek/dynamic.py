@@ -1,7 +1,6 @@
 from engine.core.atomic import type_object
 from engine.core.data import VException, VStopIteration
 from engine.stack.procedure import StackProcedure
-from engine.stack.program import ProgramLocation
 from lang.modules import ModuleSpecification
 from lang.spek.chains import Chain
 from lang.spek.data import terms
@@ -204,7 +203,7 @@ class Spektakel2Stack(Translator):
 
         module = spec.resolve()
 
-        mproc = StackProcedure(0, ProgramLocation(module, 0))
+        mproc = StackProcedure(0, module.location(0))
         m, chain = self.emit_call(chain, Read(CRef(AbsoluteFrameReference(0, 0, 1))),
                                   [CTerm(mproc)], on_error)
 
@@ -885,7 +884,7 @@ class Spektakel2Stack(Translator):
         self._scopes.pop()
 
         d = AbsoluteFrameReference(0, 0, 1)
-        preamble.append_update(CRef(d), CTerm(StackProcedure(1, ProgramLocation(imp_code.compile(), 0))), panic)
+        preamble.append_update(CRef(d), CTerm(StackProcedure(1, imp_code.compile().location(0))), panic)
 
         return preamble
 
@@ -5,7 +5,7 @@ from io import StringIO
 from engine.core.interaction import Interaction, i2s
 from engine.stack.instructionset import Update, Pop
 from engine.stack.procedure import StackProcedure
-from engine.stack.program import StackProgram, ProgramLocation
+from engine.stack.program import StackProgram
 from lang.modules import ModuleSpecification, Finder, AdjoinedFinder
 from lang.spek.data import terms
 from lang.spek.data.builtin import all_builtin
@@ -228,7 +228,7 @@ def build_default_finder(roots):
     r = CRef(ReturnValueReference())
     for name, symbol in symbols.items():
         p = StackProgram([Update(r, ITask(symbol), 1, 42), Pop(42)])
-        procedures[name] = StackProcedure(0, ProgramLocation(p, 0))
+        procedures[name] = StackProcedure(0, p.location(0))
 
     names = {name: value for name, value in all_builtin()}
 
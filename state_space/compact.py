@@ -0,0 +1,174 @@
+from array import array
+
+from state_space.lts import LTS, State, Transition
+
+
+class CompactLTS:
+    """
+    A labelled transition system in "compressed sparse row" layout: The states are numbered 0, ..., n - 1, the
+    distinct transition labels are numbered 0, ..., k - 1, and the outgoing transitions of state i occupy the positions
+    offsets[i], ..., offsets[i + 1] - 1 of the arrays 'labels' and 'targets'.
+    In contrast to an LTS, this representation does not need one Python object per state or transition, which makes
+    it suitable for large state spaces and for being shared between processes.
+    """
+
+    def __init__(self, offsets, labels, targets, alphabet, initial=0, states=None):
+        """
+        Creates a new compact LTS.
+        :param offsets: A sequence of n + 1 nondecreasing integers, where n is the number of states.
+        :param labels: A sequence of label indices, one for each transition.
+        :param targets: A sequence of state indices, one for each transition.
+        :param alphabet: A sequence of label objects, such that alphabet[l] is the label for label index l.
+        :param initial: The index of the initial state.
+        :param states: Either None, or a sequence of n State objects, from which this compact LTS was derived.
+        """
+        super().__init__()
+        if len(offsets) == 0 or offsets[0] != 0:
+            raise ValueError("The offsets of a compact LTS must begin with 0!")
+        if len(labels) != len(targets) or offsets[-1] != len(targets):
+            raise ValueError("The label and target arrays of a compact LTS must have one entry per transition!")
+        if not (0 <= initial < len(offsets) - 1):
+            raise ValueError("The initial state index is out of range!")
+        if states is not None and len(states) != len(offsets) - 1:
+            raise ValueError("The given states do not match the number of states of this compact LTS!")
+        self._offsets = offsets
+        self._labels = labels
+        self._targets = targets
+        self._alphabet = tuple(alphabet)
+        self._initial = initial
+        self._states = None if states is None else tuple(states)
+
+    @property
+    def num_states(self):
+        """
+        The number of states of this LTS.
+        """
+        return len(self._offsets) - 1
+
+    @property
+    def num_transitions(self):
+        """
+        The number of transitions of this LTS.
+        """
+        return len(self._targets)
+
+    @property
+    def initial(self):
+        """
+        The index of the initial state of this LTS.
+        """
+        return self._initial
+
+    @property
+    def offsets(self):
+        """
+        The sequence of n + 1 offsets into self.labels and self.targets, where n is the number of states.
+        """
+        return self._offsets
+
+    @property
+    def labels(self):
+        """
+        The sequence of label indices, one for each transition.
+        """
+        return self._labels
+
+    @property
+    def targets(self):
+        """
+        The sequence of target state indices, one for each transition.
+        """
+        return self._targets
+
+    @property
+    def alphabet(self):
+        """
+        The tuple of label objects, indexed by label index.
+        """
+        return self._alphabet
+
+    @property
+    def states(self):
+        """
+        Either None, or the tuple of State objects this compact LTS was derived from, indexed by state index.
+        """
+        return self._states
+
+    def transitions(self, s):
+        """
+        Enumerates the outgoing transitions of a state.
+        :param s: A state index.
+        :return: An iterable of pairs (l, t), where l is a label index and t is a state index.
+        """
+        a, b = self._offsets[s], self._offsets[s + 1]
+        return zip(self._labels[a:b], self._targets[a:b])
+
+
+def number(lts):
+    """
+    Enumerates the states of an LTS in breadth-first order, starting with the initial state.
+    :param lts: An LTS.
+    :return: A pair (states, s2idx), where 'states' is a list of all states reachable in the LTS and s2idx is a dict
+             mapping each of these states to its index in the list.
+    """
+    states = [lts.initial]
+    s2idx = {lts.initial: 0}
+    idx = 0
+    while idx < len(states):
+        for t in states[idx].transitions:
+            if t.target not in s2idx:
+                s2idx[t.target] = len(states)
+                states.append(t.target)
+        idx += 1
+    return states, s2idx
+
+
+def compact(lts):
+    """
+    Converts an LTS into a CompactLTS. The states are numbered in breadth-first order, such that the initial state
+    receives index 0.
+    :param lts: An LTS.
+    :return: A CompactLTS, the 'states' of which are the states of the given LTS.
+    """
+    states, s2idx = number(lts)
+
+    l2idx = {}
+    offsets, labels, targets = array('Q', [0]), array('Q'), array('Q')
+    for s in states:
+        for t in s.transitions:
+            try:
+                l = l2idx[t.label]
+            except KeyError:
+                l = len(l2idx)
+                l2idx[t.label] = l
+            labels.append(l)
+            targets.append(s2idx[t.target])
+        offsets.append(len(targets))
+
+    return CompactLTS(offsets, labels, targets, l2idx.keys(), initial=0, states=states)
+
+
+def expand(clts, content=None):
+    """
+    Converts a CompactLTS into an LTS.
+    :param clts: A CompactLTS.
+    :param content: A procedure mapping state indices to state content. If this is omitted, the content of the
+                    states of clts.states will be used, or None if clts.states is None.
+    :return: An LTS.
+    """
+    if content is None:
+        if clts.states is None:
+            content = lambda idx: None
+        else:
+            content = lambda idx: clts.states[idx].content
+
+    states = [State(content(idx)) for idx in range(clts.num_states)]
+    alphabet = clts.alphabet
+    for s, state in enumerate(states):
+        for l, t in clts.transitions(s):
+            state.add_transition(Transition(alphabet[l], states[t]))
+
+    for s in states:
+        s.seal()
+
+    return LTS(states[clts.initial])
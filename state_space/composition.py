@@ -0,0 +1,122 @@
+import itertools
+
+from state_space.equivalence import reduce, reach_wbisim
+from state_space.lts import LTS, State, Transition
+
+
+def alphabet(lts):
+    """
+    Collects the labels of the transitions of an LTS.
+    :param lts: An LTS.
+    :return: A set of transition labels, not containing the internal label None.
+    """
+    labels = set()
+    reached = {lts.initial}
+    agenda = [lts.initial]
+    while len(agenda) > 0:
+        s = agenda.pop()
+        for t in s.transitions:
+            if t.label is not None:
+                labels.add(t.label)
+            if t.target not in reached:
+                reached.add(t.target)
+                agenda.append(t.target)
+    return labels
+
+
+def hide(lts, labels):
+    """
+    Turns transitions with certain labels into internal transitions.
+    :param lts: An LTS.
+    :param labels: A collection of transition labels.
+    :return: An LTS.
+    """
+
+    labels = set(labels)
+    states = {lts.initial: State(lts.initial.content)}
+    agenda = [lts.initial]
+    while len(agenda) > 0:
+        s = agenda.pop()
+        for t in s.transitions:
+            try:
+                target = states[t.target]
+            except KeyError:
+                target = State(t.target.content)
+                states[t.target] = target
+                agenda.append(t.target)
+            states[s].add_transition(Transition(None if t.label in labels else t.label, target))
+
+    for s in states.values():
+        s.seal()
+
+    return LTS(states[lts.initial])
+
+
+def compose(ltss, synchronize):
+    """
+    Computes the parallel composition of LTSs. A transition with a label in 'synchronize' can only be taken jointly by
+    all the LTSs the alphabet of which contains this label. All other transitions, in particular internal ones, are
+    interleaved. Only the states reachable in the composition are constructed.
+    :param ltss: A sequence of LTSs.
+    :param synchronize: A collection of transition labels.
+    :return: An LTS, the states of which have tuples of the contents of the component states as their content.
+    """
+
+    synchronize = set(synchronize)
+    participants = dict()
+    for idx, lts in enumerate(ltss):
+        for label in alphabet(lts) & synchronize:
+            participants.setdefault(label, []).append(idx)
+
+    initial = tuple(lts.initial for lts in ltss)
+    states = {initial: State(tuple(s.content for s in initial))}
+    agenda = [initial]
+
+    def successor(origin, label, components):
+        try:
+            target = states[components]
+        except KeyError:
+            target = State(tuple(s.content for s in components))
+            states[components] = target
+            agenda.append(components)
+        states[origin].add_transition(Transition(label, target))
+
+    while len(agenda) > 0:
+        components = agenda.pop()
+
+        # Interleaved transitions:
+        for idx, s in enumerate(components):
+            for t in s.transitions:
+                if t.label not in synchronize:
+                    successor(components, t.label, (*components[:idx], t.target, *components[idx + 1:]))
+
+        # Synchronized transitions:
+        for label, idxs in participants.items():
+            for choice in itertools.product(*(components[idx].successors(label) for idx in idxs)):
+                target = list(components)
+                for idx, t in zip(idxs, choice):
+                    target[idx] = t
+                successor(components, label, tuple(target))
+
+    for s in states.values():
+        s.seal()
+
+    return LTS(states[initial])
+
+
+def compose_reduced(ltss, synchronize, hidden=(), reachable=reach_wbisim):
+    """
+    Computes a reduced parallel composition of LTSs compositionally: Every component is reduced on its own before the
+    components are composed, such that the product that needs to be constructed is much smaller than the product of
+    the unreduced components. Then the labels in 'hidden' are hidden and the result is reduced once more.
+    Since weak bisimilarity is a congruence with respect to parallel composition and hiding, the result is weakly
+    bisimilar to the reduction of the composition of the unreduced components.
+    :param ltss: A sequence of LTSs.
+    :param synchronize: A collection of transition labels, see 'compose'.
+    :param hidden: A collection of transition labels that are to be hidden after composition, typically those that
+                   only serve the synchronization of the components.
+    :param reachable: The reachability procedure defining the bisimilarity modulo which components are reduced.
+    :return: An LTS.
+    """
+    components = [reduce(lts, reachable, remove_internal_loops=True) for lts in ltss]
+    return reduce(hide(compose(components, synchronize), hidden), reachable, remove_internal_loops=True)
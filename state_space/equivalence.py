@@ -1,6 +1,9 @@
+import collections
 import itertools
 import random
+from array import array
 
+from state_space.compact import number
 from state_space.lts import LTS, State, Transition
 
 
@@ -13,9 +16,7 @@ def reach_sbisim(state, label):
     :param label: A transition label.
     """
     assert isinstance(state, State)
-    for t in state.transitions:
-        if t.label == label:
-            yield t.target
+    return state.successors(label)
 
 
 def reach_wbisim(state, label):
@@ -77,7 +78,7 @@ def reach_cached(reachable):
     :param reachable: A procedure that can be used for the 'reachable' parameter of 'coarsest'.
     :return: A procedure that can be used for the 'reachable' parameter of 'coarsest'. Note that extensive use of this
              procedure may allocate considerable amounts of memory, which will only be freed once the procedure is
-             deleted.
+             deleted. ReachabilityCache is a replacement with bounded memory consumption.
     """
 
     cache = dict()
@@ -94,6 +95,170 @@ def reach_cached(reachable):
     return cached
 
 
+class ReachabilityCache:
+    """
+    A bounded cache for the results of a reachability procedure, for faster repeated retrieval. Like the procedures
+    returned by 'reach_cached', objects of this type can be used for the 'reachable' parameter of 'coarsest'. In
+    contrast to those, the memory occupied by this cache is limited: Sets of reachable states are stored as arrays of
+    state numbers, and when the estimated size of the cached arrays exceeds the given budget, the least recently used
+    entries are evicted. Only the numbering of the states, i.e. one reference per state, is retained until 'clear'
+    is called.
+    """
+
+    # An estimate of the bytes occupied by one cache entry, in addition to the array it refers to:
+    _overhead = 200
+
+    def __init__(self, reachable, budget=64 * 2 ** 20):
+        """
+        Creates a new reachability cache.
+        :param reachable: A procedure that can be used for the 'reachable' parameter of 'coarsest'.
+        :param budget: The number of bytes the cached entries may occupy, approximately.
+        """
+        super().__init__()
+        self._reachable = reachable
+        self._budget = budget
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._s2idx = dict()
+        self._states = []
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _number(self, state):
+        """
+        Maps a state to the number under which it is stored in this cache.
+        :param state: An LTS state.
+        :return: An int.
+        """
+        try:
+            return self._s2idx[state]
+        except KeyError:
+            idx = len(self._states)
+            self._s2idx[state] = idx
+            self._states.append(state)
+            return idx
+
+    def __call__(self, state, label):
+        key = (state, label)
+        try:
+            a = self._entries[key]
+        except KeyError:
+            self._misses += 1
+            a = array('Q', map(self._number, self._reachable(state, label)))
+            self._entries[key] = a
+            self._size += self._overhead + a.itemsize * len(a)
+            while self._size > self._budget and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._overhead + evicted.itemsize * len(evicted)
+                self._evictions += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        return map(self._states.__getitem__, a)
+
+    @property
+    def budget(self):
+        """
+        The number of bytes the cached entries may occupy, approximately.
+        """
+        return self._budget
+
+    @property
+    def size(self):
+        """
+        The estimated number of bytes currently occupied by cached entries.
+        """
+        return self._size
+
+    @property
+    def hits(self):
+        """
+        The number of queries that could be answered from the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of queries that had to be forwarded to the underlying reachability procedure.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        The number of entries that were removed from the cache in order to stay within the budget.
+        """
+        return self._evictions
+
+    def clear(self):
+        """
+        Removes all entries from this cache. The statistics are retained.
+        """
+        self._entries.clear()
+        self._size = 0
+        self._s2idx.clear()
+        self._states.clear()
+
+
+def tau_closure(state):
+    """
+    Computes the set of all states that are reachable from the given state by following only internal transitions.
+    :param state: An LTS state.
+    :return: A frozenset of states, containing the given state.
+    """
+    reached = {state}
+    agenda = [state]
+    while len(agenda) > 0:
+        s = agenda.pop()
+        for t in s.transitions:
+            if t.label is None and t.target not in reached:
+                reached.add(t.target)
+                agenda.append(t.target)
+    return frozenset(reached)
+
+
+def closure_cached():
+    """
+    Creates a cached version of 'tau_closure'. The cache can be shared between the procedures of this module that
+    abstract from internal transitions, such that the closure of each state is computed only once.
+    :return: A procedure that maps states to frozensets of states, like 'tau_closure'.
+    """
+
+    cache = dict()
+
+    def cached(state):
+        try:
+            return cache[state]
+        except KeyError:
+            c = tau_closure(state)
+            cache[state] = c
+            return c
+
+    return cached
+
+
+def reach_closure(closure=tau_closure):
+    """
+    Creates a reachability procedure that is equivalent to reach_wbisim, but is based on a tau-closure procedure.
+    :param closure: A procedure that maps states to their tau-closures, for example one created by 'closure_cached'.
+    :return: A procedure that can be used for the 'reachable' parameter of 'coarsest'.
+    """
+
+    def reachable(state, label):
+        if label is None:
+            return closure(state)
+        reached = set()
+        for s in closure(state):
+            for t in s.transitions:
+                if t.label == label:
+                    reached.update(closure(t.target))
+        return reached
+
+    return reachable
+
+
 def refine(relation, reachable):
     """
     Computes the coarsest subset of an equivalence relation over LTS states that is a bisimulation according
@@ -124,29 +289,28 @@ def refine(relation, reachable):
             for pidx, p in permute(list(enumerate(relation))):
                 if len(p) == 1:
                     continue
-                for s in permute(p):
-                    assert isinstance(s, State)
-                    for t in permute(s.transitions):
-                        assert isinstance(t, Transition)
-                        pt = s2p[t.target]
-                        pos, neg = [], []
-
-                        for ss in permute(p):
-                            if any((s2p[tt] is pt) for tt in reachable(ss, t.label)):
-                                pos.append(ss)
-                            else:
-                                neg.append(ss)
-
-                        if len(pos) * len(neg) > 0:
-                            relation.pop(pidx)
-                            relation.insert(pidx, neg)
-                            relation.insert(pidx, pos)
-                            for state in pos:
-                                s2p[state] = pos
-                            for state in neg:
-                                s2p[state] = neg
-                            yield pos, neg
-                            raise RefinedException()
+                # Every pair of transition label and target partition needs to be tried only once:
+                splitters = {(label, id(s2p[target])): (label, s2p[target])
+                             for s in p for label in s.labels for target in s.successors(label)}
+                for label, pt in permute(list(splitters.values())):
+                    pos, neg = [], []
+
+                    for ss in permute(p):
+                        if any((s2p[tt] is pt) for tt in reachable(ss, label)):
+                            pos.append(ss)
+                        else:
+                            neg.append(ss)
+
+                    if len(pos) * len(neg) > 0:
+                        relation.pop(pidx)
+                        relation.insert(pidx, neg)
+                        relation.insert(pidx, pos)
+                        for state in pos:
+                            s2p[state] = pos
+                        for state in neg:
+                            s2p[state] = neg
+                        yield pos, neg
+                        raise RefinedException()
 
         except RefinedException:
             continue
@@ -213,6 +377,130 @@ def bisimulation(reachable, *ltss):
     return relation
 
 
+def rebisimulation(reachable, lts, previous, key=lambda s: s.content):
+    """
+    Updates a bisimulation after an LTS has been extended, for example after re-exploring the state space of a slightly
+    modified program. Instead of refining the partition of all states from scratch, only blocks that contain states
+    the behavior of which may have changed are refined.
+    A state of the given LTS is considered *changed* if no state of the previous partition has the same key, or if the
+    transitions of the two states differ, in terms of labels and keys of their targets. A state is *affected* if it
+    can reach a changed state. Unaffected states retain their behavior, so they remain partitioned as before.
+    This procedure does take state content into account!
+    :param reachable: The reachability procedure that was used to compute the previous partition.
+    :param lts: The extended LTS.
+    :param previous: A list of lists of states, the coarsest bisimulation on the states of the previous LTS, as computed
+                     by 'bisimulation' or 'rebisimulation'.
+    :param key: A procedure that maps states to hashable objects, identifying states across the previous LTS and the
+                extended one. States with ambiguous keys are treated as changed.
+    :return: A list of lists of states, encoding the coarsest partitioning of the states of the given LTS into
+             equivalence classes that is a bisimulation.
+    """
+
+    # Index the previous partition by key:
+    old, oblock = dict(), dict()
+    for bidx, block in enumerate(previous):
+        for s in block:
+            oblock[s] = bidx
+            k = key(s)
+            old[k] = None if k in old else s
+
+    # Collect the states of the extended LTS and their predecessors:
+    states, predecessors = [lts.initial], {lts.initial: []}
+    idx = 0
+    while idx < len(states):
+        s = states[idx]
+        for t in s.transitions:
+            try:
+                predecessors[t.target].append(s)
+            except KeyError:
+                predecessors[t.target] = [s]
+                states.append(t.target)
+        idx += 1
+
+    keys = collections.Counter(key(s) for s in states)
+
+    def counterpart(s):
+        k = key(s)
+        return old.get(k) if keys[k] == 1 else None
+
+    def signature(s):
+        return collections.Counter((t.label, key(t.target)) for t in s.transitions)
+
+    changed = [s for s in states
+               if (counterpart(s) is None or any(counterpart(t.target) is None for t in s.transitions)
+                   or signature(counterpart(s)) != signature(s))]
+
+    affected = set(changed)
+    agenda = list(changed)
+    while len(agenda) > 0:
+        for p in predecessors[agenda.pop()]:
+            if p not in affected:
+                affected.add(p)
+                agenda.append(p)
+
+    # Unaffected states keep their old blocks, unless they have the same content as an affected state. In the latter
+    # case, all states with this content form one block that needs to be refined.
+    mixed = {s.content for s in affected}
+    relation = dict()
+    for s in states:
+        c = s.content
+        relation.setdefault((c, None) if c in mixed else (c, oblock[counterpart(s)]), []).append(s)
+    blocks = list(relation.values())
+    s2b = {s: bidx for bidx, block in enumerate(blocks) for s in block}
+
+    dirty = collections.deque(bidx for bidx, block in enumerate(blocks) if block[0].content in mixed)
+    pending = set(dirty)
+
+    def split(block):
+        tried = set()
+        for s in block:
+            for t in s.transitions:
+                splitter = (t.label, s2b[t.target])
+                if splitter in tried:
+                    continue
+                tried.add(splitter)
+                pos, neg = [], []
+                for ss in block:
+                    if any(s2b[tt] == splitter[1] for tt in reachable(ss, t.label)):
+                        pos.append(ss)
+                    else:
+                        neg.append(ss)
+                if len(pos) * len(neg) > 0:
+                    return pos, neg
+        return None
+
+    while len(dirty) > 0:
+        bidx = dirty.popleft()
+        pending.discard(bidx)
+        block = blocks[bidx]
+        if len(block) == 1:
+            continue
+        r = split(block)
+        if r is None:
+            continue
+
+        pos, neg = r
+        blocks[bidx] = pos
+        blocks.append(neg)
+        for s in neg:
+            s2b[s] = len(blocks) - 1
+
+        # All blocks that contain states from which the split block can be reached may have to be split as well:
+        reached = set(block)
+        agenda = list(block)
+        while len(agenda) > 0:
+            for p in predecessors[agenda.pop()]:
+                if p not in reached:
+                    reached.add(p)
+                    agenda.append(p)
+        for b in itertools.chain((s2b[s] for s in reached), (bidx, len(blocks) - 1)):
+            if b not in pending:
+                pending.add(b)
+                dirty.append(b)
+
+    return blocks
+
+
 def bisimilar(reachable, *ltss):
     """
     Decides if a number of LTSs are pairwise bisimilar to each other.
@@ -233,7 +521,482 @@ def bisimilar(reachable, *ltss):
         return True
 
 
-def reduce(lts, reachable, remove_internal_loops=False):
+def _combine(ltss):
+    """
+    Numbers the states of multiple LTSs and arranges their transitions in "compressed sparse row" layout (see
+    state_space.compact.CompactLTS). States shared by several of the LTSs are numbered only once.
+    :param ltss: An iterable of LTSs.
+    :return: A tuple (states, owners, offsets, labels, targets), where 'owners' is a list that contains, for each state,
+             the set of the indices of the LTSs the state belongs to.
+    """
+    states, owners, s2idx = [], [], {}
+    for idx, lts in enumerate(ltss):
+        agenda = [lts.initial]
+        reached = set()
+        while len(agenda) > 0:
+            s = agenda.pop()
+            if s in reached:
+                continue
+            reached.add(s)
+            try:
+                owners[s2idx[s]].add(idx)
+            except KeyError:
+                s2idx[s] = len(states)
+                states.append(s)
+                owners.append({idx})
+            agenda.extend(t.target for t in s.transitions)
+
+    l2idx = {}
+    offsets, labels, targets = array('Q', [0]), array('Q'), array('Q')
+    for s in states:
+        for t in s.transitions:
+            labels.append(l2idx.setdefault(t.label, len(l2idx)))
+            targets.append(s2idx[t.target])
+        offsets.append(len(targets))
+
+    return states, owners, offsets, labels, targets
+
+
+def signatures(offsets, labels, targets, blocks, start, end):
+    """
+    Computes the signatures of a range of states, for signature-based refinement. The signature of a state consists of
+    the block the state belongs to, together with the set of pairs (l, b), such that the state has an l-transition into
+    block b.
+    :param offsets: The offsets array of a transition system in "compressed sparse row" layout.
+    :param labels: The label index array of a transition system in "compressed sparse row" layout.
+    :param targets: The target state array of a transition system in "compressed sparse row" layout.
+    :param blocks: A sequence mapping each state index to the index of the block it currently belongs to.
+    :param start: The index of the first state the signature of which is to be computed.
+    :param end: The index of the first state after 'start' the signature of which is not to be computed.
+    :return: A list of end - start hashable signatures.
+    """
+    result = []
+    a = offsets[start]
+    for s in range(start, end):
+        b = offsets[s + 1]
+        result.append((blocks[s], tuple(sorted(set(zip(labels[a:b], (blocks[t] for t in targets[a:b])))))))
+        a = b
+    return result
+
+
+_worker_csr = None
+
+
+def _init_worker(offsets, labels, targets):
+    """
+    Initializes a worker process for parallel signature computation, by storing the transition arrays that are shared
+    by all rounds of refinement.
+    """
+    global _worker_csr
+    _worker_csr = (offsets, labels, targets)
+
+
+def _worker_signatures(blocks, start, end):
+    """
+    Computes signatures in a worker process that has been initialized by _init_worker.
+    """
+    return signatures(*_worker_csr, blocks, start, end)
+
+
+def refine_signatures(offsets, labels, targets, blocks, workers=None, shard_size=None):
+    """
+    Computes the coarsest refinement of a partition of the states of a transition system that is a strong bisimulation,
+    by signature-based refinement: In every round, all states are assigned their signature (see 'signatures'), and
+    the new blocks are the sets of states sharing a signature. This is repeated until the number of blocks is stable.
+    Since the signatures of different states are independent of each other, each round can be distributed over
+    multiple processes.
+    :param offsets: The offsets array of a transition system in "compressed sparse row" layout.
+    :param labels: The label index array of a transition system in "compressed sparse row" layout.
+    :param targets: The target state array of a transition system in "compressed sparse row" layout.
+    :param blocks: A sequence mapping each state index to the index of the block it initially belongs to.
+    :param workers: Either None, in which case all signatures are computed in this process, or the number of worker
+                    processes that are to share the computation of signatures.
+    :param shard_size: The number of states for which one worker computes signatures at a time. By default, the states
+                       are split evenly among the workers.
+    :return: An array mapping each state index to the index of its block in the coarsest refinement.
+    """
+
+    n = len(offsets) - 1
+    blocks = array('Q', blocks)
+    count = len(set(blocks))
+
+    executor = None
+    if workers is not None and n > 0:
+        from concurrent.futures import ProcessPoolExecutor
+        csr = tuple(a if isinstance(a, array) else array('Q', a) for a in (offsets, labels, targets))
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=csr)
+        if shard_size is None:
+            shard_size = -(-n // workers)
+        shards = [(start, min(n, start + shard_size)) for start in range(0, n, shard_size)]
+
+    try:
+        while True:
+            if executor is None:
+                sigs = signatures(offsets, labels, targets, blocks, 0, n)
+            else:
+                futures = [executor.submit(_worker_signatures, blocks, start, end) for start, end in shards]
+                sigs = itertools.chain.from_iterable(f.result() for f in futures)
+
+            ids = {}
+            blocks = array('Q', (ids.setdefault(sig, len(ids)) for sig in sigs))
+            if len(ids) == count:
+                return blocks
+            count = len(ids)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def signature_bisimulation(*ltss, workers=None):
+    """
+    Computes the coarsest equivalence relation on the states of multiple LTSs that is a strong bisimulation, by
+    signature-based refinement. This is an alternative to bisimulation(reach_sbisim, *ltss) that is better suited for
+    large LTSs, because it operates on flat arrays and can distribute its work over multiple processes.
+    This procedure does take state content into account!
+    :param ltss: A number of LTSs.
+    :param workers: Either None, or the number of worker processes to use (see refine_signatures).
+    :exception BisimulationError: If no bisimulation exists for the given LTSs.
+    :return: A list of lists of states, encoding a partitioning of the set of all states in all LTSs
+             set into equivalence classes.
+    """
+
+    states, owners, offsets, labels, targets = _combine(ltss)
+
+    c2b = {}
+    blocks = refine_signatures(offsets, labels, targets, (c2b.setdefault(s.content, len(c2b)) for s in states),
+                               workers=workers)
+
+    relation = {}
+    for s, b in enumerate(blocks):
+        relation.setdefault(b, []).append(s)
+
+    for members in relation.values():
+        if len(set(idx for s in members for idx in owners[s])) < len(ltss):
+            raise BisimulationError("No bisimulation exists for the given LTSs!")
+
+    return [[states[s] for s in members] for members in relation.values()]
+
+
+def signature_bisimilar(*ltss, workers=None):
+    """
+    Decides if a number of LTSs are pairwise strongly bisimilar to each other, by signature-based refinement.
+    This procedure does take state content into account!
+    :param ltss: A number of LTSs.
+    :param workers: Either None, or the number of worker processes to use (see refine_signatures).
+    :return: A boolean value indicating if the LTSs are pairwise bisimilar.
+    """
+    try:
+        signature_bisimulation(*ltss, workers=workers)
+    except BisimulationError:
+        return False
+    else:
+        return True
+
+
+def trace_counterexample(lts1, lts2, weak=True, closure=None):
+    """
+    Searches for a trace of one LTS that is not a trace of another LTS. The search constructs the subset automaton of
+    lts2 on the fly and prunes pairs of states that are subsumed by pairs already explored (antichain pruning).
+    This procedure ignores state content.
+    :param lts1: The LTS the traces of which are to be included in those of lts2.
+    :param lts2: An LTS.
+    :param weak: Specifies if internal transitions are to be ignored in traces.
+    :param closure: A procedure that maps states to their tau-closures, for example one created by 'closure_cached'.
+                    This is only used if 'weak' is True.
+    :return: Either None, if the traces of lts1 are included in those of lts2, or a list of transition labels that
+             forms a trace of lts1, but not of lts2.
+    """
+
+    if not weak:
+        closure = lambda state: (state, )
+    elif closure is None:
+        closure = closure_cached()
+
+    def post(states, label):
+        reached = set()
+        for s in states:
+            for t in s.transitions:
+                if t.label == label:
+                    reached.update(closure(t.target))
+        return frozenset(reached)
+
+    antichains = dict()
+
+    def subsumed(state, states):
+        # Successful traces from (state, states) are successful from any (state, superset of states).
+        chain = antichains.setdefault(state, [])
+        if any(other <= states for other in chain):
+            return True
+        chain[:] = [other for other in chain if not states <= other]
+        chain.append(states)
+        return False
+
+    s0 = frozenset(closure(lts2.initial))
+    subsumed(lts1.initial, s0)
+    agenda = collections.deque([(lts1.initial, s0, None)])
+
+    while len(agenda) > 0:
+        s, states, trace = agenda.popleft()
+        for t in s.transitions:
+            if weak and t.label is None:
+                successors, strace = states, trace
+            else:
+                successors, strace = post(states, t.label), (t.label, trace)
+            if len(successors) == 0:
+                labels = []
+                while strace is not None:
+                    label, strace = strace
+                    labels.append(label)
+                labels.reverse()
+                return labels
+            if not subsumed(t.target, successors):
+                agenda.append((t.target, successors, strace))
+
+    return None
+
+
+def trace_included(lts1, lts2, weak=True, closure=None):
+    """
+    Decides if every trace of one LTS is also a trace of another LTS.
+    This procedure ignores state content.
+    :param lts1: An LTS.
+    :param lts2: An LTS.
+    :param weak: Specifies if internal transitions are to be ignored in traces.
+    :param closure: A procedure that maps states to their tau-closures, for example one created by 'closure_cached'.
+    :return: A boolean value.
+    """
+    return trace_counterexample(lts1, lts2, weak=weak, closure=closure) is None
+
+
+def trace_equivalent(lts1, lts2, weak=True, closure=None):
+    """
+    Decides if two LTSs have the same traces.
+    This procedure ignores state content.
+    :param lts1: An LTS.
+    :param lts2: An LTS.
+    :param weak: Specifies if internal transitions are to be ignored in traces.
+    :param closure: A procedure that maps states to their tau-closures, for example one created by 'closure_cached'.
+    :return: A boolean value.
+    """
+    if weak and closure is None:
+        closure = closure_cached()
+    return trace_included(lts1, lts2, weak, closure) and trace_included(lts2, lts1, weak, closure)
+
+
+def simulation(reachable, *ltss):
+    """
+    Computes the largest simulation relation on the states of multiple LTSs: A state v simulates a state u if they have
+    the same content and for every transition u -a-> u' there is a state v' that is reachable from v emulating a, such
+    that v' simulates u'. The relation is computed by the counter-based refinement of Henzinger, Henzinger and Kopke,
+    generalized to labelled transitions.
+    This procedure does take state content into account!
+    :param reachable: A procedure that accepts a state and a transition label as arguments and enumerates all the states
+                      that are considered 'reachable' from the given state, emulating the given transition label.
+                      reach_sbisim yields strong simulation, reach_wbisim or reach_closure yield weak simulation.
+    :param ltss: A number of LTSs.
+    :return: A set of pairs (u, v) of states of the given LTSs, such that v simulates u.
+    """
+
+    states = []
+    s2idx = dict()
+    for lts in ltss:
+        if lts.initial in s2idx:
+            continue
+        s2idx[lts.initial] = len(states)
+        states.append(lts.initial)
+        idx = len(states) - 1
+        while idx < len(states):
+            for t in states[idx].transitions:
+                if t.target not in s2idx:
+                    s2idx[t.target] = len(states)
+                    states.append(t.target)
+            idx += 1
+
+    # pre_move[(a, u')] are the u with u -a-> u', pre_match[(a, v')] are the v from which v' is reachable emulating a.
+    pre_move = collections.defaultdict(set)
+    for u, s in enumerate(states):
+        for t in s.transitions:
+            pre_move[(t.label, s2idx[t.target])].add(u)
+    labels = {a for a, _ in pre_move}
+    pre_match = collections.defaultdict(set)
+    for v, s in enumerate(states):
+        for a in labels:
+            for r in reachable(s, a):
+                pre_match[(a, s2idx[r])].add(v)
+    move_labels = [[] for _ in states]
+    for a, u in pre_move:
+        move_labels[u].append(a)
+
+    c2idx = dict()
+    for idx, s in enumerate(states):
+        c2idx.setdefault(s.content, set()).add(idx)
+    sim = [set(c2idx[s.content]) for s in states]
+
+    # count[(a, u', v)] is the number of v' reachable from v emulating a, such that v' simulates u'.
+    count = collections.Counter()
+    for (a, u), _ in pre_move.items():
+        for vv in sim[u]:
+            for v in pre_match.get((a, vv), ()):
+                count[(a, u, v)] += 1
+
+    removed = collections.deque()
+
+    def remove(u, v):
+        if v in sim[u]:
+            sim[u].discard(v)
+            removed.append((u, v))
+
+    for (a, uu), us in pre_move.items():
+        for v in range(len(states)):
+            if count[(a, uu, v)] == 0:
+                for u in us:
+                    remove(u, v)
+
+    while len(removed) > 0:
+        uu, vv = removed.popleft()
+        for a in move_labels[uu]:
+            for v in pre_match.get((a, vv), ()):
+                key = (a, uu, v)
+                count[key] -= 1
+                if count[key] == 0:
+                    for u in pre_move[(a, uu)]:
+                        remove(u, v)
+
+    return {(states[u], states[v]) for u, vs in enumerate(sim) for v in vs}
+
+
+def simulates(reachable, lts1, lts2):
+    """
+    Decides if one LTS simulates another one.
+    This procedure does take state content into account!
+    :param reachable: A procedure that accepts a state and a transition label as arguments and enumerates all the states
+                      that are considered 'reachable' from the given state, emulating the given transition label.
+    :param lts1: The LTS that is to be simulated.
+    :param lts2: The LTS that is to simulate lts1.
+    :return: A boolean value indicating if the initial state of lts2 simulates the initial state of lts1.
+    """
+    return (lts1.initial, lts2.initial) in simulation(reachable, lts1, lts2)
+
+
+class _Divergence:
+    """
+    The type of the DIVERGENCE label.
+    """
+
+    def __repr__(self):
+        return "DIVERGENCE"
+
+    def __str__(self):
+        return "DIVERGENCE"
+
+
+# The label of the transitions by which collapse_tau_cycles marks states that can perform infinitely many internal
+# transitions. Since this label is not internal, bisimilarities that ignore internal transitions distinguish divergent
+# from non-divergent states if these transitions are present.
+DIVERGENCE = _Divergence()
+
+
+def tau_sccs(lts, equal_content=False):
+    """
+    Computes the strongly connected components of the graph formed by the internal transitions of an LTS.
+    This procedure uses an iterative version of Tarjan's algorithm, such that its runtime is linear in the size of the
+    LTS and it is not limited by Python's recursion limit.
+    :param lts: An LTS.
+    :param equal_content: Specifies if only internal transitions between states of equal content are to be considered.
+                          The states of such a component are weakly bisimilar to each other, even if state content is
+                          taken into account.
+    :return: A list of lists of states, containing every state of the LTS in exactly one list. The components are
+             enumerated in reverse topological order.
+    """
+
+    index, low = dict(), dict()
+    stack, on_stack = [], set()
+    components = []
+
+    for root in number(lts)[0]:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        calls = [(root, iter(root.transitions))]
+        while len(calls) > 0:
+            s, ts = calls[-1]
+            for t in ts:
+                if t.label is not None or equal_content and t.target.content != s.content:
+                    continue
+                r = t.target
+                if r not in index:
+                    index[r] = low[r] = len(index)
+                    stack.append(r)
+                    on_stack.add(r)
+                    calls.append((r, iter(r.transitions)))
+                    break
+                elif r in on_stack:
+                    low[s] = min(low[s], index[r])
+            else:
+                calls.pop()
+                if len(calls) > 0:
+                    p = calls[-1][0]
+                    low[p] = min(low[p], low[s])
+                if low[s] == index[s]:
+                    component = []
+                    while True:
+                        r = stack.pop()
+                        on_stack.discard(r)
+                        component.append(r)
+                        if r is s:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def collapse_tau_cycles(lts, divergence=False):
+    """
+    Computes an LTS in which every cycle of internal transitions between states of equal content has been collapsed
+    into a single state. The result is weakly bisimilar to the given LTS, but usually smaller, which makes it a cheap
+    preprocessing step for 'reduce'. Cycles between states of different content cannot be collapsed, because the
+    bisimilarities computed by this module take state content into account.
+    :param lts: An LTS.
+    :param divergence: Specifies if states that lie on an internal cycle (including internal self-loops), regardless of
+                       the contents of the states on the cycle, are to be marked by a DIVERGENCE self-loop. Otherwise,
+                       divergence is lost.
+    :return: An LTS.
+    """
+
+    divergent = set()
+    if divergence:
+        for component in tau_sccs(lts):
+            if len(component) > 1:
+                divergent.update(component)
+            elif any(t.label is None and t.target is component[0] for t in component[0].transitions):
+                divergent.add(component[0])
+
+    components = tau_sccs(lts, equal_content=True)
+    s2c = {s: cidx for cidx, component in enumerate(components) for s in component}
+    states = [State(component[0].content) for component in components]
+
+    for cidx, (state, component) in enumerate(zip(states, components)):
+        seen = set()
+        for s in component:
+            for t in s.transitions:
+                tidx = s2c[t.target]
+                if t.label is None and tidx == cidx:
+                    continue
+                if (t.label, tidx) not in seen:
+                    seen.add((t.label, tidx))
+                    state.add_transition(Transition(t.label, states[tidx]))
+        if any(s in divergent for s in component):
+            state.add_transition(Transition(DIVERGENCE, state))
+
+    for state in states:
+        state.seal()
+
+    return LTS(states[s2c[lts.initial]])
+
+
+def reduce(lts, reachable, remove_internal_loops=False, preserve_divergence=False):
     """
     Computes a smaller LTS, that is equivalent to the given one under the specified bisimilarity.
     :param lts: The LTS that is to be reduced.
@@ -243,16 +1006,22 @@ def reduce(lts, reachable, remove_internal_loops=False):
                       parameter to select strong bisimilarity, observational congruence, or weak bisimilarity.
     :param remove_internal_loops: Specifies if the resulting LTS should not contain any internal transitions leading
                                   from a state back into the same state.
+    :param preserve_divergence: Specifies if internal cycles are to be collapsed before the reduction and replaced by
+                                DIVERGENCE self-loops (see collapse_tau_cycles). This makes the reduction
+                                divergence-sensitive. It must only be used with weak bisimilarity.
     :return: An LTS.
     """
 
+    if preserve_divergence:
+        lts = collapse_tau_cycles(lts, divergence=True)
+
     partitions = bisimulation(reachable, lts)
     states = [State(p[0].content) for p in partitions]
 
     s2idx = {s: idx for idx, partition in enumerate(partitions) for s in partition}
 
     for state, partition in zip(states, partitions):
-        for label, tidx in {(t.label, s2idx[t.target]) for s in partition for t in s.transitions}:
+        for label, tidx in {(label, s2idx[t]) for s in partition for label in s.labels for t in s.successors(label)}:
             if not (remove_internal_loops and label is None and state is states[tidx]):
                 state.add_transition(Transition(label, states[tidx]))
 
@@ -314,7 +1083,7 @@ def isomorphic(lts1, lts2):
                 if len(l.transitions) != len(r.transitions):
                     raise InvalidBijection()
                 for tl in l.transitions:
-                    if not any(tl.label == tr.label and bijection[tl.target][1] is tr.target for tr in r.transitions):
+                    if bijection[tl.target][1] not in r.successors(tl.label):
                         raise InvalidBijection()
         except InvalidBijection:
             continue
@@ -1,5 +1,10 @@
+import collections
+import io
+import itertools
+
 from util import check_type
 from util.immutable import Sealable, Immutable, check_sealed
+from util.printable import Printable
 
 
 class State(Sealable):
@@ -10,6 +15,8 @@ class State(Sealable):
     will take that into account.
     """
 
+    __slots__ = ("_sealed", "_hash", "_content", "_transitions", "_index")
+
     def __init__(self, content):
         """
         Creates a new LTS state.
@@ -18,6 +25,7 @@ class State(Sealable):
         super().__init__()
         self._content = content
         self._transitions = []
+        self._index = None
 
     def hash(self):
         return id(self)
@@ -26,9 +34,14 @@ class State(Sealable):
         return self is other
 
     def _seal(self):
+        self._transitions = tuple(self._transitions)
+        index = {}
+        for t in self._transitions:
+            index.setdefault(t.label, []).append(t.target)
+        self._index = {label: tuple(targets) for label, targets in index.items()}
         if isinstance(self._content, Sealable):
-            self._content.seal()
-        self._transitions = tuple(t.seal() for t in self._transitions)
+            return (self._content, *self._transitions)
+        return self._transitions
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -70,6 +83,27 @@ class State(Sealable):
         """
         return tuple(self._transitions)
 
+    @property
+    def labels(self):
+        """
+        The distinct labels of the transitions originating from this state.
+        :return: An iterable of transition labels.
+        """
+        if self._index is None:
+            return tuple(dict.fromkeys(t.label for t in self._transitions))
+        return self._index.keys()
+
+    def successors(self, label):
+        """
+        Retrieves the targets of the transitions with a given label that originate from this state. For sealed states,
+        this takes constant time, because an index of the transitions is built when the state is sealed.
+        :param label: A transition label.
+        :return: A tuple of states.
+        """
+        if self._index is None:
+            return tuple(t.target for t in self._transitions if t.label == label)
+        return self._index.get(label, ())
+
 
 class Transition(Sealable):
     """
@@ -79,6 +113,8 @@ class Transition(Sealable):
     If the label of a Transition is Sealable, the Sealable members of the Transition will take that into account.
     """
 
+    __slots__ = ("_sealed", "_hash", "_label", "_target")
+
     def __init__(self, label, target):
         """
         Creates a new transition
@@ -90,15 +126,15 @@ class Transition(Sealable):
         self._target = check_type(target, State)
 
     def hash(self):
-        return hash(self._target, self._label)
+        return hash((self._target, self._label))
 
     def equals(self, other):
         return isinstance(other, Transition) and (self._target, self._label) == (other._target, other._label)
 
     def _seal(self):
-        self._target.seal()
         if isinstance(self._label, Sealable):
-            self._label.seal()
+            return self._target, self._label
+        return self._target,
 
     def clone_unsealed(self, clones=None):
         if clones is None:
@@ -174,66 +210,269 @@ def transitions(lts):
             agenda.append(t.target)
 
 
-def lts2str(lts):
+class _Truncated(Exception):
     """
-    Denotes an LTS by a string. This is mostly for debugging purposes.
-    :param lts: The LTS to summarize in a string.
-    :return: A string.
+    Raised by a _BoundedWriter as soon as its capacity has been exceeded.
     """
-    import io
+    pass
 
-    snames = {}
+
+class _BoundedWriter:
+    """
+    A file-like object that accepts only a limited number of characters. This allows aborting the printing of very
+    large Printable objects as soon as enough of them has been formatted.
+    """
+
+    def __init__(self, limit):
+        """
+        Creates a new bounded writer.
+        :param limit: The maximum number of characters this writer accepts.
+        """
+        super().__init__()
+        self._limit = limit
+        self._parts = []
+        self._length = 0
+
+    def write(self, s):
+        self._parts.append(s)
+        self._length += len(s)
+        if self._length > self._limit:
+            raise _Truncated()
+
+    def getvalue(self):
+        """
+        Returns the characters written to this object so far.
+        :return: A str.
+        """
+        return "".join(self._parts)
+
+
+def describe(obj, limit=None):
+    """
+    Formats an object as a string, optionally truncating the result.
+    :param obj: The object to format.
+    :param limit: Either None, or the maximum length of the result. If obj is Printable, only as much of it is printed
+                  as is needed to produce a result of this length.
+    :return: A str.
+    """
+    if limit is None:
+        return str(obj)
+    if isinstance(obj, Printable):
+        out = _BoundedWriter(limit)
+        try:
+            obj.print(out)
+        except _Truncated:
+            pass
+        s = out.getvalue()
+    else:
+        s = str(obj)
+    return s if len(s) <= limit else s[:max(0, limit - 3)] + "..."
+
+
+def neighbourhood(lts, focus, depth):
+    """
+    Computes the set of states of an LTS that are close to a given state.
+    :param lts: An LTS.
+    :param focus: A state of the LTS.
+    :param depth: The maximum number of transitions between the focus and a state in the result. Transitions are
+                  traversed in both directions.
+    :return: A list of states, in breadth-first order, starting with the focus.
+    """
+
+    predecessors = {}
+    for s, t in transitions(lts):
+        predecessors.setdefault(t.target, []).append(s)
+
+    reached = [focus]
+    known = {focus}
+    frontier = 0
+    for _ in range(depth):
+        end = len(reached)
+        for s in reached[frontier:end]:
+            for r in itertools.chain((t.target for t in s.transitions), predecessors.get(s, ())):
+                if r not in known:
+                    known.add(r)
+                    reached.append(r)
+        frontier = end
+    return reached
+
+
+def _select(lts, focus, depth):
+    """
+    Enumerates the states of an LTS that are to be exported, in breadth-first order.
+    :param lts: An LTS.
+    :param focus: Either None, or a state of the LTS around which the export is to be restricted.
+    :param depth: The depth of the neighbourhood of 'focus' that is to be exported.
+    :return: A pair (states, included), where 'states' is an iterable of states and 'included' is a predicate on states.
+    """
+    if focus is None:
+        return _bfs(lts.initial), lambda s: True
+    if depth is None:
+        raise ValueError("If a focus state is given, a depth must be given as well!")
+    near = neighbourhood(lts, focus, depth)
+    return near, set(near).__contains__
+
+
+def _bfs(s0):
+    """
+    Enumerates the states of an LTS in breadth-first order.
+    :param s0: The state from which the search starts.
+    :return: A generator of states.
+    """
+    reached = {s0}
+    agenda = collections.deque([s0])
+    while len(agenda) > 0:
+        s = agenda.popleft()
+        yield s
+        for t in s.transitions:
+            if t.target not in reached:
+                reached.add(t.target)
+                agenda.append(t.target)
+
+
+def write_str(lts, out, content=describe, limit=None, focus=None, depth=None):
+    """
+    Writes a human-readable description of an LTS to a text stream, one transition per line. This is mostly for
+    debugging purposes. The output is written incrementally, i.e. no string representing the entire LTS is constructed.
+    :param lts: The LTS to describe.
+    :param out: A file-like object to which strings can be written.
+    :param content: Either None, in which case only state identifiers are written, or a procedure (c, limit) -> str
+                    that summarizes state content c in a string of at most 'limit' characters.
+    :param limit: Either None, or the maximum number of characters to spend on the content of each state.
+    :param focus: Either None, or a state of the LTS. If given, only states within 'depth' transitions of this state
+                  are described.
+    :param depth: The depth of the neighbourhood of 'focus' that is to be described.
+    """
+
+    sids = {}
 
     def name(s):
         try:
-            return snames[s]
+            return sids[s]
         except KeyError:
-            n = f"state{len(snames)}({s.content})"
-            snames[s] = n
+            n = f"state{len(sids)}" if content is None else f"state{len(sids)}({content(s.content, limit)})"
+            sids[s] = n
             return n
 
+    states, included = _select(lts, focus, depth)
     prefix = ""
+    for s in states:
+        for t in s.transitions:
+            if included(t.target):
+                out.write(f"{prefix}{name(s)} --{t.label}--> {name(t.target)}")
+                prefix = "\n"
+
+
+def _escape(s):
+    """
+    Escapes a string for use in a DOT string literal.
+    :param s: A str.
+    :return: A str.
+    """
+    return s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_dot(lts, out, content=describe, limit=None, focus=None, depth=None, cluster=None):
+    """
+    Writes an LTS to a text stream, in DOT language, suitable as input to graphviz. This is mostly for debugging
+    purposes. The output is written incrementally, i.e. no string representing the entire LTS is constructed.
+    :param lts: The LTS to format for DOT.
+    :param out: A file-like object to which strings can be written.
+    :param content: Either None, in which case states are labelled only by their identifiers, or a procedure
+                    (c, limit) -> str that summarizes state content c in a string of at most 'limit' characters.
+    :param limit: Either None, or the maximum number of characters to spend on the content of each state.
+    :param focus: Either None, or a state of the LTS. If given, only states within 'depth' transitions of this state
+                  are formatted.
+    :param depth: The depth of the neighbourhood of 'focus' that is to be formatted.
+    :param cluster: Either None, or a procedure mapping states to hashable keys. States with the same key other than
+                    None are grouped in a common subgraph, labelled by the key.
+    """
+
+    sids = {}
+
+    def node(s, indent="\t"):
+        sid = str(len(sids))
+        sids[s] = sid
+        label = sid if content is None else _escape(content(s.content, limit))
+        out.write(f"\n{indent}{sid}[label=\"{label}\"]")
+
+    out.write("digraph G {")
+
+    states, included = _select(lts, focus, depth)
+    if cluster is None:
+        for s in states:
+            if s not in sids:
+                node(s)
+            for t in s.transitions:
+                if included(t.target):
+                    if t.target not in sids:
+                        node(t.target)
+                    out.write(f"\n\t\t{sids[s]}->{sids[t.target]}[label=\"{_escape(str(t.label))}\"];")
+    else:
+        clusters = {}
+        for s in states:
+            clusters.setdefault(cluster(s), []).append(s)
+        for idx, (key, members) in enumerate(clusters.items()):
+            if key is None:
+                for s in members:
+                    node(s)
+            else:
+                out.write(f"\n\tsubgraph cluster_{idx} {{")
+                out.write(f"\n\t\tlabel=\"{_escape(describe(key, limit))}\"")
+                for s in members:
+                    node(s, indent="\t\t")
+                out.write("\n\t}")
+        for members in clusters.values():
+            for s in members:
+                for t in s.transitions:
+                    if included(t.target):
+                        out.write(f"\n\t\t{sids[s]}->{sids[t.target]}[label=\"{_escape(str(t.label))}\"];")
+
+    out.write("\n}")
+
+
+def lts2str(lts, **kwargs):
+    """
+    Denotes an LTS by a string. This is mostly for debugging purposes.
+    :param lts: The LTS to summarize in a string.
+    :param kwargs: Options for write_str.
+    :return: A string.
+    """
     with io.StringIO() as output:
-        for s, t in transitions(lts):
-            output.write(f"{prefix}{name(s)} --{t.label}--> {name(t.target)}")
-            prefix = "\n"
+        write_str(lts, output, **kwargs)
         return output.getvalue()
 
 
-def lts2dot(lts):
+def lts2dot(lts, **kwargs):
     """
     Formats an LTS in DOT language, suitable as input to graphviz. This is mostly for debugging purposes.
     :param lts: The LTS to format for DOT.
+    :param kwargs: Options for write_dot.
     :return: A string.
     """
-    import io
-
     with io.StringIO() as output:
-        sids = {}
-        def identifier(s):
-            try:
-                return sids[s]
-            except KeyError:
-                sid = f"{len(sids)}"
-                sids[s] = sid
-                output.write(f"\n\t{sid}[label=\"{s.content}\"]")
-                return sid
-        output.write("digraph G {")
-        for s, t in transitions(lts):
-            output.write(f"\n\t\t{identifier(s)}->{identifier(t.target)}[label=\"{t.label}\"];")
-        output.write("\n}")
+        write_dot(lts, output, **kwargs)
         return output.getvalue()
 
 
-def state_space(transitions):
+def state_space(transitions, project=None):
     """
     Assembles a set of transitions into a labelled-transition-system.
     :param transitions: An iterable of tuples (s, es), where es is an iterable of pairs (idx, s'), where idx is the index
      of the task in s the execution of which transforms s into s'. es comprises *all* pairs with this property.
+    :param project: Either None, or a procedure mapping every s to a hashable summary that is to be used as the
+                    content of the LTS state for s, instead of s itself. The summaries must be equal for states that
+                    must not be told apart. Since the LTS does not refer to the objects s, they can be garbage-collected
+                    once this procedure returns, and the initial partition of equivalence checks is then computed on
+                    the summaries. Note that an LTS with projected contents cannot be passed to the 'previous' parameter
+                    of engine.exploration.explore.
     :return: An LTS object. The initial state of this LTS will be the origin of the very first transition enumerated
     in 'transitions'.
     """
 
+    if project is None:
+        project = lambda s: s
+
     states = {}
     s0 = None
 
@@ -241,7 +480,7 @@ def state_space(transitions):
         try:
             origin = states[s]
         except KeyError:
-            origin = State(s)
+            origin = State(project(s))
             states[s] = origin
             if s0 is None:
                 s0 = origin
@@ -250,7 +489,7 @@ def state_space(transitions):
             try:
                 destination = states[t]
             except KeyError:
-                destination = State(t)
+                destination = State(project(t))
                 states[t] = destination
 
             origin.add_transition(Transition(idx, destination))
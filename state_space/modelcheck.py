@@ -0,0 +1,576 @@
+import abc
+from array import array
+
+from state_space.compact import CompactLTS, compact
+from util.immutable import Immutable
+
+
+def _bits(x):
+    """
+    Enumerates the indices of the bits that are set in a bit set.
+    :param x: A nonnegative int.
+    :return: A generator of ints, in ascending order.
+    """
+    s = bin(x)[:1:-1]
+    i = s.find("1")
+    while i >= 0:
+        yield i
+        i = s.find("1", i + 1)
+
+
+def _pack(indices, n):
+    """
+    Constructs a bit set.
+    :param indices: An iterable of indices of bits that are to be set.
+    :param n: An upper bound for the indices.
+    :return: A nonnegative int.
+    """
+    b = bytearray((n + 7) // 8)
+    for i in indices:
+        b[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(b, "little")
+
+
+def _unpack(x, n):
+    """
+    Converts a bit set into a form that allows testing for membership in constant time.
+    :param x: A nonnegative int.
+    :param n: An upper bound for the indices of the set bits.
+    :return: A bytes object b, such that bit i is set if and only if b[i >> 3] >> (i & 7) & 1.
+    """
+    return x.to_bytes((n + 7) // 8, "little")
+
+
+class Formula(Immutable, abc.ABC):
+    """
+    A formula of the modal mu-calculus, or of CTL, that can be evaluated on the states of an LTS.
+    """
+
+    def __init__(self, *children, free=frozenset()):
+        """
+        Creates a new formula.
+        :param children: The immediate subformulas of this formula.
+        :param free: The variables that occur free in this formula, in addition to those occurring free in 'children'.
+        """
+        super().__init__()
+        self._children = children
+        self._free = frozenset(free).union(*(c.free for c in children))
+
+    @property
+    def children(self):
+        """
+        The immediate subformulas of this formula.
+        """
+        return self._children
+
+    @property
+    def free(self):
+        """
+        The set of names of the fixpoint variables that occur free in this formula.
+        """
+        return self._free
+
+    def _key(self):
+        """
+        Returns the components of this formula that are not subformulas, for equality and hashing.
+        :return: A tuple.
+        """
+        return ()
+
+    def hash(self):
+        return hash((type(self), self._key(), self._children))
+
+    def equals(self, other):
+        return type(self) is type(other) and self._key() == other._key() and self._children == other._children
+
+    @abc.abstractmethod
+    def evaluate(self, checker, env):
+        """
+        Computes the set of states satisfying this formula.
+        :param checker: The ModelChecker for the LTS on which this formula is to be evaluated.
+        :param env: A dict mapping the free variables of this formula to bit sets of states.
+        :return: A bit set of states, i.e. a nonnegative int, the i-th bit of which is set iff state i satisfies
+                 this formula.
+        """
+        pass
+
+
+class TT(Formula):
+    """
+    The formula that is satisfied by all states.
+    """
+
+    def evaluate(self, checker, env):
+        return checker.all
+
+
+class FF(Formula):
+    """
+    The formula that is satisfied by no state.
+    """
+
+    def evaluate(self, checker, env):
+        return 0
+
+
+class Prop(Formula):
+    """
+    An atomic proposition, i.e. a predicate on state content.
+    """
+
+    def __init__(self, predicate):
+        """
+        Creates a new atomic proposition.
+        :param predicate: A procedure that maps state content to a boolean value.
+        """
+        super().__init__()
+        self._predicate = predicate
+
+    def _key(self):
+        return self._predicate,
+
+    def evaluate(self, checker, env):
+        return checker.proposition(self._predicate)
+
+
+class Not(Formula):
+    """
+    The negation of a formula.
+    """
+
+    def __init__(self, phi):
+        super().__init__(phi)
+
+    def evaluate(self, checker, env):
+        return checker.all & ~checker.evaluate(self._children[0], env)
+
+
+class And(Formula):
+    """
+    The conjunction of formulas.
+    """
+
+    def evaluate(self, checker, env):
+        x = checker.all
+        for c in self._children:
+            x &= checker.evaluate(c, env)
+        return x
+
+
+class Or(Formula):
+    """
+    The disjunction of formulas.
+    """
+
+    def evaluate(self, checker, env):
+        x = 0
+        for c in self._children:
+            x |= checker.evaluate(c, env)
+        return x
+
+
+class _Modal(Formula, abc.ABC):
+    """
+    A formula that constrains the transitions of a state, the labels of which match a set of actions.
+    """
+
+    def __init__(self, actions, phi):
+        """
+        Creates a new modal formula.
+        :param actions: Either None, in which case all transitions are considered, or a procedure that maps transition
+                        labels to boolean values, or an iterable of transition labels.
+        :param phi: The formula constraining the targets of the transitions.
+        """
+        super().__init__(phi)
+        self._actions = actions if actions is None or callable(actions) else frozenset(actions)
+
+    def _key(self):
+        return self._actions,
+
+
+class Diamond(_Modal):
+    """
+    <a>phi: Satisfied by the states that have an a-transition into a state satisfying phi.
+    With phi = TT, this formula is an atomic proposition on transition labels.
+    """
+
+    def evaluate(self, checker, env):
+        return checker.pre(checker.evaluate(self._children[0], env), self._actions)
+
+
+class Box(_Modal):
+    """
+    [a]phi: Satisfied by the states all the a-transitions of which lead into states satisfying phi.
+    """
+
+    def evaluate(self, checker, env):
+        return checker.all & ~checker.pre(checker.all & ~checker.evaluate(self._children[0], env), self._actions)
+
+
+class Var(Formula):
+    """
+    An occurrence of a fixpoint variable.
+    """
+
+    def __init__(self, name):
+        super().__init__(free={name})
+        self._name = name
+
+    def _key(self):
+        return self._name,
+
+    def evaluate(self, checker, env):
+        try:
+            return env[self._name]
+        except KeyError:
+            raise ValueError(f"The fixpoint variable {self._name} is not bound!")
+
+
+class _Fixpoint(Formula, abc.ABC):
+    """
+    A fixpoint formula, that is evaluated by Kleene iteration.
+    Closed subformulas are evaluated only once, which makes the evaluation of alternation-free formulas efficient.
+    """
+
+    def __init__(self, name, body):
+        """
+        Creates a new fixpoint formula.
+        :param name: The name of the variable bound by this formula.
+        :param body: The formula the fixpoint of which is to be computed. 'name' must occur only positively in it.
+        """
+        super().__init__(body)
+        self._name = name
+        self._free = body.free - {name}
+
+    def _key(self):
+        return self._name,
+
+    @abc.abstractmethod
+    def _start(self, checker):
+        """
+        The bit set from which Kleene iteration starts.
+        """
+        pass
+
+    def evaluate(self, checker, env):
+        env = dict(env)
+        x = self._start(checker)
+        while True:
+            env[self._name] = x
+            y = checker.evaluate(self._children[0], env)
+            if y == x:
+                return x
+            x = y
+
+
+class Mu(_Fixpoint):
+    """
+    The least fixpoint of a formula.
+    """
+
+    def _start(self, checker):
+        return 0
+
+
+class Nu(_Fixpoint):
+    """
+    The greatest fixpoint of a formula.
+    """
+
+    def _start(self, checker):
+        return checker.all
+
+
+class EX(Formula):
+    """
+    CTL: Some successor satisfies phi.
+    """
+
+    def __init__(self, phi):
+        super().__init__(phi)
+
+    def evaluate(self, checker, env):
+        return checker.pre(checker.evaluate(self._children[0], env))
+
+
+class AX(Formula):
+    """
+    CTL: All successors satisfy phi. This holds in particular in states without successors.
+    """
+
+    def __init__(self, phi):
+        super().__init__(phi)
+
+    def evaluate(self, checker, env):
+        return checker.all & ~checker.pre(checker.all & ~checker.evaluate(self._children[0], env))
+
+
+class EU(Formula):
+    """
+    CTL: There is a path along which phi holds until psi holds.
+    """
+
+    def __init__(self, phi, psi):
+        super().__init__(phi, psi)
+
+    def evaluate(self, checker, env):
+        phi, psi = (checker.evaluate(c, env) for c in self._children)
+        return checker.until_exists(phi, psi)
+
+
+class AU(Formula):
+    """
+    CTL: Along all paths, phi holds until psi holds. Maximal finite paths count as paths.
+    """
+
+    def __init__(self, phi, psi):
+        super().__init__(phi, psi)
+
+    def evaluate(self, checker, env):
+        phi, psi = (checker.evaluate(c, env) for c in self._children)
+        return checker.until_all(phi, psi)
+
+
+class EG(Formula):
+    """
+    CTL: There is a path along which phi holds globally. Maximal finite paths count as paths, like for AU, such that
+    EG is dual to AF.
+    """
+
+    def __init__(self, phi):
+        super().__init__(phi)
+
+    def evaluate(self, checker, env):
+        return checker.globally_exists(checker.evaluate(self._children[0], env))
+
+
+def EF(phi):
+    """
+    CTL: There is a path along which phi holds eventually.
+    """
+    return EU(TT(), phi)
+
+
+def AF(phi):
+    """
+    CTL: Along all paths, phi holds eventually.
+    """
+    return AU(TT(), phi)
+
+
+def AG(phi):
+    """
+    CTL: Along all paths, phi holds globally.
+    """
+    return Not(EF(Not(phi)))
+
+
+class ModelChecker:
+    """
+    Evaluates formulas on the states of an LTS. The results for closed subformulas are cached, such that many related
+    formulas can be checked on the same LTS efficiently. Sets of states are represented as bit sets, i.e. as Python
+    ints, such that boolean connectives are evaluated on whole state sets at once.
+    """
+
+    def __init__(self, lts):
+        """
+        Prepares an LTS for model checking.
+        :param lts: Either an LTS or a CompactLTS. Atomic propositions can only be evaluated if the states of the
+                    CompactLTS are known.
+        """
+        super().__init__()
+
+        if not isinstance(lts, CompactLTS):
+            lts = compact(lts)
+        self._lts = lts
+
+        n = lts.num_states
+        self._n = n
+        self._all = (1 << n) - 1
+
+        # Arrange the transitions by target state, for computing predecessors:
+        offsets, labels, targets = lts.offsets, lts.labels, lts.targets
+        roffsets = array('Q', bytes(8 * (n + 1)))
+        for t in targets:
+            roffsets[t + 1] += 1
+        for s in range(n):
+            roffsets[s + 1] += roffsets[s]
+        cursor = array('Q', roffsets)
+        rsources = array('Q', bytes(8 * len(targets)))
+        rlabels = array('Q', bytes(8 * len(targets)))
+        for s in range(n):
+            for i in range(offsets[s], offsets[s + 1]):
+                t = targets[i]
+                p = cursor[t]
+                rsources[p] = s
+                rlabels[p] = labels[i]
+                cursor[t] = p + 1
+
+        self._roffsets, self._rsources, self._rlabels = roffsets, rsources, rlabels
+        self._cache = {}
+
+    @property
+    def lts(self):
+        """
+        The CompactLTS this model checker is operating on.
+        """
+        return self._lts
+
+    @property
+    def all(self):
+        """
+        The bit set of all states.
+        """
+        return self._all
+
+    def proposition(self, predicate):
+        """
+        Computes the set of states the content of which satisfies a predicate.
+        :param predicate: A procedure mapping state content to a boolean value.
+        :return: A bit set of states.
+        """
+        if self._lts.states is None:
+            raise ValueError("Atomic propositions cannot be evaluated, because the states of the LTS are unknown!")
+        return _pack((idx for idx, s in enumerate(self._lts.states) if predicate(s.content)), self._n)
+
+    def _mask(self, actions):
+        """
+        Determines which label indices match a set of actions.
+        :param actions: Either None, a procedure that maps transition labels to boolean values, or a frozenset of labels.
+        :return: Either None, if all labels match, or a list of booleans, indexed by label index.
+        """
+        if actions is None:
+            return None
+        if callable(actions):
+            return [bool(actions(l)) for l in self._lts.alphabet]
+        return [l in actions for l in self._lts.alphabet]
+
+    def pre(self, x, actions=None):
+        """
+        Computes the set of states that have a transition into a given set of states.
+        :param x: A bit set of states.
+        :param actions: Either None, in which case all transitions are considered, or a procedure that maps
+                        transition labels to boolean values, or a frozenset of transition labels.
+        :return: A bit set of states.
+        """
+        mask = self._mask(actions)
+        roffsets, rsources, rlabels = self._roffsets, self._rsources, self._rlabels
+        b = bytearray((self._n + 7) // 8)
+        for t in _bits(x):
+            for i in range(roffsets[t], roffsets[t + 1]):
+                if mask is None or mask[rlabels[i]]:
+                    s = rsources[i]
+                    b[s >> 3] |= 1 << (s & 7)
+        return int.from_bytes(b, "little")
+
+    def until_exists(self, phi, psi):
+        """
+        Computes E[phi U psi], by a backward search from psi, that visits each state at most once.
+        :param phi: A bit set of states.
+        :param psi: A bit set of states.
+        :return: A bit set of states.
+        """
+        x = frontier = psi
+        while frontier != 0:
+            frontier = self.pre(frontier) & phi & ~x
+            x |= frontier
+        return x
+
+    def until_all(self, phi, psi):
+        """
+        Computes A[phi U psi], by counting, for every state, the successors that have not been shown to satisfy the
+        formula yet.
+        :param phi: A bit set of states.
+        :param psi: A bit set of states.
+        :return: A bit set of states.
+        """
+        offsets, roffsets, rsources = self._lts.offsets, self._roffsets, self._rsources
+        counts = array('Q', (offsets[s + 1] - offsets[s] for s in range(self._n)))
+        phi = _unpack(phi & ~psi, self._n)
+        agenda = list(_bits(psi))
+        result = bytearray(_unpack(psi, self._n))
+        while len(agenda) > 0:
+            t = agenda.pop()
+            for i in range(roffsets[t], roffsets[t + 1]):
+                s = rsources[i]
+                counts[s] -= 1
+                if counts[s] == 0 and phi[s >> 3] >> (s & 7) & 1 and not result[s >> 3] >> (s & 7) & 1:
+                    result[s >> 3] |= 1 << (s & 7)
+                    agenda.append(s)
+        return int.from_bytes(result, "little")
+
+    def globally_exists(self, phi):
+        """
+        Computes EG phi, by counting, for every state, the successors that have not been excluded from the result yet.
+        A state is excluded once all its successors have been excluded, so states without successors are never
+        excluded: They end a maximal finite path.
+        :param phi: A bit set of states.
+        :return: A bit set of states.
+        """
+        offsets, targets, roffsets, rsources = self._lts.offsets, self._lts.targets, self._roffsets, self._rsources
+        member = bytearray(_unpack(phi, self._n))
+        counts = array('Q', bytes(8 * self._n))
+        agenda = []
+        for s in _bits(phi):
+            c = sum(member[t >> 3] >> (t & 7) & 1 for t in targets[offsets[s]:offsets[s + 1]])
+            counts[s] = c
+            if c == 0 and offsets[s] < offsets[s + 1]:
+                agenda.append(s)
+        while len(agenda) > 0:
+            t = agenda.pop()
+            if not member[t >> 3] >> (t & 7) & 1:
+                continue
+            member[t >> 3] &= ~(1 << (t & 7))
+            for i in range(roffsets[t], roffsets[t + 1]):
+                s = rsources[i]
+                if member[s >> 3] >> (s & 7) & 1:
+                    counts[s] -= 1
+                    if counts[s] == 0:
+                        agenda.append(s)
+        return int.from_bytes(member, "little")
+
+    def evaluate(self, formula, env=None):
+        """
+        Computes the set of states satisfying a formula.
+        :param formula: A Formula.
+        :param env: A dict mapping the free variables of the formula to bit sets of states.
+        :return: A bit set of states, i.e. a nonnegative int, the i-th bit of which is set iff state i satisfies
+                 the formula.
+        """
+        if len(formula.free) > 0:
+            return formula.evaluate(self, {} if env is None else env)
+        try:
+            return self._cache[formula]
+        except KeyError:
+            x = formula.evaluate(self, {})
+            self._cache[formula] = x
+            return x
+
+    def satisfying(self, formula):
+        """
+        Enumerates the states satisfying a closed formula.
+        :param formula: A Formula without free variables.
+        :return: A list of state indices, in ascending order.
+        """
+        return list(_bits(self.evaluate(formula)))
+
+    def holds(self, formula, state=None):
+        """
+        Decides if a closed formula holds in a state.
+        :param formula: A Formula without free variables.
+        :param state: Either None, for the initial state of the LTS, or a state index.
+        :return: A boolean value.
+        """
+        if state is None:
+            state = self._lts.initial
+        return bool(self.evaluate(formula) >> state & 1)
+
+
+def check(lts, formula):
+    """
+    Decides if a closed formula holds in the initial state of an LTS.
+    :param lts: Either an LTS or a CompactLTS.
+    :param formula: A Formula without free variables.
+    :return: A boolean value.
+    """
+    return ModelChecker(lts).holds(formula)
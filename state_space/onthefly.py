@@ -0,0 +1,161 @@
+def _weak_successors(successors):
+    """
+    Derives the weak transition relation from a strong one, caching results.
+    :param successors: A procedure mapping a state to an iterable of pairs (label, successor), where the label None
+                       denotes internal transitions.
+    :return: A pair (strong, weak) of procedures. strong(s) returns the list of transitions of s. weak(s, label)
+             returns the set of states reachable from s by a sequence of transitions that contains no labelled
+             transition if label is None and exactly one labelled transition, with the given label, otherwise.
+    """
+
+    transitions = dict()
+    closures = dict()
+    reached = dict()
+
+    def strong(s):
+        try:
+            return transitions[s]
+        except KeyError:
+            ts = list(successors(s))
+            transitions[s] = ts
+            return ts
+
+    def closure(s):
+        try:
+            return closures[s]
+        except KeyError:
+            c = {s}
+            agenda = [s]
+            while len(agenda) > 0:
+                for label, t in strong(agenda.pop()):
+                    if label is None and t not in c:
+                        c.add(t)
+                        agenda.append(t)
+            c = frozenset(c)
+            closures[s] = c
+            return c
+
+    def weak(s, label):
+        key = (s, label)
+        try:
+            return reached[key]
+        except KeyError:
+            if label is None:
+                r = closure(s)
+            else:
+                r = set()
+                for ss in closure(s):
+                    for l, t in strong(ss):
+                        if l == label:
+                            r.update(closure(t))
+            reached[key] = r
+            return r
+
+    return strong, weak
+
+
+def _strong_successors(successors):
+    """
+    Like _weak_successors, but for strong bisimilarity, i.e. all labels, including None, are treated alike.
+    """
+
+    transitions = dict()
+
+    def strong(s):
+        try:
+            return transitions[s]
+        except KeyError:
+            ts = list(successors(s))
+            transitions[s] = ts
+            return ts
+
+    def weak(s, label):
+        return [t for l, t in strong(s) if l == label]
+
+    return strong, weak
+
+
+def bisimilar(s1, successors1, s2, successors2, weak=False, content=None):
+    """
+    Decides if two states of two (possibly infinite) transition systems are bisimilar, exploring the product of the
+    two transition relations lazily, starting from the given pair of states, i.e. without building the transition
+    systems first. The search stops as soon as the initial pair has been shown not to be bisimilar.
+    The search is depth-first and maintains a set of pairs that are assumed to be bisimilar, as well as a set of pairs
+    that have been shown not to be bisimilar. If a search succeeds even though new non-bisimilar pairs were discovered
+    during it, it is repeated, because its success may have depended on assumptions that were refuted. This
+    terminates for finite transition systems, because the set of non-bisimilar pairs grows in every repetition.
+    :param s1: A hashable state.
+    :param successors1: A procedure mapping states like s1 to iterables of pairs (label, successor).
+    :param s2: A hashable state.
+    :param successors2: A procedure mapping states like s2 to iterables of pairs (label, successor).
+    :param weak: Specifies if weak bisimilarity is to be decided, instead of strong bisimilarity. In this case, the
+                 label None is considered internal.
+    :param content: Either None, or a procedure mapping states to objects that must be equal for bisimilar states.
+    :return: A boolean value.
+    """
+
+    strong1, weak1 = (_weak_successors if weak else _strong_successors)(successors1)
+    strong2, weak2 = (_weak_successors if weak else _strong_successors)(successors2)
+
+    def check(pair):
+        # A generator that requests the pairs it needs to know about and receives True or False for each of them.
+        # Generators are driven by an explicit stack, because the search may be much deeper than Python's recursion
+        # limit.
+        p, q = pair
+        for strong, match, flip in ((strong1, weak2, False), (strong2, weak1, True)):
+            for label, pp in strong(q if flip else p):
+                for qq in match(p if flip else q, label):
+                    if (yield ((qq, pp) if flip else (pp, qq))):
+                        break
+                else:
+                    return False
+        return True
+
+    initial = (s1, s2)
+    if content is not None and content(s1) != content(s2):
+        return False
+
+    failed = set()
+
+    while True:
+        num_failed = len(failed)
+        assumed = {initial}
+        stack = [(initial, check(initial))]
+        value = None
+
+        while len(stack) > 0:
+            pair, g = stack[-1]
+            try:
+                request = g.send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+                if not value:
+                    failed.add(pair)
+                continue
+
+            if request in failed:
+                value = False
+            elif request in assumed:
+                value = True
+            elif content is not None and content(request[0]) != content(request[1]):
+                failed.add(request)
+                value = False
+            else:
+                assumed.add(request)
+                stack.append((request, check(request)))
+                value = None
+
+        if not value:
+            return False
+        if len(failed) == num_failed:
+            return True
+
+
+def lts_successors(state):
+    """
+    The successor procedure of the states of an LTS, for use with 'bisimilar'.
+    :param state: An LTS state.
+    :return: An iterable of pairs (label, successor).
+    """
+    return ((t.label, t.target) for t in state.transitions)
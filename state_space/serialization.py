@@ -0,0 +1,236 @@
+import mmap
+import re
+import struct
+import sys
+from array import array
+
+from state_space.compact import CompactLTS, compact, number
+from state_space.lts import LTS, State, Transition
+
+
+def label2str(label):
+    """
+    The default conversion of transition labels into strings, for serialization.
+    :param label: A transition label.
+    :return: A str. Internal transitions (label None) are denoted by "i", as is customary for the Aldebaran format.
+    """
+    return "i" if label is None else str(label)
+
+
+def str2label(s):
+    """
+    The default conversion of strings into transition labels, for deserialization. It is inverse to label2str for
+    all labels that are either None or strings other than "i" and "tau".
+    :param s: A str.
+    :return: A transition label.
+    """
+    return None if s in ("i", "tau") else s
+
+
+def write_aut(lts, out, label=label2str):
+    """
+    Writes an LTS to a text stream, in the Aldebaran (.aut) format. State content is not written.
+    The output is produced line by line, i.e. no string representing the entire LTS is ever constructed.
+    :param lts: Either an LTS or a CompactLTS.
+    :param out: A file-like object to which strings can be written.
+    :param label: A procedure that maps transition labels to strings.
+    """
+
+    if isinstance(lts, CompactLTS):
+        alphabet = [_quote(label(l)) for l in lts.alphabet]
+        out.write(f"des ({lts.initial}, {lts.num_transitions}, {lts.num_states})\n")
+        for s in range(lts.num_states):
+            for l, t in lts.transitions(s):
+                out.write(f"({s}, {alphabet[l]}, {t})\n")
+        return
+
+    states, s2idx = number(lts)
+    out.write(f"des (0, {sum(len(s.transitions) for s in states)}, {len(states)})\n")
+    for idx, s in enumerate(states):
+        for t in s.transitions:
+            out.write(f"({idx}, {_quote(label(t.label))}, {s2idx[t.target]})\n")
+
+
+def _quote(s):
+    """
+    Quotes a string as an Aldebaran label.
+    :param s: A str.
+    :return: A str.
+    """
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+_aut_header = re.compile(r"^\s*des\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)\s*$")
+_aut_edge = re.compile(r'^\s*\(\s*(\d+)\s*,\s*("(?:[^"\\]|\\.)*"|[^,]*?)\s*,\s*(\d+)\s*\)\s*$')
+_aut_escape = re.compile(r"\\(.)")
+
+
+def read_aut(inp, label=str2label):
+    """
+    Reads an LTS in the Aldebaran (.aut) format from a text stream. The input is consumed line by line.
+    :param inp: An iterable of lines, for example a text file.
+    :param label: A procedure that maps label strings to transition labels.
+    :exception ValueError: If the input is not well-formed.
+    :return: An LTS, the states of which all have None as their content.
+    """
+
+    lines = iter(inp)
+    for header in lines:
+        if header.strip() != "":
+            break
+    else:
+        raise ValueError("The input does not contain an Aldebaran header!")
+
+    m = _aut_header.match(header)
+    if m is None:
+        raise ValueError(f"Invalid Aldebaran header: {header.strip()}")
+    initial, num_transitions, num_states = map(int, m.groups())
+
+    if not (0 <= initial < num_states):
+        raise ValueError("The initial state of the Aldebaran input is out of range!")
+
+    states = [State(None) for _ in range(num_states)]
+    labels = {}
+    count = 0
+    for line in lines:
+        if line.strip() == "":
+            continue
+        m = _aut_edge.match(line)
+        if m is None:
+            raise ValueError(f"Invalid Aldebaran transition: {line.strip()}")
+        s, l, t = m.groups()
+        s, t = int(s), int(t)
+        if l.startswith('"'):
+            l = _aut_escape.sub(r"\1", l[1:-1])
+        try:
+            l = labels[l]
+        except KeyError:
+            l = labels.setdefault(l, label(l))
+        try:
+            states[s].add_transition(Transition(l, states[t]))
+        except IndexError as ex:
+            raise ValueError(f"The Aldebaran transition {line.strip()} refers to a state that does not exist!") from ex
+        count += 1
+
+    if count != num_transitions:
+        raise ValueError(f"The Aldebaran header announces {num_transitions} transitions, but {count} were found!")
+
+    for s in states:
+        s.seal()
+
+    return LTS(states[initial])
+
+
+# The binary format consists of a header, followed by three arrays of unsigned integers and a table of labels:
+#     magic        8 bytes    b"SPEKLTS\x01"
+#     header       6 x u64    num_states, num_transitions, num_labels, initial, itemsize, byteorder (0: little, 1: big)
+#     offsets      (num_states + 1) x itemsize
+#     labels       num_transitions x itemsize
+#     targets      num_transitions x itemsize
+#     alphabet     num_labels x (u32 length, utf-8 bytes), where length 0xFFFFFFFF denotes the internal label None.
+# Each array is padded to a multiple of 8 bytes, such that all arrays are aligned and can be memory-mapped directly.
+
+_magic = b"SPEKLTS\x01"
+_header = struct.Struct("<8s6Q")
+_internal = 0xFFFFFFFF
+_typecodes = {4: 'I', 8: 'Q'}
+
+
+def _padding(n):
+    """
+    Computes the number of bytes that are needed to pad a section of the binary format to a multiple of 8 bytes.
+    :param n: The length of the section, in bytes.
+    :return: An int.
+    """
+    return (8 - n % 8) % 8
+
+
+def write_binary(lts, out, label=label2str):
+    """
+    Writes an LTS to a binary stream, in a format that can be memory-mapped by read_binary. State content is not
+    written.
+    :param lts: Either an LTS or a CompactLTS.
+    :param out: A binary file-like object.
+    :param label: A procedure that maps transition labels other than None to strings.
+    """
+
+    if not isinstance(lts, CompactLTS):
+        lts = compact(lts)
+
+    itemsize = 4 if max(lts.num_states, lts.num_transitions, len(lts.alphabet)) < 2 ** 32 else 8
+    typecode = _typecodes[itemsize]
+
+    out.write(_header.pack(_magic, lts.num_states, lts.num_transitions, len(lts.alphabet), lts.initial,
+                           itemsize, 0 if sys.byteorder == "little" else 1))
+
+    for a in (lts.offsets, lts.labels, lts.targets):
+        if not (isinstance(a, array) and a.typecode == typecode):
+            a = array(typecode, a)
+        out.write(a)
+        out.write(bytes(_padding(len(a) * itemsize)))
+
+    for l in lts.alphabet:
+        if l is None:
+            out.write(struct.pack("<I", _internal))
+        else:
+            b = label(l).encode("utf-8")
+            out.write(struct.pack("<I", len(b)))
+            out.write(b)
+
+
+def read_binary(path, label=str2label):
+    """
+    Memory-maps a file written by write_binary. The transition arrays of the result are views into the mapped file
+    and are not parsed or copied, so that even very large LTSs can be opened immediately. The mapping is not closed
+    explicitly, but stays open for as long as these views are referenced, i.e. its lifetime follows the result.
+    :param path: The path of the file to read.
+    :param label: A procedure that maps label strings to transition labels.
+    :exception ValueError: If the file is not well-formed.
+    :return: A CompactLTS without states.
+    """
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        magic, num_states, num_transitions, num_labels, initial, itemsize, byteorder = _header.unpack_from(buffer, 0)
+    except struct.error as ex:
+        raise ValueError("The file is too short to be a binary LTS file!") from ex
+    if magic != _magic:
+        raise ValueError("The file is not a binary LTS file!")
+    try:
+        typecode = _typecodes[itemsize]
+    except KeyError:
+        raise ValueError(f"Unsupported item size {itemsize}!")
+
+    native = byteorder == (0 if sys.byteorder == "little" else 1)
+    view = memoryview(buffer)
+    position = _header.size
+    arrays = []
+    for length in (num_states + 1, num_transitions, num_transitions):
+        end = position + length * itemsize
+        if end > len(buffer):
+            raise ValueError("The file is truncated!")
+        if native:
+            arrays.append(view[position:end].cast(typecode))
+        else:
+            a = array(typecode, view[position:end])
+            a.byteswap()
+            arrays.append(a)
+        position = end + _padding(length * itemsize)
+
+    alphabet = []
+    for _ in range(num_labels):
+        if position + 4 > len(buffer):
+            raise ValueError("The file is truncated!")
+        length, = struct.unpack_from("<I", buffer, position)
+        position += 4
+        if length == _internal:
+            alphabet.append(None)
+        else:
+            if position + length > len(buffer):
+                raise ValueError("The file is truncated!")
+            alphabet.append(label(bytes(view[position:position + length]).decode("utf-8")))
+            position += length
+
+    return CompactLTS(*arrays, alphabet, initial=initial)
@@ -1,6 +1,12 @@
 import unittest
 
-from state_space.equivalence import reduce, reach_wbisim, reach_sbisim, reach_ocong, reach_cached, isomorphic, bisimilar
+import random
+import sys
+
+from state_space.equivalence import reduce, reach_wbisim, reach_sbisim, reach_ocong, reach_cached, isomorphic, bisimilar, \
+    bisimulation, signature_bisimilar, signature_bisimulation, trace_counterexample, trace_equivalent, simulates, \
+    reach_closure, closure_cached, ReachabilityCache, rebisimulation, collapse_tau_cycles, tau_sccs, DIVERGENCE
+from state_space import onthefly
 from state_space.lts import State, LTS, Transition
 
 
@@ -37,6 +43,15 @@ class TestBisimilarity(unittest.TestCase):
             self.assertFalse(b, msg="Bisimilarity was not expected, but found!")
             self.assertFalse(i, msg="Isomorphy was not expected, but found!")
 
+        if reachable is reach_sbisim:
+            self.assertEqual(signature_bisimilar(lts_in, lts_reference), b)
+
+        if reachable in (reach_sbisim, reach_wbisim):
+            o = onthefly.bisimilar(lts_in.initial, onthefly.lts_successors,
+                                   lts_reference.initial, onthefly.lts_successors,
+                                   weak=reachable is reach_wbisim, content=lambda s: s.content)
+            self.assertEqual(o, b)
+
     def examine_multiple(self, lts_in, *r2e):
         """
         Reduces an LTS according to multiple bisimilarity definitions and compares results to expectations.
@@ -484,3 +499,241 @@ class TestBisimilarity(unittest.TestCase):
                               (reach_sbisim, lts2, False),
                               (reach_ocong, lts2, False),
                               )
+
+    def test_signatures(self):
+        """
+        Tests that signature-based refinement, sequential and parallel, agrees with partition refinement.
+        """
+
+        rng = random.Random(42)
+        states = [State(rng.randrange(2)) for _ in range(200)]
+        for s in states:
+            for _ in range(rng.randrange(4)):
+                edge(s, rng.choice(states), rng.choice([None, "a", "b"]))
+        for s in states:
+            s.seal()
+        lts = LTS(states[0])
+
+        def normalize(relation):
+            return {frozenset(p) for p in relation}
+
+        expected = normalize(bisimulation(reach_sbisim, lts))
+        self.assertEqual(normalize(signature_bisimulation(lts)), expected)
+        self.assertEqual(normalize(signature_bisimulation(lts, workers=2)), expected)
+
+    def test_traces(self):
+        """
+        Tests trace inclusion and trace equivalence.
+        """
+
+        # a.(b + c) and a.b + a.c have the same traces, but are not bisimilar:
+        s0, s1, s2, s3 = [State(None) for _ in range(4)]
+        edge(s0, s1, "a")
+        edge(s1, s2, "b")
+        edge(s1, s3, "c")
+        lts1 = LTS(s0.seal())
+
+        s0, s1, s2, s3, s4 = [State(None) for _ in range(5)]
+        edge(s0, s1, "a")
+        edge(s0, s2, "a")
+        edge(s1, s3, "b")
+        edge(s2, s4, "c")
+        lts2 = LTS(s0.seal())
+
+        self.assertTrue(trace_equivalent(lts1, lts2))
+        self.assertTrue(trace_equivalent(lts1, lts2, weak=False))
+        self.assertFalse(bisimilar(reach_sbisim, lts1, lts2))
+
+        # Internal transitions are only ignored in weak traces:
+        s0, s1, s2 = [State(None) for _ in range(3)]
+        edge(s0, s1)
+        edge(s1, s2, "a")
+        edge(s2, s2)
+        lts3 = LTS(s0.seal())
+
+        s0, s1 = [State(None) for _ in range(2)]
+        edge(s0, s1, "a")
+        lts4 = LTS(s0.seal())
+
+        self.assertTrue(trace_equivalent(lts3, lts4))
+        self.assertEqual(trace_counterexample(lts3, lts4, weak=False), [None])
+        self.assertEqual(trace_counterexample(lts1, lts4), ["a", "b"])
+        self.assertIsNone(trace_counterexample(lts4, lts1))
+
+    def test_simulation(self):
+        """
+        Tests strong and weak simulation.
+        """
+
+        # a.(b + c) simulates a.b + a.c, but not vice versa:
+        s0, s1, s2, s3 = [State(None) for _ in range(4)]
+        edge(s0, s1, "a")
+        edge(s1, s2, "b")
+        edge(s1, s3, "c")
+        lts1 = LTS(s0.seal())
+
+        s0, s1, s2, s3, s4 = [State(None) for _ in range(5)]
+        edge(s0, s1, "a")
+        edge(s0, s2, "a")
+        edge(s1, s3, "b")
+        edge(s2, s4, "c")
+        lts2 = LTS(s0.seal())
+
+        self.assertTrue(simulates(reach_sbisim, lts2, lts1))
+        self.assertFalse(simulates(reach_sbisim, lts1, lts2))
+
+        # Internal transitions can be emulated by doing nothing, in weak simulation:
+        s0, s1, s2 = [State(None) for _ in range(3)]
+        edge(s0, s1)
+        edge(s1, s2, "a")
+        lts3 = LTS(s0.seal())
+
+        s0, s1 = [State(None) for _ in range(2)]
+        edge(s0, s1, "a")
+        lts4 = LTS(s0.seal())
+
+        for reachable in (reach_wbisim, reach_closure(closure_cached())):
+            self.assertTrue(simulates(reachable, lts3, lts4))
+            self.assertTrue(simulates(reachable, lts4, lts3))
+        self.assertFalse(simulates(reach_sbisim, lts3, lts4))
+        self.assertFalse(simulates(reach_sbisim, lts4, lts3))
+
+    def test_bounded_cache(self):
+        """
+        Tests that a reachability cache with a small budget evicts entries, but does not change results.
+        """
+
+        states = [State(None) for _ in range(20)]
+        for idx, s in enumerate(states):
+            edge(s, states[(idx + 1) % len(states)], "a" if idx % 3 == 0 else None)
+            edge(s, states[(idx * 7) % len(states)], "b" if idx % 5 == 0 else None)
+        for s in states:
+            s.seal()
+
+        cache = ReachabilityCache(reach_wbisim, budget=1000)
+        for _ in range(2):
+            for s in states:
+                for label in (None, "a", "b"):
+                    self.assertEqual(set(cache(s, label)), set(reach_wbisim(s, label)))
+                    self.assertLessEqual(cache.size, cache.budget)
+
+        self.assertGreater(cache.evictions, 0)
+        self.assertEqual(cache.hits + cache.misses, 2 * 3 * len(states))
+
+        lts = LTS(states[0])
+        self.assertTrue(isomorphic(reduce(lts, ReachabilityCache(reach_wbisim), remove_internal_loops=True),
+                                   reduce(lts, reach_wbisim, remove_internal_loops=True)))
+
+        # A chain needs many rounds of refinement, every one of which queries the states of the remaining blocks again:
+        states = [State(None) for _ in range(12)]
+        for idx, s in enumerate(states[:-1]):
+            edge(s, states[idx + 1], "a" if idx % 2 == 0 else None)
+        for s in states:
+            s.seal()
+
+        cache = ReachabilityCache(reach_wbisim)
+        lts = LTS(states[0])
+        self.assertTrue(isomorphic(reduce(lts, cache, remove_internal_loops=True),
+                                   reduce(lts, reach_wbisim, remove_internal_loops=True)))
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_rebisimulation(self):
+        """
+        Tests that updating a bisimulation after extending an LTS yields the same result as computing it from scratch.
+        """
+
+        rng = random.Random(7)
+        names = dict()
+
+        def build(edges, n):
+            states = [State(idx % 2) for idx in range(n)]
+            for a, label, b in edges:
+                edge(states[a], states[b], label)
+            for idx, s in enumerate(states):
+                names[s.seal()] = idx
+            return LTS(states[0])
+
+        def normalize(relation):
+            return {frozenset(names[s] for s in p) for p in relation}
+
+        n = 40
+        # Edges mostly lead "forward", so that extensions at the end affect only some of the states:
+        edges = [(a, rng.choice([None, "a", "b"]), rng.randrange(a, n)) for a in range(n) for _ in range(rng.randrange(1, 3))]
+        edges.extend((a, "a", a + 1) for a in range(n - 1))
+        extension = [(rng.randrange(n // 2, n), rng.choice([None, "b"]), n + i) for i in range(4)]
+        extension.extend((n + i, "a", rng.randrange(n + 4)) for i in range(4))
+
+        for reachable in (reach_sbisim, reach_wbisim):
+            with self.subTest(reachable=reachable.__name__):
+                previous = bisimulation(reachable, build(edges, n))
+                extended = build(edges + extension, n + 4)
+                updated = rebisimulation(reachable, extended, previous, key=names.__getitem__)
+                self.assertEqual(normalize(updated), normalize(bisimulation(reachable, extended)))
+
+    def test_divergence(self):
+        """
+        Tests the collapse of internal cycles and divergence-sensitive reduction.
+        """
+
+        # An internal cycle s0 -> s1 -> s2 -> s0, from which s1 can escape via "a":
+        s0, s1, s2, s3 = [State(None) for _ in range(4)]
+        edge(s0, s1)
+        edge(s1, s2)
+        edge(s2, s0)
+        edge(s1, s3, "a")
+        divergent = LTS(s0.seal())
+
+        s0, s1 = [State(None) for _ in range(2)]
+        edge(s0, s1, "a")
+        convergent = LTS(s0.seal())
+
+        self.assertEqual(sorted(len(c) for c in tau_sccs(divergent)), [1, 3])
+
+        collapsed = collapse_tau_cycles(divergent)
+        self.assertTrue(isomorphic(collapsed, convergent))
+
+        marked = collapse_tau_cycles(divergent, divergence=True)
+        self.assertIn(DIVERGENCE, [t.label for t in marked.initial.transitions])
+
+        # An internal cycle between states of different content is divergent as well, but cannot be collapsed:
+        a, b = State("a"), State("b")
+        edge(a, b)
+        edge(b, a)
+        alternating = LTS(a.seal())
+        self.assertEqual([len(c) for c in tau_sccs(alternating)], [2])
+        self.assertEqual(sorted(len(c) for c in tau_sccs(alternating, equal_content=True)), [1, 1])
+        marked = collapse_tau_cycles(alternating, divergence=True)
+        self.assertIn(DIVERGENCE, [t.label for t in marked.initial.transitions])
+        self.assertEqual([t.target.content for t in marked.initial.transitions if t.label is None], ["b"])
+        self.assertNotIn(DIVERGENCE, [t.label for t in collapse_tau_cycles(alternating).initial.transitions])
+
+        self.assertTrue(isomorphic(reduce(divergent, reach_wbisim, remove_internal_loops=True), convergent))
+        self.assertFalse(isomorphic(reduce(divergent, reach_wbisim, remove_internal_loops=True, preserve_divergence=True),
+                                    reduce(convergent, reach_wbisim, remove_internal_loops=True, preserve_divergence=True)))
+
+        # Long internal cycles must not exceed the recursion limit:
+        states = [State(None) for _ in range(sys.getrecursionlimit() + 100)]
+        for idx, s in enumerate(states):
+            edge(s, states[(idx + 1) % len(states)])
+        states[0].seal()
+        self.assertEqual(len(tau_sccs(LTS(states[0]))), 1)
+
+    def test_label_index(self):
+        """
+        Tests the retrieval of transition targets by label.
+        """
+
+        s0, s1, s2 = [State(None) for _ in range(3)]
+        edge(s0, s1, "a")
+        edge(s0, s2, "a")
+        edge(s0, s0)
+
+        for _ in range(2):
+            self.assertEqual(set(s0.labels), {"a", None})
+            self.assertEqual(s0.successors("a"), (s1, s2))
+            self.assertEqual(s0.successors(None), (s0, ))
+            self.assertEqual(s0.successors("b"), ())
+            s0.seal()
+
+        self.assertEqual(hash(Transition("a", s1).seal()), hash(Transition("a", s1).seal()))
@@ -0,0 +1,84 @@
+import unittest
+
+from state_space.composition import compose, compose_reduced, hide, alphabet
+from state_space.equivalence import reduce, reach_wbisim, isomorphic, bisimilar
+from state_space.lts import State, LTS, Transition
+
+
+def edge(sa, sb, label=None):
+    sa.add_transition(Transition(label, sb))
+
+
+class TestComposition(unittest.TestCase):
+    """
+    This class contains test cases for the parallel composition of LTSs.
+    """
+
+    def worker(self, name, steps):
+        """
+        Constructs an LTS that repeatedly acquires a lock, performs a number of internal steps, does its work and
+        releases the lock again.
+        :param name: The name of the worker, by which the lock identifies it.
+        :param steps: The number of internal steps.
+        :return: An LTS.
+        """
+        idle = State(None)
+        s = State(None)
+        edge(idle, s, f"acquire{name}")
+        for _ in range(steps):
+            ss = State(None)
+            edge(s, ss)
+            s = ss
+        done = State(None)
+        edge(s, done, "work")
+        edge(done, idle, f"release{name}")
+        return LTS(idle.seal())
+
+    def lock(self, *names):
+        """
+        Constructs an LTS that alternates between being acquired and released.
+        :param names: The names of the workers that can acquire the lock.
+        :return: An LTS.
+        """
+        free = State(None)
+        for name in names:
+            taken = State(None)
+            edge(free, taken, f"acquire{name}")
+            edge(taken, free, f"release{name}")
+        return LTS(free.seal())
+
+    def test_compose(self):
+        """
+        Tests parallel composition with synchronization.
+        """
+        sync = {"acquire1", "release1", "acquire2", "release2"}
+        w1, w2, lock = self.worker(1, 0), self.worker(2, 0), self.lock(1, 2)
+        self.assertEqual(alphabet(w1), {"acquire1", "work", "release1"})
+
+        # Two workers and a lock: Only one worker can work at a time.
+        system = compose([w1, w2, lock], sync)
+        self.assertEqual(alphabet(system), sync | {"work"})
+
+        s = system.initial
+        self.assertEqual({t.label for t in s.transitions}, {"acquire1", "acquire2"})
+        s = s.successors("acquire1")[0]
+        self.assertEqual([t.label for t in s.transitions], ["work"])
+
+        # Labels that are synchronized are taken jointly by all components that know them:
+        both = compose([w1, w1], {"acquire1"})
+        self.assertEqual([t.label for t in both.initial.transitions], ["acquire1"])
+
+        self.assertEqual(alphabet(hide(system, sync)), {"work"})
+
+    def test_compose_reduced(self):
+        """
+        Tests that compositional reduction yields the same result as reducing the full composition.
+        """
+        components = [self.worker(1, 3), self.worker(2, 5), self.lock(1, 2)]
+        sync = hidden = {"acquire1", "release1", "acquire2", "release2"}
+
+        monolithic = reduce(hide(compose(components, sync), hidden), reach_wbisim, remove_internal_loops=True)
+        compositional = compose_reduced(components, sync, hidden)
+
+        self.assertTrue(bisimilar(reach_wbisim, monolithic, compositional))
+        self.assertTrue(isomorphic(monolithic, compositional))
@@ -1,5 +1,9 @@
+import gc
+import sys
 import unittest
+import weakref
 
+import util
 from engine.core.atomic import type_object
 from engine.core.interaction import InteractionState, Interaction, num_interactions_possible
 from engine.core.machine import TaskStatus, MachineState
@@ -7,7 +11,11 @@ from engine.core.none import value_none
 from engine.core.data import VBool, VInt, VFloat, VStr, VException
 from engine.core.property import OrdinaryProperty
 from engine.core.type import Type
-from engine.exploration import explore, schedule_nonzeno
+from engine.dpor import explore_dpor, deadlocks
+from engine.heap import HeapProfile
+from engine.serialization import Encoder, Decoder
+from engine.exploration import explore, schedule_nonzeno, interaction_successors, changed_programs, projection, \
+    enabled_interactions, program_locations
 from engine.stack.exceptions import VTypeError
 from engine.stack.frame import Frame
 from engine.stack.instructionset import Update, Pop, Guard, Push, Launch
@@ -17,14 +25,18 @@ from engine.stack.state import StackState
 from lang.spek.data.bound import BoundProcedure
 from lang.spek.data.classes import Class
 from lang.spek.data.exceptions import JumpType
-from lang.spek.data.references import FrameReference, ReturnValueReference, FieldReference
+from lang.spek.data.cells import VCell
+from lang.spek.data.references import FrameReference, ReturnValueReference, FieldReference, CellReference, \
+    AbsoluteFrameReference
 from lang.spek.data.terms import CInt, CBool, ArithmeticBinaryOperation, ArithmeticBinaryOperator, Read, CRef, \
     UnaryPredicateTerm, UnaryPredicate, ITask, CNone, CFloat, CString, UnaryOperation, \
     UnaryOperator, BooleanBinaryOperation, BooleanBinaryOperator, Comparison, ComparisonOperator, \
     IsInstance, NewTuple, NewList, NewDict, NewJumpError, NewProcedure, \
     NewProperty, NewClass, CTerm, LoadAttrCase, StoreAttrCase, Callable, Project
 from lang.spek.data.values import VTuple, VList, VDict
-from state_space.lts import state_space
+from state_space import onthefly
+from state_space.equivalence import isomorphic
+from state_space.lts import state_space, lts2dot
 
 
 class TestSpektakelMachine(unittest.TestCase):
@@ -43,6 +55,21 @@ class TestSpektakelMachine(unittest.TestCase):
         m = StackState(TaskStatus.WAITING, frames)
         return MachineState([m, *(InteractionState(i) for i in Interaction if i != Interaction.NEVER)])
 
+    def interaction_program(self, *interactions):
+        """
+        Constructs a program that launches the given interactions one after the other, each time waiting for the
+        interaction to terminate.
+        :param interactions: An iterable of Interaction values.
+        :return: A StackProgram that expects one local variable on its stack frame.
+        """
+        instructions = []
+        for i in interactions:
+            ip = len(instructions)
+            t = FrameReference(0)
+            instructions.append(Update(CRef(t), ITask(i), ip + 1, ip))
+            instructions.append(Guard({UnaryPredicateTerm(UnaryPredicate.ISTERMINATED, Read(CRef(t))): ip + 2}, ip + 1))
+        return StackProgram(instructions)
+
     def explore(self, p, s0=None):
         """
         Computes the state space of the default machine for the given StackProgram.
@@ -403,6 +430,467 @@ class TestSpektakelMachine(unittest.TestCase):
         self.assertEqual(3 * num_interactions_possible, len(external))
         self.assertEqual(4, len(internal))
 
+    def test_onthefly(self):
+        """
+        Tests the on-the-fly comparison of the state spaces of two machines.
+        """
+
+        def initial(*interactions):
+            s0 = self.initialize_machine(self.interaction_program(*interactions), 1)
+            s0.seal()
+            return s0
+
+        successors = interaction_successors()
+
+        def progress(s):
+            # Interactions are always possible, so we observe how far the program has advanced:
+            for t in s.task_states:
+                if isinstance(t, StackState) and len(t.stack) > 0:
+                    return t.stack[-1].instruction_index
+            return None
+
+        def compare(i1, i2):
+            return onthefly.bisimilar(initial(*i1), successors, initial(*i2), successors, weak=True, content=progress)
+
+        self.assertTrue(compare([Interaction.NEXT, Interaction.PREV], [Interaction.NEXT, Interaction.PREV]))
+        self.assertFalse(compare([Interaction.NEXT, Interaction.PREV], [Interaction.PREV, Interaction.NEXT]))
+        self.assertFalse(compare([Interaction.NEXT], [Interaction.NEXT, Interaction.NEXT]))
+
+    def test_incremental(self):
+        """
+        Tests the reuse of a previous exploration after the program has been modified.
+        """
+
+        def contents(lts):
+            reached, agenda = set(), [lts.initial]
+            while len(agenda) > 0:
+                s = agenda.pop()
+                if s not in reached:
+                    reached.add(s)
+                    agenda.extend(t.target for t in s.transitions)
+            return [s.content for s in reached]
+
+        s0 = self.initialize_machine(self.interaction_program(Interaction.NEXT, Interaction.PREV), 1)
+        previous = state_space(explore(s0, scheduler=schedule_nonzeno))
+        old = {id(c) for c in contents(previous)}
+
+        # Recompiling the same code changes no programs, so all states but the initial one are reused:
+        s1 = self.initialize_machine(self.interaction_program(Interaction.NEXT, Interaction.PREV), 1)
+        self.assertEqual(changed_programs(s0, s1), [])
+        lts = state_space(explore(s1, scheduler=schedule_nonzeno, previous=previous, changed=changed_programs(s0, s1)))
+        self.assertEqual(sum(id(c) not in old for c in contents(lts)), 1)
+        self.assertTrue(isomorphic(lts, previous))
+
+        # After an edit, states referring to the old program must not be reused:
+        s2 = self.initialize_machine(self.interaction_program(Interaction.NEXT, Interaction.NEXT), 1)
+        changed = changed_programs(s0, s2)
+        self.assertEqual(len(changed), 1)
+        lts = state_space(explore(s2, scheduler=schedule_nonzeno, previous=previous, changed=changed))
+        self.assertFalse(any(id(c) in old for c in contents(lts)))
+        self.assertTrue(isomorphic(lts, state_space(explore(s2, scheduler=schedule_nonzeno))))
+
+    def test_fingerprints(self):
+        """
+        Tests that the hashes of mutated values agree with the hashes of values constructed with the same content, and
+        that the hashes of states, which are maintained incrementally during mutation, are compatible with bequals.
+        """
+
+        p = StackProgram([Pop(1), Pop(2)])
+
+        def machine(frame):
+            return MachineState([StackState(TaskStatus.WAITING, [frame])]).seal()
+
+        l = VList([VInt(1), VInt(2)])
+        l.append(VInt(3))
+        l.insert(VInt(0), VStr("x"))
+        l[VInt(1)] = VInt(4)
+        l.pop(VInt(3))
+        l.extend([VInt(5), VList([])])
+        self.assertEqual(hash(l.seal()), hash(VList([VStr("x"), VInt(4), VInt(2), VInt(5), VList([])]).seal()))
+        self.assertNotEqual(hash(l), hash(VList([VStr("x"), VInt(4), VInt(2), VInt(6), VList([])]).seal()))
+
+        d = VDict([(VStr("a"), VInt(1))])
+        d[VStr("b")] = VInt(2)
+        d[VStr("a")] = VInt(3)
+        d.update([(VStr("c"), VInt(4))])
+        d.pop(VStr("b"))
+        self.assertEqual(hash(d.seal()), hash(VDict([(VStr("c"), VInt(4)), (VStr("a"), VInt(3))]).seal()))
+
+        f = Frame(ProgramLocation(p, 0), [value_none])
+        f.resize(3)
+        f[2] = VInt(42)
+        f[0] = l
+        f[0] = VList([])
+        f.instruction_index = 1
+        f.resize(2)
+        g = Frame(ProgramLocation(p, 1), [VList([]), value_none])
+        m1, m2 = machine(f), machine(g)
+        self.assertTrue(m1.bequals(m2, {}))
+        self.assertEqual(hash(m1), hash(m2))
+
+        h = Frame(ProgramLocation(p, 1), [VList([]), VInt(1)])
+        self.assertNotEqual(hash(machine(h)), hash(m2))
+
+    def test_slots(self):
+        """
+        Tests that the values that make up machine states do not carry instance dictionaries, and that flyweight values
+        still do.
+        """
+        p = StackProgram([Pop(1)])
+        f = Frame(ProgramLocation(p, 0), [VList([VInt(1)]), VDict([(VStr("a"), VTuple([VInt(2)]))]), VCell(value_none)])
+        t = StackState(TaskStatus.WAITING, [f])
+        m = MachineState([t, InteractionState(Interaction.NEXT)])
+        for x in [m, *m.task_states, f, ProgramLocation(p, 0), *f.local]:
+            self.assertFalse(hasattr(x, "__dict__"), type(x))
+        with self.assertRaises(AttributeError):
+            f.foo = 42
+
+        self.assertIs(weakref.ref(m)(), m)
+        self.assertIs(CInt(42), CInt(42))
+        self.assertIs(CBool(True), CBool(True))
+        self.assertIs(CNone(), CNone())
+        self.assertIs(value_none, type(value_none)())
+
+    def test_locations(self):
+        """
+        Tests that jumps reuse the locations that a program holds for its instructions.
+        """
+        p = StackProgram([Pop(1), Pop(2)])
+        self.assertIs(p.location(1), p.location(1))
+        self.assertEqual(p.location(1), ProgramLocation(p, 1))
+        self.assertIsNot(p.location(1), ProgramLocation(p, 1))
+        self.assertEqual(p.location(2).index, 2)
+        self.assertEqual(p.location(-1).index, -1)
+
+        f = Frame(p.location(0), [])
+        f.instruction_index = 1
+        self.assertIs(f._location, p.location(1))
+        self.assertEqual(hash(f.seal()), hash(Frame(ProgramLocation(p, 1), []).seal()))
+
+        m = Decoder().decode(Encoder().encode(MachineState([StackState(TaskStatus.WAITING, [f])]).seal()))
+        top = m.task_states[0].stack[-1]
+        self.assertIs(top._location, top.program.location(1))
+        self.assertTrue(top.equals(f))
+
+    def test_accessors(self):
+        """
+        Tests that the accessors for tasks, frames and local variables agree with the properties that return copies,
+        and that these properties do not copy anymore once the objects have been sealed.
+        """
+        p = StackProgram([Pop(1)])
+        f, g = Frame(p.location(0), [VInt(1), VInt(2)]), Frame(p.location(0), [])
+        t = StackState(TaskStatus.WAITING, [f, g])
+        i = InteractionState(Interaction.NEXT)
+        m = MachineState([t, i])
+
+        self.assertEqual((t.depth, t.top, t.frame(0)), (2, g, f))
+        self.assertEqual((m.num_tasks, m.task_state(1), list(m.iter_task_states())), (2, i, [t, i]))
+        self.assertEqual((f[1], f.local), (VInt(2), (VInt(1), VInt(2))))
+        self.assertIsNot(f.local, f.local)
+        with self.assertRaises(IndexError):
+            StackState(TaskStatus.WAITING, []).top
+
+        m.seal()
+        self.assertIs(f.local, f.local)
+        self.assertIs(t.stack, t.stack)
+        self.assertIs(m.task_states, m.task_states)
+
+        # Decoded states are sealed, so their accessors must not copy either:
+        d = Decoder().decode(Encoder().encode(m))
+        self.assertTrue(d.equals(m))
+        g = d.task_state(0).frame(0)
+        self.assertIsInstance(g.local, tuple)
+        self.assertIs(g.local, g.local)
+        self.assertIs(d.task_state(0).stack, d.task_state(0).stack)
+        self.assertIs(d.task_states, d.task_states)
+
+    def test_interning(self):
+        """
+        Tests that content-equal atomic values are represented by the same object.
+        """
+        self.assertIs(VInt(42), VInt(42))
+        self.assertIs(VInt(VStr("42")), VInt(42))
+        self.assertIs(VStr("abc"), VStr("abc"))
+        self.assertIs(VStr("abc")[VInt(0)], VStr("a"))
+        self.assertIs(VFloat(1.5), VFloat(1.5))
+        self.assertIsNot(VFloat(0.0), VFloat(-0.0))
+        self.assertEqual(str(VFloat(-0.0)), "-0.0")
+        self.assertIsNot(VFloat(float("nan")), VFloat(float("nan")))
+
+        s = VStr("only referenced here")
+        key = s.intern_key()
+        self.assertIs(VStr.interned[key], s)
+        del s
+        gc.collect()
+        self.assertNotIn(key, VStr.interned)
+
+        l = VList([VInt(1), VStr("x")])
+        c = l.clone_unsealed()
+        self.assertIs(c[VInt(1)], l[VInt(1)])
+
+    def test_trusted(self):
+        """
+        Tests that trusted mode omits type checks on internal paths, but not at the boundaries of the API.
+        """
+        location = ProgramLocation(StackProgram([Pop(1)]), 0)
+        previous = util.set_trusted(False)
+        try:
+            with self.assertRaises(TypeError):
+                Frame(location, [42])
+            with self.assertRaises(TypeError):
+                VCell(value_none).value = 42
+            util.set_trusted(True)
+            self.assertTrue(util.trusted)
+            self.assertEqual(Frame(location, [42]).local, (42,))
+            with self.assertRaises(TypeError):
+                list(explore(42))
+        finally:
+            util.set_trusted(previous)
+
+    def test_seal_deep(self):
+        """
+        Tests that sealing does not depend on the recursion limit, and that it seals exactly the objects that are
+        reachable and have not been sealed before.
+        """
+        depth = 3 * sys.getrecursionlimit()
+        v = VInt(42)
+        cells = []
+        for _ in range(depth):
+            v = VCell(v)
+            cells.append(v)
+        shared = cells[depth // 2].seal()
+        self.assertTrue(all(c.sealed for c in cells[:depth // 2 + 1]))
+        self.assertFalse(any(c.sealed for c in cells[depth // 2 + 1:]))
+
+        f = Frame(ProgramLocation(StackProgram([Pop(1)]), 0), [v, VList([shared])])
+        m = MachineState([StackState(TaskStatus.WAITING, [f])])
+        self.assertIs(m.seal(), m)
+        self.assertTrue(all(c.sealed for c in cells))
+        self.assertTrue(f.sealed and f.local[1].sealed)
+        self.assertEqual(hash(m), hash(m.hash()))
+        self.assertTrue(m.bequals(m, {}))
+
+    def test_seal_readonly(self):
+        """
+        Tests sealing and cloning properties that do not have a setter.
+        """
+        g = StackProcedure(1, ProgramLocation(StackProgram([Pop(1)]), 0))
+        p = OrdinaryProperty(g)
+        self.assertIsNone(p.clone_unsealed().setter)
+        self.assertIs(p.seal(), p)
+        self.assertTrue(p.sealed and g.sealed)
+        self.assertIsNone(p.setter)
+
+    def test_bequals_deep(self):
+        """
+        Tests that bequals can compare values that are nested more deeply than the recursion limit allows, and that it
+        respects the aliasing of sub-values.
+        """
+
+        def chain(depth, leaf):
+            v = leaf
+            for _ in range(depth):
+                v = VCell(v)
+            return v
+
+        depth = 3 * sys.getrecursionlimit()
+        self.assertTrue(chain(depth, VInt(42)).bequals(chain(depth, VInt(42)), {}))
+        self.assertFalse(chain(depth, VInt(42)).bequals(chain(depth, VInt(43)), {}))
+        self.assertFalse(chain(depth, VInt(42)).bequals(chain(depth + 1, VInt(42)), {}))
+
+        shared = VCell(value_none)
+        aliased = VTuple([VCell(shared), VCell(shared)])
+        distinct = VTuple([VCell(VCell(value_none)), VCell(VCell(value_none))])
+        self.assertTrue(aliased.bequals(aliased.clone_unsealed(), {}))
+        self.assertFalse(aliased.bequals(distinct, {}))
+
+    def test_encoding(self):
+        """
+        Tests that machine states survive encoding and decoding, including the identities of their parts, and that
+        objects are shared between messages and between the directions of a channel.
+        """
+
+        p = StackProgram([Pop(1), Pop(2)])
+        shared = VCell(VInt(42))
+        f = Frame(ProgramLocation(p, 1), [VList([shared, VStr("x")]), VDict([(VStr("a"), VTuple([shared]))])])
+        failed = StackState(TaskStatus.FAILED, [], exception=VException("boom", VInt(1), pexception=KeyError("k")))
+        m = MachineState([StackState(TaskStatus.WAITING, [f]), InteractionState(Interaction.NEXT), failed]).seal()
+
+        e, d = Encoder(), Decoder()
+        first = e.encode(m)
+        m2 = d.decode(first)
+        self.assertIsNot(m2, m)
+        self.assertEqual(hash(m2), hash(m))
+        x = m2.task_states[2].exception
+        self.assertEqual((x.message, x.args, m2.task_states[2].status), (VStr("boom"), (VInt(1), ), TaskStatus.FAILED))
+        self.assertIsInstance(x.pexception, KeyError)
+        self.assertTrue(x.sealed)
+        l, t = m2.task_states[0].stack[-1].local
+        self.assertEqual(m2.task_states[0].stack[-1].instruction_index, 1)
+        self.assertEqual((str(l), str(t)), tuple(map(str, f.local)))
+        self.assertIs(l[VInt(0)], t[VStr("a")][VInt(0)])
+
+        # The program was defined by the first message already:
+        second = e.encode(m)
+        self.assertLess(len(second), len(first) // 2)
+        m3 = d.decode(second)
+        self.assertIs(m3.task_states[0].stack[-1].program, m2.task_states[0].stack[-1].program)
+
+        # Sending a state back decodes to the original program, so the result is bisimilar to the original state:
+        back = Decoder(shared=e).decode(Encoder(shared=d).encode(m2))
+        self.assertIs(back.task_states[0].stack[-1].program, p)
+        self.assertTrue(back.bequals(m, {}))
+
+        deep = VInt(42)
+        for _ in range(3 * sys.getrecursionlimit()):
+            deep = VCell(deep)
+        self.assertTrue(Decoder().decode(Encoder().encode(deep)).bequals(deep, {}))
+
+        for data in [b"", b"\xff", first[:len(first) // 2]]:
+            with self.assertRaises(ValueError):
+                Decoder().decode(data)
+
+    def test_heap(self):
+        """
+        Tests the attribution of the objects of machine states to types, tasks and locations, and the distinction
+        between shared and unique objects.
+        """
+        p = StackProgram([Pop(1), Pop(2)])
+        shared = VCell(VInt(42))
+        f = Frame(p.location(0), [VList([VInt(1), shared])])
+        g = Frame(p.location(1), [VDict([(VStr("a"), VInt(2))]), shared])
+        m = MachineState([StackState(TaskStatus.WAITING, [f, g]),
+                          StackState(TaskStatus.WAITING, [Frame(p.location(1), [shared])])]).seal()
+
+        profile = HeapProfile()
+        profile.add(m)
+        n, b = profile.total
+        self.assertEqual(profile.num_states, 1)
+        self.assertEqual(profile.unique, (n, b))
+        self.assertEqual(profile.types[VCell][0], 1)
+        self.assertEqual(profile.types[VList][0], 1)
+        self.assertEqual(set(profile.tasks.keys()), {None, 0, 1})
+        self.assertEqual(set(profile.locations.keys()), {None, p.location(0), p.location(1)})
+        self.assertEqual(sum(b for _, b in profile.tasks.values()), b)
+
+        # The cell is attributed to the first task it is reachable from:
+        reversed_profile = HeapProfile()
+        reversed_profile.add(MachineState(reversed(m.task_states)).seal())
+        self.assertEqual(reversed_profile.total, (n, b))
+        self.assertGreater(reversed_profile.tasks[0][1], profile.tasks[1][1])
+        self.assertLess(reversed_profile.tasks[1][1], profile.tasks[0][1])
+
+        c = m.clone_unsealed()
+        c.task_state(0).frame(0)[0] = VInt(3)
+        c.seal()
+        profile = HeapProfile()
+        profile.add(c, previous=m)
+        self.assertGreater(profile.shared[0], 0)
+        self.assertGreater(profile.unique[0], 0)
+        self.assertEqual(profile.types[VCell][0], 1)
+        self.assertNotIn(VList, profile.types)
+
+        profile = HeapProfile()
+        profile.add(m, previous=m)
+        self.assertEqual(profile.unique, (0, 0))
+
+        lts = state_space(explore(m.clone_unsealed().seal(), scheduler=schedule_nonzeno))
+        profile = HeapProfile()
+        profile.add_lts(lts, limit=1)
+        self.assertEqual(profile.num_states, 1)
+
+    def test_encoding_failure(self):
+        """
+        Tests that failing to encode or to decode a message does not leave the intern tables out of sync.
+        """
+        e, d = Encoder(), Decoder()
+        with self.assertRaises(TypeError):
+            e.encode(["x", VStr("x"), lambda: 42])
+        self.assertEqual(d.decode(e.encode(["y", "x", VStr("x")])), ["y", "x", VStr("x")])
+
+        message = e.encode(["z", "x", VStr("z")])
+        with self.assertRaises(ValueError):
+            d.decode(message[:-2])
+        self.assertEqual(d.decode(message), ["z", "x", VStr("z")])
+        self.assertEqual(d.decode(e.encode(["z", VStr("z")])), ["z", VStr("z")])
+
+    def test_projection(self):
+        """
+        Tests the projection of state contents during the construction of a state space.
+        """
+
+        t = FrameReference(0)
+        p = StackProgram([Update(CRef(t), ITask(Interaction.NEXT), 1, 0),
+                          Guard({UnaryPredicateTerm(UnaryPredicate.ISTERMINATED, Read(CRef(t))): 2}, 1)])
+
+        s0 = self.initialize_machine(p, 1).seal()
+        r = weakref.ref(s0)
+
+        # The same summary clusters the states of the full state space by program location:
+        full = state_space(explore(s0, scheduler=schedule_nonzeno))
+        dot = lts2dot(full, content=None, cluster=lambda s: ", ".join(map(str, program_locations(s.content))))
+        self.assertEqual(dot.count("subgraph"), len(set(program_locations(s.content) for s in self.explore(p, s0)[1])))
+        self.assertIn("<Line 1 of StackProgram", dot)
+        del full
+
+        lts = state_space(explore(s0, scheduler=schedule_nonzeno),
+                          project=projection(enabled_interactions, program_locations))
+        self.assertEqual(lts.initial.content, (frozenset(), (ProgramLocation(p, 0), None, None, None, None, None)))
+        contents = [t.target.content for t in lts.initial.transitions]
+        self.assertEqual(len(contents), 1)
+        self.assertIn(Interaction.NEXT, contents[0][0])
+        self.assertNotIn(Interaction.NEVER, contents[0][0])
+
+        # The explored machine states are not referenced by the projected LTS:
+        del s0
+        gc.collect()
+        self.assertIsNone(r())
+
+    def test_dpor(self):
+        """
+        Tests the stateless exploration of executions with dynamic partial order reduction.
+        """
+
+        def machine(cells, values):
+            # Every task writes a value into a cell and then blocks forever.
+            tasks = []
+            for c, v in zip(cells, values):
+                p = StackProgram([Update(CRef(CellReference(FrameReference(0))), CInt(v), 1, 1), Guard({}, 1)])
+                tasks.append(StackState(TaskStatus.WAITING, [Frame(ProgramLocation(p, 0), [c])]))
+            return MachineState(tasks)
+
+        # Tasks writing to different cells are independent, so a single execution represents all interleavings:
+        cells = [VCell(value_none) for _ in range(3)]
+        executions = list(explore_dpor(machine(cells, [1, 2, 3])))
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(len(executions[0][0]), 3)
+        self.assertEqual(len(list(deadlocks(machine(cells, [1, 2, 3])))), 1)
+
+        # Tasks writing to the same cell are dependent, so all orders must be explored:
+        cell = VCell(value_none)
+        found = set()
+        for trace, s in explore_dpor(machine([cell] * 3, [1, 2, 3])):
+            found.add(int(s.task_states[0].stack[0][0].value))
+        self.assertEqual(found, {1, 2, 3})
+
+        # Two tasks writing to the same cell and one independent task:
+        executions = list(explore_dpor(machine([cell, cell, VCell(value_none)], [1, 2, 3])))
+        self.assertEqual(len(executions), 2)
+
+        # The depth bound truncates executions:
+        executions = list(explore_dpor(machine([cell] * 3, [1, 2, 3]), depth=1))
+        self.assertEqual(sorted(trace for trace, _ in executions), [(0,), (1,), (2,)])
+
+        # Reading a frame of a task that has not been launched yet fails, so the read depends on the launch:
+        q = StackProcedure(1, ProgramLocation(StackProgram([Guard({}, 0)]), 0))
+        launcher = StackProgram([Launch(Callable(Read(CRef(FrameReference(0)))), [CInt(42)], 1, 1), Guard({}, 1)])
+        reader = StackProgram([Update(CRef(FrameReference(0)), Read(CRef(AbsoluteFrameReference(2, 0, 0))), 1, 1),
+                               Guard({}, 1)])
+        m = MachineState([StackState(TaskStatus.WAITING, [Frame(ProgramLocation(launcher, 0), [q])]),
+                          StackState(TaskStatus.WAITING, [Frame(ProgramLocation(reader, 0), [value_none])])])
+        outcomes = {trace: s.task_states[1].exception is value_none for trace, s in explore_dpor(m)}
+        self.assertEqual(outcomes, {(0, 1): True, (1, 0): False})
+
     def test_CInt(self):
         """
         Tests the successful evaluation of CInt terms.
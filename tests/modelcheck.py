@@ -0,0 +1,123 @@
+import unittest
+
+from state_space.compact import compact
+from state_space.lts import State, LTS, Transition
+from state_space.modelcheck import ModelChecker, Prop, Not, And, Or, Diamond, Box, Var, Mu, Nu, EX, AX, EU, AU, EG, \
+    EF, AF, AG, TT, FF, check
+
+
+def edge(sa, sb, label=None):
+    sa.add_transition(Transition(label, sb))
+
+
+class TestModelCheck(unittest.TestCase):
+    """
+    This class contains test cases for the evaluation of temporal logic formulas on LTSs.
+    """
+
+    def sample(self):
+        """
+        Constructs an LTS with the following structure, where states are decorated with their own index:
+        0 -a-> 1 -b-> 2 -c-> 2, 0 -a-> 3, 1 -i-> 0, and 3 is a deadlock.
+        :return: A pair (lts, index), where 'index' maps state content to the index of the state in compact(lts).
+        """
+        s0, s1, s2, s3 = [State(idx) for idx in range(4)]
+        edge(s0, s1, "a")
+        edge(s0, s3, "a")
+        edge(s1, s2, "b")
+        edge(s1, s0)
+        edge(s2, s2, "c")
+        lts = LTS(s0.seal())
+        clts = compact(lts)
+        return clts, {s.content: idx for idx, s in enumerate(clts.states)}
+
+    def assertStates(self, checker, formula, expected):
+        """
+        Asserts that a formula is satisfied by exactly the expected states.
+        :param checker: A ModelChecker.
+        :param formula: The Formula to evaluate.
+        :param expected: The set of the contents of the states that are expected to satisfy the formula.
+        """
+        found = {checker.lts.states[idx].content for idx in checker.satisfying(formula)}
+        self.assertEqual(found, set(expected))
+
+    def test_propositional(self):
+        """
+        Tests atomic propositions and boolean connectives.
+        """
+        lts, _ = self.sample()
+        m = ModelChecker(lts)
+        even = Prop(lambda c: c % 2 == 0)
+        self.assertStates(m, TT(), {0, 1, 2, 3})
+        self.assertStates(m, FF(), set())
+        self.assertStates(m, even, {0, 2})
+        self.assertStates(m, Not(even), {1, 3})
+        self.assertStates(m, And(even, Prop(lambda c: c > 0)), {2})
+        self.assertStates(m, Or(even, Prop(lambda c: c == 3)), {0, 2, 3})
+
+    def test_modal(self):
+        """
+        Tests modal operators and propositions on transition labels.
+        """
+        lts, _ = self.sample()
+        m = ModelChecker(lts)
+        self.assertStates(m, Diamond(["a"], TT()), {0})
+        self.assertStates(m, Diamond(lambda l: l is None, TT()), {1})
+        self.assertStates(m, Box(None, Prop(lambda c: c > 0)), {0, 2, 3})
+        self.assertStates(m, EX(Prop(lambda c: c == 3)), {0})
+        self.assertStates(m, AX(FF()), {3})
+
+    def test_ctl(self):
+        """
+        Tests CTL operators.
+        """
+        lts, _ = self.sample()
+        m = ModelChecker(lts)
+        deadlock = AX(FF())
+        two = Prop(lambda c: c == 2)
+        self.assertStates(m, EF(deadlock), {0, 1, 3})
+        self.assertStates(m, AF(two), {2})
+        self.assertStates(m, EG(Prop(lambda c: c < 2)), {0, 1})
+        self.assertStates(m, EG(Prop(lambda c: c != 2)), {0, 1, 3})
+        self.assertStates(m, AG(Not(deadlock)), {2})
+        self.assertStates(m, EU(Prop(lambda c: c != 3), two), {0, 1, 2})
+        self.assertStates(m, AU(Prop(lambda c: c == 1), two), {2})
+        self.assertTrue(check(lts, EF(two)))
+        self.assertFalse(check(lts, AF(two)))
+
+    def test_duality(self):
+        """
+        Tests that EG and AF, as well as EF and AG, are dual to each other, also in the presence of deadlocks.
+        """
+        s0, s1 = State(0), State(1)
+        edge(s0, s1, "a")
+        deadlocking = LTS(s0.seal())
+
+        for lts in (self.sample()[0], deadlocking):
+            m = ModelChecker(lts)
+            for p in (TT(), FF(), Prop(lambda c: c == 0), Prop(lambda c: c == 2), Prop(lambda c: c != 3)):
+                self.assertEqual(m.evaluate(AF(p)), m.evaluate(Not(EG(Not(p)))))
+                self.assertEqual(m.evaluate(AG(p)), m.evaluate(Not(EF(Not(p)))))
+
+        self.assertStates(ModelChecker(compact(deadlocking)), Not(EG(Not(FF()))), set())
+
+    def test_fixpoints(self):
+        """
+        Tests least and greatest fixpoints, which must agree with the corresponding CTL operators.
+        """
+        lts, _ = self.sample()
+        m = ModelChecker(lts)
+        phi = Prop(lambda c: c < 2)
+        psi = Prop(lambda c: c == 2)
+        eu = Mu("X", Or(psi, And(phi, Diamond(None, Var("X")))))
+        self.assertEqual(m.evaluate(eu), m.evaluate(EU(phi, psi)))
+        for chi in (phi, Not(psi)):
+            eg = Nu("X", And(chi, Or(AX(FF()), Diamond(None, Var("X")))))
+            self.assertEqual(m.evaluate(eg), m.evaluate(EG(chi)))
+
+        # Infinitely often "c":
+        inf_c = Nu("X", Mu("Y", Or(Diamond(["c"], Var("X")), Diamond(None, Var("Y")))))
+        self.assertStates(m, inf_c, {0, 1, 2})
+
+        with self.assertRaises(ValueError):
+            m.evaluate(Var("X"))
@@ -0,0 +1,125 @@
+import random
+import unittest
+
+from engine.core.data import VInt, VStr
+from lang.spek.data.values import VList, VDict
+from util.persistent import PVector, PMap
+
+
+class Colliding:
+    """
+    A hashable object the hash of which collides with that of many other instances.
+    """
+
+    def __init__(self, x):
+        self.x = x
+
+    def __hash__(self):
+        return self.x % 7
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and self.x == other.x
+
+
+class TestPersistent(unittest.TestCase):
+    """
+    This class contains test cases for persistent data structures, and for the values that are based on them.
+    """
+
+    def test_vector(self):
+        """
+        Tests construction, indexing, updating and popping of PVectors, across the boundaries of trie levels.
+        """
+        for n in [0, 1, 31, 32, 33, 1024, 1056, 1057, 33825]:
+            with self.subTest(n=n):
+                items = list(range(n))
+                v = PVector(items)
+                w = PVector()
+                for x in items:
+                    w = w.append(x)
+                self.assertEqual(list(v), items)
+                self.assertEqual(list(w), items)
+                self.assertEqual(len(w), n)
+                self.assertEqual([w[i] for i in range(0, n, 17)], items[::17])
+
+                for i in [0, n // 2, n - 33, n - 1]:
+                    if 0 <= i < n:
+                        expected = list(items)
+                        expected[i] = "x"
+                        self.assertEqual(list(v.set(i, "x")), expected)
+                self.assertEqual(list(v), items)
+
+                u = v
+                for i in reversed(items):
+                    u, x = u.pop()
+                    self.assertEqual(x, i)
+                    if i % 257 == 0:
+                        self.assertEqual(list(u), items[:i])
+                self.assertEqual(len(u), 0)
+                with self.assertRaises(IndexError):
+                    u.pop()
+
+    def test_vector_sharing(self):
+        """
+        Tests that updates share the parts of a PVector that they do not change.
+        """
+        v = PVector(range(5000))
+        self.assertIs(v.map(lambda x: x), v)
+        w = v.map(lambda x: -1 if x == 0 else x)
+        self.assertEqual(w[0], -1)
+        self.assertEqual(list(w)[1:], list(v)[1:])
+        self.assertIs(w._root[-1], v._root[-1])
+        self.assertIs(w._tail, v._tail)
+        self.assertIs(v.set(-1, 42)._root, v._root)
+
+    def test_map(self):
+        """
+        Tests PMaps against Python's dicts, including the order of iteration.
+        """
+        rng = random.Random(4711)
+        for keys in [lambda: rng.randint(0, 3000), lambda: Colliding(rng.randint(0, 60))]:
+            d, m = dict(), PMap()
+            for i in range(5000):
+                k = keys()
+                if k in d and rng.random() < 0.4:
+                    del d[k]
+                    m = m.delete(k)
+                else:
+                    d[k] = i
+                    m = m.set(k, i)
+                self.assertEqual(len(m), len(d))
+                if i % 250 == 0:
+                    self.assertEqual(list(m.items()), list(d.items()))
+                    self.assertTrue(all(m[k] == v for k, v in d.items()))
+            self.assertEqual(list(m.items()), list(d.items()))
+            with self.assertRaises(KeyError):
+                m.delete(Colliding(61))
+            self.assertNotIn(Colliding(61), m)
+
+    def test_values(self):
+        """
+        Tests that cloning lists and dicts shares the unchanged parts of their contents.
+        """
+        inner = VList([VInt(1)])
+        l = VList([VInt(i) for i in range(100)] + [inner])
+        c = l.clone_unsealed()
+        self.assertIsNot(c[VInt(100)], inner)
+        self.assertIs(c._items._root, l._items._root)
+        c.append(VInt(100))
+        c[VInt(0)] = VStr("x")
+        self.assertEqual(len(l), 101)
+        self.assertEqual(l[VInt(0)], VInt(0))
+        self.assertEqual(hash(c.seal()), hash(VList(list(c._items)).seal()))
+
+        l.pop(VInt(100))
+        c = l.clone_unsealed()
+        self.assertIs(c._items, l._items)
+
+        d = VDict([(VStr("a"), VInt(1)), (VStr("b"), VInt(2))])
+        c = d.clone_unsealed()
+        self.assertIs(c._items, d._items)
+        c[VStr("c")] = inner
+        c.pop(VStr("a"))
+        self.assertEqual([k.wrapped for k in d.keys_python()], [VStr("a"), VStr("b")])
+        self.assertEqual([k.wrapped for k in c.keys_python()], [VStr("b"), VStr("c")])
+        self.assertIsNot(c.clone_unsealed()[VStr("c")], inner)
@@ -0,0 +1,145 @@
+import io
+import os
+import tempfile
+import unittest
+
+from state_space.compact import compact, expand
+from state_space.equivalence import isomorphic
+from state_space.lts import State, LTS, Transition, write_dot, write_str, lts2dot, lts2str
+from state_space.serialization import write_aut, read_aut, write_binary, read_binary
+
+
+def edge(sa, sb, label=None):
+    sa.add_transition(Transition(label, sb))
+
+
+class TestSerialization(unittest.TestCase):
+    """
+    This class contains test cases for reading and writing LTSs.
+    """
+
+    def sample(self):
+        """
+        Constructs a small LTS with internal transitions, loops and labels that need quoting.
+        :return: An LTS.
+        """
+        s0, s1, s2, s3 = [State(None) for _ in range(4)]
+        edge(s0, s1, "put?")
+        edge(s1, s2)
+        edge(s2, s2)
+        edge(s2, s3, 'say "hello"')
+        edge(s3, s0, "get!(2)")
+        edge(s1, s3, "get!(2)")
+        return LTS(s0.seal())
+
+    def test_compact(self):
+        """
+        Tests the conversion of LTSs into compact LTSs and back.
+        """
+        lts = self.sample()
+        clts = compact(lts)
+
+        self.assertEqual(clts.num_states, 4)
+        self.assertEqual(clts.num_transitions, 6)
+        self.assertIs(clts.states[clts.initial], lts.initial)
+        self.assertTrue(isomorphic(lts, expand(clts)))
+
+    def test_aut(self):
+        """
+        Tests writing and reading the Aldebaran format.
+        """
+        lts = self.sample()
+        with io.StringIO() as out:
+            write_aut(lts, out)
+            text = out.getvalue()
+
+        self.assertTrue(text.startswith("des (0, 6, 4)\n"))
+        self.assertIn('"i"', text)
+
+        lts2 = read_aut(io.StringIO(text))
+        self.assertTrue(isomorphic(lts, lts2))
+
+        with io.StringIO() as out:
+            write_aut(compact(lts2), out)
+            self.assertTrue(isomorphic(lts, read_aut(io.StringIO(out.getvalue()))))
+
+    def test_aut_invalid(self):
+        """
+        Tests that malformed Aldebaran input is rejected.
+        """
+        for text in ["", "des (0, 1)\n", "des (0, 2, 1)\n(0, \"a\", 0)\n", "des (0, 1, 1)\n(0, \"a\", 1)\n"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    read_aut(io.StringIO(text))
+
+    def test_binary(self):
+        """
+        Tests writing the binary format and memory-mapping it.
+        """
+        lts = self.sample()
+        fd, path = tempfile.mkstemp(suffix=".lts")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                write_binary(lts, out)
+
+            clts = read_binary(path)
+            self.assertEqual(clts.num_states, 4)
+            self.assertEqual(clts.num_transitions, 6)
+            self.assertIsNone(clts.states)
+            self.assertIn(None, clts.alphabet)
+            self.assertTrue(isomorphic(lts, expand(clts)))
+            del clts
+
+            # Every proper prefix of the file, including those that end within the label table, is rejected:
+            with open(path, "rb") as f:
+                data = f.read()
+            for cut in range(len(data)):
+                with open(path, "wb") as out:
+                    out.write(data[:cut])
+                with self.subTest(cut=cut), self.assertRaises(ValueError):
+                    read_binary(path)
+        finally:
+            os.remove(path)
+
+    def test_export(self):
+        """
+        Tests the streaming export of LTSs as text and in DOT language.
+        """
+        lts = self.sample()
+
+        with io.StringIO() as out:
+            write_str(lts, out)
+            self.assertEqual(out.getvalue(), lts2str(lts))
+        self.assertEqual(len(lts2str(lts).splitlines()), 6)
+        self.assertNotIn("None)", lts2str(lts, content=None))
+
+        with io.StringIO() as out:
+            write_dot(lts, out)
+            self.assertEqual(out.getvalue(), lts2dot(lts))
+        dot = lts2dot(lts)
+        self.assertTrue(dot.startswith("digraph G {"))
+        self.assertEqual(dot.count("->"), 6)
+        self.assertIn('say \\"hello\\"', dot)
+
+    def test_export_options(self):
+        """
+        Tests truncation, restriction to a neighbourhood and clustering of exported states.
+        """
+        s0, s1, s2, s3 = [State("x" * 100) for _ in range(4)]
+        edge(s0, s1, "a")
+        edge(s1, s2, "b")
+        edge(s2, s3, "c")
+        lts = LTS(s0.seal())
+
+        dot = lts2dot(lts, limit=10)
+        self.assertNotIn("x" * 11, dot)
+        self.assertIn("x" * 7 + "...", dot)
+
+        self.assertEqual(lts2dot(lts, focus=s1, depth=1).count("->"), 2)
+        self.assertEqual(lts2str(lts, focus=s3, depth=1, content=None), "state0 --c--> state1")
+        with self.assertRaises(ValueError):
+            lts2dot(lts, focus=s1)
+
+        dot = lts2dot(lts, content=None, cluster=lambda s: "odd" if s in (s1, s3) else None)
+        self.assertEqual(dot.count("subgraph"), 1)
+        self.assertEqual(dot.count("->"), 3)
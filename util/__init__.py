@@ -1,3 +1,23 @@
+import os
+
+# In trusted mode, internal engine paths skip the type checks that are only meant to catch programming errors,
+# see set_trusted.
+trusted = os.environ.get("SPEKTAKEL_TRUSTED", "") not in ("", "0")
+
+
+def set_trusted(value):
+    """
+    Switches trusted mode on or off. In trusted mode, the construction and mutation of machine states on the hot paths
+    of execution and exploration omit calls to check_type and check_types. Checks at the boundaries of the API, for
+    example in exploration procedures or in the constructors of instructions and terms, remain in place.
+    Trusted mode is off by default, unless the environment variable SPEKTAKEL_TRUSTED is set to a value other than 0.
+    :param value: A bool specifying if trusted mode is to be switched on.
+    :return: A bool specifying if trusted mode was switched on before this call.
+    """
+    global trusted
+    previous = trusted
+    trusted = bool(value)
+    return previous
 
 
 def check_type(x, t, msg=None, allow_none=False):
@@ -44,6 +44,8 @@ class Sealable:
     An object that is mutable after its construction, but can be sealed, to become immutable.
     """
 
+    __slots__ = ()
+
     def __init__(self, *largs, **kwargs):
         super().__init__(*largs, **kwargs)
         self._sealed = False
@@ -75,7 +77,8 @@ class Sealable:
                                     "because modifying it might change its hash and thus violate invariants"
                                     " of hash-based container structures!") from ex
         if self._hash is None:
-            self._hash = self.hash()
+            # Python reduces the results of __hash__ only if they exceed sys.maxsize, but ints already from 2 ** 61 on:
+            self._hash = hash(self.hash())
         return self._hash
 
     def __eq__(self, other):
@@ -87,21 +90,29 @@ class Sealable:
     @abc.abstractmethod
     def _seal(self):
         """
-        Makes this object immutable.
+        Makes this object immutable, but not the objects it refers to.
         self.hash must raise a SealException before this method has been called.
         Any other methods that would modify the state of the object must raise a SealException *after* this method
         has been called.
+        :return: An iterable of the Sealable objects that must be sealed together with this object.
         """
         pass
 
     def seal(self):
         """
-        Seals this object, i.e. makes it immutable.
+        Seals this object, i.e. makes it immutable, together with all the objects it refers to.
         :return: This object.
         """
+        # Sealed objects are never entered again, so the cost of sealing a clone is proportional to the number of
+        # objects that were cloned or constructed since. Proceeding iteratively avoids a recursion limit on the depth
+        # of the objects to seal.
         if not self._sealed:
-            self._sealed = True
-            self._seal()
+            agenda = [self]
+            while len(agenda) > 0:
+                x = agenda.pop()
+                if not x._sealed:
+                    x._sealed = True
+                    agenda.extend(x._seal())
         return self
 
     @property
@@ -138,12 +149,14 @@ class Immutable(Sealable, abc.ABC):
     An object that is both immutable and defines an abstract equality.
     """
 
+    __slots__ = ()
+
     def __init__(self, *largs, **kwargs):
         super().__init__(*largs, **kwargs)
         self._sealed = True
 
     def _seal(self):
-        pass
+        return ()
 
     def clone_unsealed(self, clones=None):
         return self
@@ -0,0 +1,442 @@
+# Persistent data structures never modify an instance once it has been constructed. Every update returns a new
+# instance that shares all the parts of the old one that it did not have to change. This makes copying free, and
+# lets a large number of slightly different versions of the same container coexist in little memory.
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_MASK = 2 ** 64 - 1
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    def _popcount(x):
+        """
+        Counts the bits that are set in an int.
+        :param x: A non-negative int.
+        :return: An int.
+        """
+        return bin(x).count("1")
+
+
+class PVector:
+    """
+    An immutable sequence, implemented as a bit-partitioned trie of branching factor 32 with a separate tail, in the
+    style of Clojure's vectors: Indexing, appending, updating and popping the last element take time logarithmic in
+    the length of the vector (with a base of 32), and only copy the path from the root to the affected leaf.
+    """
+
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, items=()):
+        """
+        Creates a new PVector.
+        :param items: An iterable of the elements of the new vector.
+        """
+        items = tuple(items)
+        count = len(items)
+        tailoff = 0 if count == 0 else ((count - 1) >> _BITS) << _BITS
+        nodes = [items[i:i + _WIDTH] for i in range(0, tailoff, _WIDTH)]
+        shift = _BITS
+        while len(nodes) > _WIDTH:
+            nodes = [tuple(nodes[i:i + _WIDTH]) for i in range(0, len(nodes), _WIDTH)]
+            shift += _BITS
+        self._count = count
+        self._shift = shift
+        self._root = tuple(nodes)
+        self._tail = items[tailoff:]
+
+    @classmethod
+    def _make(cls, count, shift, root, tail):
+        v = cls.__new__(cls)
+        v._count = count
+        v._shift = shift
+        v._root = root
+        v._tail = tail
+        return v
+
+    def _tailoff(self):
+        return self._count - len(self._tail)
+
+    def _leaf(self, index):
+        # Retrieves the leaf tuple that contains the given (non-negative) index.
+        if index >= self._tailoff():
+            return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(index >> level) & _MASK]
+        return node
+
+    def _index(self, index):
+        index = int(index)
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("vector index out of range")
+        return index
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        index = self._index(index)
+        return self._leaf(index)[index & _MASK]
+
+    def __iter__(self):
+        for i in range(0, self._tailoff(), _WIDTH):
+            yield from self._leaf(i)
+        yield from self._tail
+
+    def __repr__(self):
+        return "PVector({})".format(repr(list(self)))
+
+    def append(self, x):
+        """
+        Appends an element to this vector.
+        :param x: The element to append.
+        :return: A PVector.
+        """
+        count, shift = self._count, self._shift
+
+        if len(self._tail) < _WIDTH:
+            return PVector._make(count + 1, shift, self._root, self._tail + (x,))
+
+        def path(level, node):
+            return node if level == 0 else (path(level - _BITS, node),)
+
+        def push(level, parent):
+            # Inserts the full tail as the rightmost leaf below 'parent'.
+            sub = ((count - 1) >> level) & _MASK
+            if level == _BITS:
+                child = self._tail
+            elif sub < len(parent):
+                child = push(level - _BITS, parent[sub])
+            else:
+                child = path(level - _BITS, self._tail)
+            return parent[:sub] + (child,) + parent[sub + 1:]
+
+        if (count >> _BITS) > (1 << shift):
+            root = (self._root, path(shift, self._tail))
+            shift += _BITS
+        else:
+            root = push(shift, self._root)
+        return PVector._make(count + 1, shift, root, (x,))
+
+    def set(self, index, x):
+        """
+        Replaces an element of this vector.
+        :param index: The index of the element to replace. Negative indices count from the end.
+        :param x: The new element.
+        :exception IndexError: If the index is out of range.
+        :return: A PVector.
+        """
+        index = self._index(index)
+        if index >= self._tailoff():
+            i = index & _MASK
+            return PVector._make(self._count, self._shift, self._root, self._tail[:i] + (x,) + self._tail[i + 1:])
+
+        def assoc(level, node):
+            i = (index >> level) & _MASK
+            child = x if level == 0 else assoc(level - _BITS, node[i])
+            return node[:i] + (child,) + node[i + 1:]
+
+        return PVector._make(self._count, self._shift, assoc(self._shift, self._root), self._tail)
+
+    def pop(self):
+        """
+        Removes the last element of this vector.
+        :exception IndexError: If this vector is empty.
+        :return: A pair (v, x), where v is a PVector and x is the removed element.
+        """
+        count, shift = self._count, self._shift
+        if count == 0:
+            raise IndexError("pop from empty vector")
+        last = self._tail[-1]
+        if count == 1:
+            return PVector(), last
+        if len(self._tail) > 1:
+            return PVector._make(count - 1, shift, self._root, self._tail[:-1]), last
+
+        def drop(level, node):
+            # Removes the rightmost leaf below 'node', returning None if nothing remains.
+            sub = ((count - 2) >> level) & _MASK
+            if level > _BITS:
+                child = drop(level - _BITS, node[sub])
+                if child is not None:
+                    return node[:sub] + (child,)
+            return node[:sub] if sub > 0 else None
+
+        tail = self._leaf(count - 2)
+        root = drop(shift, self._root) or ()
+        if shift > _BITS and len(root) == 1:
+            root = root[0]
+            shift -= _BITS
+        return PVector._make(count - 1, shift, root, tail), last
+
+    def map(self, f):
+        """
+        Applies a function to all the elements of this vector. All the nodes of the trie for which f returns the
+        elements themselves are shared between this vector and the result.
+        :param f: A procedure mapping elements to elements.
+        :return: A PVector, which is this vector itself if f returned all the elements themselves.
+        """
+
+        def visit(level, node):
+            if level == 0:
+                mapped = tuple(f(x) for x in node)
+            else:
+                mapped = tuple(visit(level - _BITS, c) for c in node)
+            return node if all(a is b for a, b in zip(mapped, node)) else mapped
+
+        root = visit(self._shift, self._root)
+        tail = visit(0, self._tail)
+        if root is self._root and tail is self._tail:
+            return self
+        return PVector._make(self._count, self._shift, root, tail)
+
+
+class _Bitmap:
+    """
+    An inner node of a hash array mapped trie. Bit i of the bitmap is set if and only if the node has a child for the
+    hash fragment i. Children are stored compactly, in the order of their fragments. A child is either an entry,
+    i.e. a tuple (h, key, position, value), or another node.
+    """
+
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap, children):
+        self.bitmap = bitmap
+        self.children = children
+
+
+class _Collision:
+    """
+    A node of a hash array mapped trie that holds the entries for keys that all have the same hash.
+    """
+
+    __slots__ = ("h", "children")
+
+    def __init__(self, h, children):
+        self.h = h
+        self.children = children
+
+
+def _lookup(node, h, key):
+    # Returns the entry for the given key.
+    shift = 0
+    while True:
+        if type(node) is _Collision:
+            for e in node.children:
+                if e[1] == key:
+                    return e
+            raise KeyError(key)
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            raise KeyError(key)
+        node = node.children[_popcount(node.bitmap & (bit - 1))]
+        if type(node) is tuple:
+            if node[0] == h and (node[1] is key or node[1] == key):
+                return node
+            raise KeyError(key)
+        shift += _BITS
+
+
+def _pair(shift, a, b):
+    # Constructs the smallest subtrie containing two entries with different keys.
+    if a[0] == b[0]:
+        return _Collision(a[0], (a, b))
+    fa, fb = (a[0] >> shift) & _MASK, (b[0] >> shift) & _MASK
+    if fa == fb:
+        return _Bitmap(1 << fa, (_pair(shift + _BITS, a, b),))
+    return _Bitmap((1 << fa) | (1 << fb), (a, b) if fa < fb else (b, a))
+
+
+def _insert(node, shift, entry):
+    # Returns a pair (n, added), where n is the node updated with the given entry.
+    h, key = entry[0], entry[1]
+    if isinstance(node, _Collision):
+        if node.h != h:
+            return _insert(_Bitmap(1 << ((node.h >> shift) & _MASK), (node,)), shift, entry)
+        for i, e in enumerate(node.children):
+            if e[1] == key:
+                return _Collision(h, node.children[:i] + (entry,) + node.children[i + 1:]), False
+        return _Collision(h, node.children + (entry,)), True
+
+    bit = 1 << ((h >> shift) & _MASK)
+    i = _popcount(node.bitmap & (bit - 1))
+    if not node.bitmap & bit:
+        return _Bitmap(node.bitmap | bit, node.children[:i] + (entry,) + node.children[i:]), True
+    child = node.children[i]
+    if isinstance(child, tuple):
+        if child[0] == h and child[1] == key:
+            child, added = entry, False
+        else:
+            child, added = _pair(shift + _BITS, child, entry), True
+    else:
+        child, added = _insert(child, shift + _BITS, entry)
+    return _Bitmap(node.bitmap, node.children[:i] + (child,) + node.children[i + 1:]), added
+
+
+def _remove(node, shift, h, key):
+    # Returns the node without the entry for the given key, an entry if that is all that remains of the node, or None if
+    # nothing remains.
+    if isinstance(node, _Collision):
+        for i, e in enumerate(node.children):
+            if e[1] == key:
+                children = node.children[:i] + node.children[i + 1:]
+                return children[0] if len(children) == 1 else _Collision(h, children)
+        raise KeyError(key)
+
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        raise KeyError(key)
+    i = _popcount(node.bitmap & (bit - 1))
+    child = node.children[i]
+    if isinstance(child, tuple):
+        if not (child[0] == h and child[1] == key):
+            raise KeyError(key)
+        child = None
+    else:
+        child = _remove(child, shift + _BITS, h, key)
+
+    if child is None:
+        bitmap, children = node.bitmap & ~bit, node.children[:i] + node.children[i + 1:]
+    else:
+        bitmap, children = node.bitmap, node.children[:i] + (child,) + node.children[i + 1:]
+    if len(children) == 0:
+        return None
+    if len(children) == 1 and isinstance(children[0], tuple) and shift > 0:
+        return children[0]
+    return _Bitmap(bitmap, children)
+
+
+class PMap:
+    """
+    An immutable mapping, implemented as a hash array mapped trie, that iterates in insertion order, like Python's
+    dicts: Lookup, insertion and removal take time logarithmic in the size of the map (with a base of 32) and only copy
+    the path from the root to the affected entry.
+    The trie maps every key to its value and to its position in a PVector of the entries of the map, which determines
+    the order of iteration. Removed entries leave gaps in this vector, that are eliminated once they make up half of it.
+    """
+
+    __slots__ = ("_root", "_entries", "_count")
+
+    def __init__(self, items=()):
+        """
+        Creates a new PMap.
+        :param items: Either a mapping, or an iterable of key-value pairs. If a key occurs more than once, the last value
+                      for it is used.
+        """
+        entries = tuple(dict(items).items())
+        root = _Bitmap(0, ())
+        for pos, (k, v) in enumerate(entries):
+            root, _ = _insert(root, 0, (hash(k) & _HASH_MASK, k, pos, v))
+        self._root = root
+        self._entries = PVector(entries)
+        self._count = len(entries)
+
+    @classmethod
+    def _make(cls, root, entries, count):
+        m = cls.__new__(cls)
+        m._root = root
+        m._entries = entries
+        m._count = count
+        return m
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        try:
+            _lookup(self._root, hash(key) & _HASH_MASK, key)
+            return True
+        except KeyError:
+            return False
+
+    def __getitem__(self, key):
+        return _lookup(self._root, hash(key) & _HASH_MASK, key)[3]
+
+    def get(self, key, default=None):
+        """
+        Retrieves the value for a key.
+        :param key: The key to look up.
+        :param default: The value to return if the key is not contained in this map.
+        :return: The value for the key, or the default.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        """
+        Enumerates the entries of this map in insertion order.
+        :return: An iterable of key-value pairs.
+        """
+        return (e for e in self._entries if e is not None)
+
+    def keys(self):
+        """
+        Enumerates the keys of this map in insertion order.
+        :return: An iterable of keys.
+        """
+        return (e[0] for e in self.items())
+
+    def values(self):
+        """
+        Enumerates the values of this map in insertion order.
+        :return: An iterable of values.
+        """
+        return (e[1] for e in self.items())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __repr__(self):
+        return "PMap({})".format(repr(dict(self.items())))
+
+    def __getstate__(self):
+        # The trie is determined by the hashes of the keys, which may differ between processes:
+        return tuple(x for item in self.items() for x in item)
+
+    def __setstate__(self, state):
+        self.__init__(zip(state[0::2], state[1::2]))
+
+    def set(self, key, value):
+        """
+        Associates a key with a value. If the key is already contained in this map, it keeps its position in the order
+        of iteration, and the original key object is retained.
+        :param key: A hashable object.
+        :param value: An object.
+        :return: A PMap.
+        """
+        h = hash(key) & _HASH_MASK
+        try:
+            _, original, pos, old = _lookup(self._root, h, key)
+        except KeyError:
+            root, _ = _insert(self._root, 0, (h, key, len(self._entries), value))
+            return PMap._make(root, self._entries.append((key, value)), self._count + 1)
+        if old is value:
+            return self
+        root, _ = _insert(self._root, 0, (h, original, pos, value))
+        return PMap._make(root, self._entries.set(pos, (original, value)), self._count)
+
+    def delete(self, key):
+        """
+        Removes a key from this map.
+        :param key: A hashable object.
+        :exception KeyError: If the key is not contained in this map.
+        :return: A PMap.
+        """
+        h = hash(key) & _HASH_MASK
+        pos = _lookup(self._root, h, key)[2]
+        if self._count == 1:
+            return PMap()
+        root = _remove(self._root, 0, h, key)
+        entries = self._entries.set(pos, None)
+        if pos == len(entries) - 1:
+            entries, _ = entries.pop()
+        if len(entries) >= 2 * (self._count - 1) + _WIDTH:
+            return PMap(e for e in entries if e is not None)
+        return PMap._make(root, entries, self._count - 1)
@@ -7,6 +7,8 @@ class Printable(abc.ABC):
     An object that can be efficiently formatted as a string.
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def print(self, out):
         """